@@ -1,9 +1,9 @@
-from app import supabase
+from app import db
 
 def add_sample_data():
     try:
         # Add a sample company
-        company = supabase.table('companies').insert({
+        company = db.table('companies').insert({
             'name': 'Tech Solutions Inc.',
             'email': 'contact@techsolutions.com',
             'address': '123 Tech Street, Silicon Valley',
@@ -15,7 +15,7 @@ def add_sample_data():
         print('Company created:', company.data)
         
         # Add a sample client
-        client = supabase.table('clients').insert({
+        client = db.table('clients').insert({
             'company_id': company.data[0]['id'],
             'name': 'John Smith Enterprises',
             'email': 'john@smithenterprises.com',
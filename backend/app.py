@@ -1,21 +1,29 @@
-from flask import Flask, jsonify, request, send_file, send_from_directory
+from flask import Flask, Response, g, jsonify, request, send_file, send_from_directory
 from flask_cors import CORS
-from supabase import create_client
 from dotenv import load_dotenv
 import os
-from datetime import datetime
+import time
+from datetime import datetime, date, timedelta
 from models.models import Company, Employee, Client, Quotation, Item
-from docx import Document
-from docx.shared import Inches, Pt, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.table import WD_ALIGN_VERTICAL
+from repositories import create_repository
+from metrics import registry, http_requests, http_errors, http_latency, observe_render, InstrumentedRepository
+from pagination import DEFAULT_PAGE_SIZE, parse_page_args, fetch_page, iter_pages, parse_sort, parse_sorted_page_args, fetch_sorted_page
+from selection import parse_fields, parse_ids, select_columns, project, MAX_IDS_PER_REQUEST
+from item_search import ItemSearchIndex, SEARCH_FIELDS, DEFAULT_RESULT_LIMIT, MAX_RESULT_LIMIT
+from hsn_gst import lookup_gst_percentage, GST_CACHE_MAX_AGE, GST_TABLE_VERSION
+from cache import TTLCache
+from ref_numbers import QuoteNumberAllocator, DatabaseCounterBackend, LocalCounterBackend, format_ref_number
+from jobs import JobQueue
+from fanout import fanout
+from pricing import price_quotation, MAX_PRICE_LINES
+from zip_stream import stream_zip
+from exports import stream_export, EXPORT_FORMATS, EXPORT_MIMETYPES
+from item_import import ItemImporter, ROW_READERS, IMPORT_FORMATS, DEFAULT_IMPORT_BATCH_SIZE, MAX_IMPORT_BATCH_SIZE
 from io import BytesIO
 from werkzeug.utils import secure_filename
-from docx.oxml import parse_xml
-from docx.oxml.ns import nsdecls
-import base64
-import requests
-from collections import OrderedDict
+import csv
+import hashlib
+import sys
 
 # Load environment variables
 load_dotenv()
@@ -27,53 +35,355 @@ CORS(app,
          "origins": ["http://localhost:3000"],
          "supports_credentials": True,
          "allow_headers": ["Content-Type", "Authorization"],
-         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
+         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+         "expose_headers": ["Content-Disposition", "X-Ref-Number"]
      }})
 
 # Configure Flask app
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
 app.config['DEBUG'] = True
 
+# Upper bound on the number of codes resolved by one POST /api/hsn/gst
+MAX_HSN_BATCH_SIZE = 5000
+
 # Configure upload folder
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
-# Initialize Supabase client
+# Data access goes through a repository: DATA_BACKEND=supabase (the default)
+# or sqlite to run against a local database file. The Supabase client is
+# created on the first query, so workers start without touching the network;
+# /api/ready checks that the database can actually be reached.
 try:
-    supabase_url = os.getenv('SUPABASE_URL')
-    supabase_key = os.getenv('SUPABASE_KEY')
-    
-    if not supabase_url or not supabase_key:
-        raise ValueError("Supabase URL or Key not found in environment variables")
-    
-    supabase = create_client(supabase_url, supabase_key)
-    
-    # Test the connection
-    test_response = supabase.table('companies').select('*').limit(1).execute()
-    print("Successfully connected to Supabase!")
+    # Every database call is counted and timed for /api/metrics
+    db = InstrumentedRepository(create_repository())
 except ValueError as e:
     print(f"Configuration Error: {e}")
     raise
-except Exception as e:
-    print(f"Error connecting to Supabase: {str(e)}")
-    raise
+
+# Search index over the items table, built on the first search request
+item_index = ItemSearchIndex(
+    lambda: iter_pages(lambda: db.table('items').select('*')),
+    refresh_seconds=int(os.getenv('ITEM_SEARCH_REFRESH_SECONDS', '300'))
+)
+
+# Read-through caches for tables that rarely change. Every write route that
+# touches one of these tables must invalidate its cache.
+CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', '60'))
+companies_cache = TTLCache('companies', ttl=CACHE_TTL_SECONDS)
+employees_cache = TTLCache('employees', ttl=CACHE_TTL_SECONDS)
+clients_cache = TTLCache('clients', ttl=CACHE_TTL_SECONDS)
+
+def get_cached_row(cache, table, row_id):
+    """Return one row by id through `cache`, or None if it does not exist"""
+    if row_id is None:
+        return None
+    def load():
+        result = db.table(table).select('*').eq('id', row_id).execute()
+        return result.data[0] if result.data else None
+    return cache.get_or_load(('id', str(row_id)), load)
+
+def get_company(company_id):
+    return get_cached_row(companies_cache, 'companies', company_id)
+
+def quotation_render_data(quotation, company, client=None, employee=None):
+    """Build the renderer payload for a stored quotation.
+
+    Only the grand total is stored, so the lines and totals are priced again
+    from the stored unit rates, quantities, discounts and GST rates.
+    """
+    priced = price_quotation(quotation.get('items') or [])
+    return {
+        'company': company,
+        'client': Client.from_db(client) if client else {},
+        'employee': Employee.from_db(employee) if employee else {},
+        'refNumber': quotation['ref_number'],
+        'quotationDate': (quotation.get('date') or '')[:10],
+        'items': priced['items'],
+        'subTotal': priced['subTotal'],
+        'totalGST': priced['totalGST'],
+        'grandTotal': priced['grandTotal'],
+        'gstSummary': priced['gstSummary']
+    }
+
+# A quotation with the rows it refers to, read in a single PostgREST request
+QUOTATION_DETAIL_SELECT = '*, companies(*), clients(*), employees(*)'
+
+def fetch_quotation(quotation_id):
+    """Read a quotation with its company, client and employee embedded; None if it does not exist"""
+    quotation = db.table('quotations').select(QUOTATION_DETAIL_SELECT).eq('id', quotation_id).execute()
+    return quotation.data[0] if quotation.data else None
+
+def split_quotation(quotation):
+    """Take the embedded rows off a QUOTATION_DETAIL_SELECT row: (quotation, company, client, employee)"""
+    return (quotation, quotation.pop('companies', None), quotation.pop('clients', None),
+            quotation.pop('employees', None))
+
+def read_quote_counter(company_id):
+    """Read a company's last quote number straight from the database.
+
+    Cached company rows can lag behind quotations created by other workers, so
+    the counter is never taken from the cache.
+    """
+    counter = db.table('companies').select('last_quote_number').eq('id', company_id).execute()
+    return counter.data[0]['last_quote_number'] if counter.data else 0
+
+# Quotation numbers are handed out atomically per company. QUOTE_NUMBER_BACKEND=local
+# keeps the counters in process (seeded from the database) for stress tests.
+if os.getenv('QUOTE_NUMBER_BACKEND', 'database') == 'local':
+    quote_number_backend = LocalCounterBackend(seed=read_quote_counter)
+else:
+    quote_number_backend = DatabaseCounterBackend(db)
+quote_numbers = QuoteNumberAllocator(
+    quote_number_backend,
+    block_size=int(os.getenv('QUOTE_NUMBER_BLOCK_SIZE', '1'))
+)
+
+def allocate_ref_number(company):
+    """Allocate the next quotation number for a company and format its ref number"""
+    new_number = quote_numbers.allocate(company['id'])
+    # Only this company's row and the cached lists show its last_quote_number
+    company_key = ('id', str(company['id']))
+    companies_cache.invalidate_where(lambda key: key == company_key or key[0] == 'list')
+    return format_ref_number(company.get('ref_format') or 'QUOTE-{YYYY}-{NUM}', new_number)
+
+# The document stack (python-docx, lxml, requests) is only imported by the first
+# render, so workers that serve JSON routes never load it. Set
+# PRELOAD_RENDERER=true on workers dedicated to rendering to load it at startup.
+def renderer():
+    """Return the quotation_renderer module, importing it on first use"""
+    import quotation_renderer
+    return quotation_renderer
+
+def invalidate_company_skeletons():
+    # Until the renderer is loaded this process has rendered (and cached) nothing
+    if 'quotation_renderer' in sys.modules:
+        renderer().invalidate_company_skeletons()
+
+# Worker pool for ?async=true document generation. RENDER_POOL=thread renders in
+# this process instead of in separate worker processes. Job states are kept
+# under UPLOAD_FOLDER, so a poll answered by another web worker still finds them.
+render_jobs = JobQueue(
+    max_workers=int(os.getenv('RENDER_WORKERS', '0')) or None,
+    processes=os.getenv('RENDER_POOL', 'process') == 'process',
+    keep_seconds=int(os.getenv('RENDER_JOB_RETENTION_SECONDS', '3600')),
+    state_dir=os.path.join(UPLOAD_FOLDER, 'jobs')
+)
+
+registry.gauge(
+    'render_jobs', 'Render jobs held by this process, by state', ('state',),
+    collect=lambda: [({'state': state}, count) for state, count in render_jobs.stats().items()
+                     if state not in ('workers', 'pool')]
+)
+registry.gauge(
+    'cache_entries', 'Entries in the read-through caches', ('cache',),
+    collect=lambda: [({'cache': cache.name}, cache.stats()['size'])
+                     for cache in (companies_cache, employees_cache, clients_cache)]
+)
+
+# Largest number of ids accepted by one POST /api/quotations/render-batch
+MAX_RENDER_BATCH_IDS = 5000
+# Ids per `in` filter when reading a batch, to keep request URLs short
+RENDER_BATCH_ID_CHUNK = 200
+
+# Longest a GET /api/jobs/<id>?wait= request may block waiting for a job
+MAX_JOB_WAIT_SECONDS = 30
+
+def save_upload(filename, content):
+    """Write a generated document to UPLOAD_FOLDER and describe it for the client"""
+    with open(os.path.join(UPLOAD_FOLDER, filename), 'wb') as f:
+        f.write(content)
+    return {'filename': filename}
+
+def is_truthy(value):
+    return str(value).lower() in ('1', 'true', 'yes')
+
+if is_truthy(os.getenv('PRELOAD_RENDERER')):
+    renderer()
+
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+def send_document(content, filename):
+    """Send a rendered document straight from memory as a .docx download"""
+    return send_file(BytesIO(content), mimetype=DOCX_MIMETYPE, as_attachment=True, download_name=filename)
+
+def render_document(data):
+    """Render a quotation in this process and return the .docx bytes"""
+    start = time.perf_counter()
+    content = renderer().render_docx(data)
+    observe_render('request', time.perf_counter() - start, len(content))
+    return content
+
+def rendered(mode, result):
+    """Record a (content, seconds) result from render_docx_timed and return the content"""
+    content, seconds = result
+    observe_render(mode, seconds, len(content))
+    return content
+
+def run_list_query(query):
+    """Execute a list query as one keyset page.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page. A ?ids=
+    multi-get returns every requested row unless it asks for a smaller limit.
+    Raises ValueError for bad paging arguments.
+    """
+    default_limit = MAX_IDS_PER_REQUEST if 'ids' in request.args else DEFAULT_PAGE_SIZE
+    page = parse_page_args(request.args, default_limit)
+    return fetch_page(query, page['limit'], page['after'])
+
+def list_query(table, model):
+    """Build a list query for `table` narrowed by ?fields= and ?ids=.
+
+    The requested columns are pushed down into the select, so only they are
+    read and sent. Returns (query, fields); fields is None when the request
+    did not ask for specific fields. Raises ValueError for bad arguments.
+    """
+    fields = parse_fields(request.args, model.FIELDS)
+    query = db.table(table).select(select_columns(fields))
+    ids = parse_ids(request.args)
+    if ids is not None:
+        query = query.in_('id', ids)
+    return query, fields
+
+# Column whose newest value changes whenever a table does. Quotations are never
+# updated in place, so their id is enough.
+VERSION_COLUMNS = {'quotations': 'id'}
+
+def table_version(table):
+    """Cheap fingerprint of a table: its row count and newest version column value"""
+    column = VERSION_COLUMNS.get(table, 'updated_at')
+    result = db.table(table).select(column, count='exact').order(column, desc=True).limit(1).execute()
+    newest = result.data[0][column] if result.data else None
+    return f"{result.count}:{newest}"
+
+def list_etag(*tables):
+    """Strong ETag for a list response built from `tables` with the current query string"""
+    versions = '|'.join(f"{table}={table_version(table)}" for table in tables)
+    key = f"{versions}|{request.query_string.decode('utf-8')}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def load_list(table, query):
+    """Run a list query and tag the result with its ETag, for storing in a cache"""
+    # The ETag is computed first so a write landing in between can only make it
+    # older than the rows, which costs a refetch rather than a stale 304
+    etag = list_etag(table)
+    rows, next_cursor = run_list_query(query)
+    return etag, rows, next_cursor
+
+def not_modified(etag):
+    """Empty 304 response for a conditional GET whose ETag still matches"""
+    response = app.response_class(status=304)
+    return with_etag(response, etag)
+
+def with_etag(response, etag):
+    """Attach a list ETag and ask clients to revalidate it before reuse"""
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+def cacheable_gst_response(response):
+    """Mark a GST lookup response as cacheable until the HSN table changes"""
+    response.cache_control.public = True
+    response.cache_control.max_age = GST_CACHE_MAX_AGE
+    response.set_etag(GST_TABLE_VERSION)
+    return response
+
+def count_rows(table):
+    """Count the rows of a table without transferring them"""
+    return db.table(table).select('id', count='exact').limit(1).execute().count
+
+# Request metrics for /api/metrics
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Label by URL rule, not path, so /api/items/1 and /api/items/2 share a series
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        http_requests.inc(route=route, method=request.method, status=response.status_code)
+        http_latency.observe(time.perf_counter() - started, route=route, method=request.method)
+        if response.status_code >= 500:
+            http_errors.inc(route=route, method=request.method)
+    return response
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
 
 # Health check route
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy", "message": "API is running"}), 200
 
+# Readiness probe: unlike /api/health, this runs a query against the database
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    start = time.perf_counter()
+    try:
+        db.table('companies').select('id').limit(1).execute()
+    except Exception as e:
+        return jsonify({"status": "unavailable", "backend": db.name, "error": str(e)}), 503
+    return jsonify({
+        "status": "ready",
+        "backend": db.name,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1)
+    }), 200
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify({
+        "success": True,
+        "data": {cache.name: cache.stats() for cache in (companies_cache, employees_cache, clients_cache)}
+    })
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    try:
+        stats = {}
+        for table in ('companies', 'clients', 'employees', 'items'):
+            stats[table] = count_rows(table)
+
+        # Quotation count and value are aggregated in the database by the
+        # quotation_totals() function (migrations/create_quotation_totals_function.sql)
+        try:
+            totals = db.rpc('quotation_totals', {}).execute().data[0]
+            stats['quotations'] = totals['quotation_count']
+            stats['quotation_total'] = float(totals['total_value'] or 0)
+        except Exception as e:
+            print(f"Warning: quotation_totals() unavailable, counting quotations only: {str(e)}")
+            stats['quotations'] = count_rows('quotations')
+            stats['quotation_total'] = None
+
+        return jsonify({
+            "success": True,
+            "data": stats
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 # Company routes
 @app.route('/api/companies', methods=['GET'])
 def get_companies():
     try:
-        companies = supabase.table('companies').select('*').execute()
-        return jsonify({
+        query, fields = list_query('companies', Company)
+        etag, companies, next_cursor = companies_cache.get_or_load(
+            ('list', request.query_string),
+            lambda: load_list('companies', query)
+        )
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+        return with_etag(jsonify({
             "success": True,
-            "data": [Company.from_db(company) for company in companies.data]
-        })
+            "data": [project(Company.from_db(company), fields) for company in companies],
+            "next_cursor": next_cursor
+        }), etag)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -81,7 +391,8 @@ def get_companies():
 def create_company():
     try:
         data = request.json
-        company = supabase.table('companies').insert(data).execute()
+        company = db.table('companies').insert(data).execute()
+        companies_cache.invalidate()
         return jsonify({
             "success": True,
             "data": Company.from_db(company.data[0])
@@ -93,7 +404,9 @@ def create_company():
 def update_company(company_id):
     try:
         data = request.json
-        company = supabase.table('companies').update(data).eq('id', company_id).execute()
+        company = db.table('companies').update(data).eq('id', company_id).execute()
+        companies_cache.invalidate()
+        invalidate_company_skeletons()
         if not company.data:
             return jsonify({"success": False, "error": "Company not found"}), 404
         return jsonify({
@@ -106,14 +419,14 @@ def update_company(company_id):
 @app.route('/api/companies/<int:company_id>', methods=['DELETE'])
 def delete_company(company_id):
     try:
-        # First delete associated quotations
-        quotations = supabase.table('quotations').delete().eq('company_id', company_id).execute()
+        # First delete associated quotations. Clients are shared between
+        # companies (clients.company_id was dropped), so they are kept.
+        quotations = db.table('quotations').delete().eq('company_id', company_id).execute()
         
-        # Then delete associated clients
-        clients = supabase.table('clients').delete().eq('company_id', company_id).execute()
-        
-        # Finally delete the company
-        company = supabase.table('companies').delete().eq('id', company_id).execute()
+        # Then delete the company, which the quotations referenced
+        company = db.table('companies').delete().eq('id', company_id).execute()
+        companies_cache.invalidate()
+        invalidate_company_skeletons()
         
         if not company.data:
             return jsonify({"success": False, "error": "Company not found"}), 404
@@ -147,9 +460,11 @@ def upload_company_seal(company_id):
             
             # Update company with seal image URL
             seal_url = f"/uploads/{unique_filename}"  # URL path to access the image
-            company = supabase.table('companies').update({
+            company = db.table('companies').update({
                 'seal_image_url': seal_url
             }).eq('id', company_id).execute()
+            companies_cache.invalidate()
+            invalidate_company_skeletons()
             
             if not company.data:
                 return jsonify({"success": False, "error": "Company not found"}), 404
@@ -172,14 +487,22 @@ def uploaded_file(filename):
 def get_clients():
     try:
         company_id = request.args.get('company_id')
-        query = supabase.table('clients').select('*')
+        query, fields = list_query('clients', Client)
         if company_id:
             query = query.eq('company_id', company_id)
-        clients = query.execute()
-        return jsonify({
+        etag, clients, next_cursor = clients_cache.get_or_load(
+            ('list', request.query_string),
+            lambda: load_list('clients', query)
+        )
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+        return with_etag(jsonify({
             "success": True,
-            "data": [Client.from_db(client) for client in clients.data]
-        })
+            "data": [project(Client.from_db(client), fields) for client in clients],
+            "next_cursor": next_cursor
+        }), etag)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -187,7 +510,8 @@ def get_clients():
 def create_client():
     try:
         data = request.json
-        client = supabase.table('clients').insert(data).execute()
+        client = db.table('clients').insert(data).execute()
+        clients_cache.invalidate()
         return jsonify({
             "success": True,
             "data": Client.from_db(client.data[0])
@@ -199,7 +523,8 @@ def create_client():
 def update_client(client_id):
     try:
         data = request.json
-        client = supabase.table('clients').update(data).eq('id', client_id).execute()
+        client = db.table('clients').update(data).eq('id', client_id).execute()
+        clients_cache.invalidate()
         if not client.data:
             return jsonify({"success": False, "error": "Client not found"}), 404
         return jsonify({
@@ -213,11 +538,19 @@ def update_client(client_id):
 @app.route('/api/employees', methods=['GET'])
 def get_employees():
     try:
-        employees = supabase.table('employees').select('*').execute()
-        return jsonify({
+        etag, employees, next_cursor = employees_cache.get_or_load(
+            ('list', request.query_string),
+            lambda: load_list('employees', db.table('employees').select('*'))
+        )
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+        return with_etag(jsonify({
             "success": True,
-            "data": [Employee.from_db(employee) for employee in employees.data]
-        })
+            "data": [Employee.from_db(employee) for employee in employees],
+            "next_cursor": next_cursor
+        }), etag)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -225,7 +558,8 @@ def get_employees():
 def create_employee():
     try:
         data = request.json
-        employee = supabase.table('employees').insert(data).execute()
+        employee = db.table('employees').insert(data).execute()
+        employees_cache.invalidate()
         return jsonify({
             "success": True,
             "data": Employee.from_db(employee.data[0])
@@ -237,7 +571,8 @@ def create_employee():
 def update_employee(employee_id):
     try:
         data = request.json
-        employee = supabase.table('employees').update(data).eq('id', employee_id).execute()
+        employee = db.table('employees').update(data).eq('id', employee_id).execute()
+        employees_cache.invalidate()
         if not employee.data:
             return jsonify({"success": False, "error": "Employee not found"}), 404
         return jsonify({
@@ -251,14 +586,15 @@ def update_employee(employee_id):
 def delete_employee(employee_id):
     try:
         # Check if employee has any quotations
-        quotations = supabase.table('quotations').select('id').eq('employee_id', employee_id).execute()
+        quotations = db.table('quotations').select('id').eq('employee_id', employee_id).execute()
         if quotations.data:
             return jsonify({
                 "success": False,
                 "error": "Cannot delete employee with existing quotations"
             }), 400
 
-        employee = supabase.table('employees').delete().eq('id', employee_id).execute()
+        employee = db.table('employees').delete().eq('id', employee_id).execute()
+        employees_cache.invalidate()
         if not employee.data:
             return jsonify({"success": False, "error": "Employee not found"}), 404
             
@@ -270,17 +606,79 @@ def delete_employee(employee_id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 # Quotation routes
+
+# Columns GET /api/quotations can be sorted on with ?sort=column or ?sort=-column
+QUOTATION_SORT_COLUMNS = ('date', 'ref_number', 'total', 'id')
+DEFAULT_QUOTATION_SORT = '-date'
+
+def parse_quotation_filters(values):
+    """Read quotation filters from query arguments or a JSON body.
+
+    Supports company_id, client_id and employee_id, an inclusive
+    date_from/date_to range (YYYY-MM-DD) and a ref_number prefix. Raises
+    ValueError for malformed values.
+    """
+    filters = {}
+    for name in ('company_id', 'client_id', 'employee_id'):
+        if values.get(name) not in (None, ''):
+            try:
+                filters[name] = int(values[name])
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be an integer")
+    for name in ('date_from', 'date_to'):
+        if values.get(name):
+            try:
+                filters[name] = date.fromisoformat(values[name])
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be a date (YYYY-MM-DD)")
+    if values.get('ref_number'):
+        filters['ref_number'] = str(values['ref_number'])
+    return filters
+
+def filter_quotations(query, filters):
+    """Push the filters from parse_quotation_filters down into a quotations query"""
+    for name in ('company_id', 'client_id', 'employee_id'):
+        if name in filters:
+            query = query.eq(name, filters[name])
+    if 'date_from' in filters:
+        query = query.gte('date', filters['date_from'].isoformat())
+    if 'date_to' in filters:
+        # date_to is inclusive, and stored dates carry a time of day
+        query = query.lt('date', (filters['date_to'] + timedelta(days=1)).isoformat())
+    if 'ref_number' in filters:
+        prefix = filters['ref_number'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        query = query.like('ref_number', prefix + '%')
+    return query
+
 @app.route('/api/quotations', methods=['GET'])
 def get_quotations():
+    """List quotations one keyset page at a time, newest first by default.
+
+    Takes the filters of parse_quotation_filters, ?sort= (one of
+    QUOTATION_SORT_COLUMNS, '-' for descending) and ?limit= / ?after= paging.
+    """
     try:
-        # Get quotations with company and client information only
-        quotations = supabase.table('quotations') \
-            .select('id, ref_number, date, total, companies(name), clients(name)') \
-            .execute()
+        filters = parse_quotation_filters(request.args)
+        sort_column, sort_desc = parse_sort(request.args.get('sort'), QUOTATION_SORT_COLUMNS, DEFAULT_QUOTATION_SORT)
+        page = parse_sorted_page_args(request.args, sort_column)
+
+        # Company and client names are embedded, so their tables feed the ETag too
+        etag = list_etag('quotations', 'companies', 'clients')
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+
+        # Get one page of quotations with company and client names only
+        quotations, next_cursor = fetch_sorted_page(
+            lambda: filter_quotations(
+                db.table('quotations').select('id, ref_number, date, total, companies(name), clients(name)'),
+                filters
+            ),
+            page['limit'], sort_column, sort_desc, page['after']
+        )
 
         # Process the results
         processed_quotations = []
-        for quotation in quotations.data:
+        for quotation in quotations:
             company_name = quotation['companies']['name'] if quotation.get('companies') else None
             client_name = quotation['clients']['name'] if quotation.get('clients') else None
             
@@ -295,19 +693,39 @@ def get_quotations():
             
             processed_quotations.append(processed_quotation)
 
+        return with_etag(jsonify({
+            "success": True,
+            "data": processed_quotations,
+            "next_cursor": next_cursor
+        }), etag)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        print(f"Error in get_quotations: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/quotations/<int:quotation_id>', methods=['GET'])
+def get_quotation(quotation_id):
+    try:
+        quotation = fetch_quotation(quotation_id)
+        if quotation is None:
+            return jsonify({"success": False, "error": "Quotation not found"}), 404
+        data = Quotation.from_db(quotation)
+        data['company'] = Company.from_db(quotation['companies']) if quotation.get('companies') else None
+        data['client'] = Client.from_db(quotation['clients']) if quotation.get('clients') else None
+        data['employee'] = Employee.from_db(quotation['employees']) if quotation.get('employees') else None
         return jsonify({
             "success": True,
-            "data": processed_quotations
+            "data": data
         })
     except Exception as e:
-        print(f"Error in get_quotations: {str(e)}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/quotations/<int:quotation_id>', methods=['DELETE'])
 def delete_quotation(quotation_id):
     try:
         # Delete the quotation
-        result = supabase.table('quotations').delete().eq('id', quotation_id).execute()
+        result = db.table('quotations').delete().eq('id', quotation_id).execute()
         
         if not result.data:
             return jsonify({
@@ -330,561 +748,81 @@ def create_quotation():
     try:
         data = request.json
         print("Received data:", data)  # Debug log
+        priced = price_quotation(data.get('items') or [])
         
         # Fetch company data
-        company_response = supabase.table('companies').select('*').eq('id', data['company_id']).execute()
-        if not company_response.data:
+        company_row = get_company(data['company_id'])
+        if company_row is None:
             return jsonify({"success": False, "error": "Company not found"}), 404
             
-        company = Company.from_db(company_response.data[0])
+        company = Company.from_db(company_row)
         
         # Generate reference number
-        new_number = company['last_quote_number'] + 1
-        ref_number = company['ref_format'].format(
-            YYYY=datetime.now().year,
-            NUM=str(new_number).zfill(4)
-        )
+        ref_number = allocate_ref_number(company)
         
         # Prepare quotation data
         quotation_data = {
             'company_id': data['company_id'],
             'ref_number': ref_number,
             'date': datetime.utcnow().isoformat(),
-            'items': data['items'],
-            'total': data['total']
+            'items': priced['items'],
+            'total': priced['grandTotal']
         }
         
         # Create quotation
-        quotation_response = supabase.table('quotations').insert(quotation_data).execute()
+        quotation_response = db.table('quotations').insert(quotation_data).execute()
         
         if not quotation_response.data:
             raise Exception("Failed to create quotation")
             
-        # Update company's last quote number
-        company_update = supabase.table('companies').update({
-            'last_quote_number': new_number
-        }).eq('id', data['company_id']).execute()
-        
-        if not company_update.data:
-            print("Warning: Failed to update company's last quote number")
-            
         return jsonify({
             "success": True,
             "data": Quotation.from_db(quotation_response.data[0])
         }), 201
             
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         print("Error creating quotation:", str(e))  # Debug log
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/quotations/price', methods=['POST'])
+def price_quotation_items():
+    try:
+        body = request.get_json(silent=True) or {}
+        items = body.get('items')
+        if not isinstance(items, list):
+            return jsonify({"success": False, "error": "items must be a list"}), 400
+        if len(items) > MAX_PRICE_LINES:
+            return jsonify({"success": False, "error": f"At most {MAX_PRICE_LINES} lines can be priced at once"}), 400
+        return jsonify({"success": True, "data": price_quotation(items)})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 # Document generation route
 @app.route('/api/generate-quote/<int:quotation_id>', methods=['GET'])
 def generate_quote(quotation_id):
     try:
-        # Fetch quotation data
-        quotation = supabase.table('quotations').select('*').eq('id', quotation_id).execute()
-        if not quotation.data:
+        # Fetch the quotation with its company, client and employee in one query
+        quotation = fetch_quotation(quotation_id)
+        if quotation is None:
             return jsonify({"success": False, "error": "Quotation not found"}), 404
         
-        quotation_data = quotation.data[0]
-        
-        # Fetch company data
-        company = supabase.table('companies').select('*').eq('id', quotation_data['company_id']).execute()
-        if not company.data:
+        quotation_data, company_data, client_data, employee_data = split_quotation(quotation)
+        if company_data is None:
             return jsonify({"success": False, "error": "Company not found"}), 404
-            
-        company_data = company.data[0]
-        
-        # Create a new document
-        doc = Document()
-        
-        # Add header table
-        header_table = doc.add_table(rows=4, cols=1)
-        header_table.style = 'Table Grid'
-        
-        # Company Name Cell
-        company_cell = header_table.rows[0].cells[0]
-        company_name = company_cell.paragraphs[0]
-        company_name.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        company_name.add_run(company_data['name'].upper())
-        company_name.runs[0].font.size = Pt(16)
-        company_name.runs[0].font.bold = True
-        company_name.runs[0].font.color.rgb = RGBColor(255, 255, 255)
-        
-        # Address Cell
-        address_cell = header_table.rows[1].cells[0]
-        address = address_cell.paragraphs[0]
-        address.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        address.add_run(company_data['address'].upper())
-        address.runs[0].font.size = Pt(11)
-        address.runs[0].font.color.rgb = RGBColor(255, 255, 255)
-        
-        # Email and Phone Cell
-        email_cell = header_table.rows[2].cells[0]
-        email = email_cell.paragraphs[0]
-        email.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        email.add_run(f"Email:- {company_data['email']} {company_data['phone']}")
-        email.runs[0].font.size = Pt(11)
-        email.runs[0].font.color.rgb = RGBColor(255, 255, 255)
-        
-        # Tax Info Cell
-        tax_cell = header_table.rows[3].cells[0]
-        tax_info = tax_cell.paragraphs[0]
-        tax_info.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        tax_info.add_run(f"PAN NO.: {company_data['pan']} | GST NO.: {company_data['gst']}")
-        tax_info.runs[0].font.size = Pt(11)
-        tax_info.runs[0].font.color.rgb = RGBColor(255, 255, 255)
-        
-        # Set background color for all cells and remove borders
-        for row in header_table.rows:
-            for cell in row.cells:
-                shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="1B4F8C"/>')
-                cell._tc.get_or_add_tcPr().append(shading_elm)
-                # Remove cell borders
-                tcPr = cell._tc.get_or_add_tcPr()
-                tcBorders = parse_xml(f'<w:tcBorders {nsdecls("w")}>' +
-                                    '<w:top w:val="nil"/>' +
-                                    '<w:left w:val="nil"/>' +
-                                    '<w:bottom w:val="nil"/>' +
-                                    '<w:right w:val="nil"/>' +
-                                    '</w:tcBorders>')
-                tcPr.append(tcBorders)
-
-        # Add QUOTATION/PERFORMA INVOICE title
-        title = doc.add_paragraph()
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        title.add_run('QUOTATION/PERFORMA INVOICE')  # Removed extra newlines
-        title.runs[0].font.bold = True
-        title.runs[0].font.size = Pt(12)
-        title.paragraph_format.space_after = Pt(4)  # Small space after title
-
-        # Add reference number and date
-        ref_date = doc.add_table(rows=1, cols=2)
-        ref_date.autofit = True
-        ref_cell = ref_date.cell(0, 0)
-        ref_cell.text = f"Ref No: {quotation_data['ref_number']}"
-        date_cell = ref_date.cell(0, 1)
-        date_cell.text = f"Date: {quotation_data['date'][:10]}"
-        date_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-
-        # Add spacing after header - reduced
-        doc.add_paragraph().paragraph_format.space_after = Pt(2)
-
-        # Set default font size for the document
-        style = doc.styles['Normal']
-        style.font.size = Pt(8)  # Reduced from 9 to 8
-        style.paragraph_format.space_after = Pt(0)  # Remove space after paragraphs
-        style.paragraph_format.space_before = Pt(0)  # Remove space before paragraphs
-
-        # Add client details
-        to_table = doc.add_table(rows=2, cols=1)
-        to_table.style = 'Table Grid'
-        
-        # To Cell with blue background
-        to_cell = to_table.rows[0].cells[0]
-        to_paragraph = to_cell.paragraphs[0]
-        to_paragraph.add_run('To')
-        to_paragraph.runs[0].font.bold = True
-        to_paragraph.runs[0].font.size = Pt(9)
-        to_paragraph.runs[0].font.color.rgb = RGBColor(255, 255, 255)
-        
-        # Set blue background for To cell
-        shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="1B4F8C"/>')
-        to_cell._tc.get_or_add_tcPr().append(shading_elm)
-        
-        # Client details cell
-        client = data.get('client', {})
-        details_cell = to_table.rows[1].cells[0]
-        details_paragraph = details_cell.paragraphs[0]
-        details_paragraph.add_run(f"{client.get('business_name', '')}\n")
-        details_paragraph.add_run(f"{client.get('address', '')}\n")
-        details_paragraph.add_run(f"Kind Attn: {client.get('name', '')} | Tel: {client.get('phone', '')} | Email: {client.get('email', '')}")
-        
-        # Remove borders from both cells
-        for row in to_table.rows:
-            for cell in row.cells:
-                tcPr = cell._tc.get_or_add_tcPr()
-                tcBorders = parse_xml(f'<w:tcBorders {nsdecls("w")}>' +
-                                    '<w:top w:val="nil"/>' +
-                                    '<w:left w:val="nil"/>' +
-                                    '<w:bottom w:val="nil"/>' +
-                                    '<w:right w:val="nil"/>' +
-                                    '</w:tcBorders>')
-                tcPr.append(tcBorders)
-        
-        # Add spacing after client details - reduced
-        doc.add_paragraph().paragraph_format.space_after = Pt(2)
-        
-        # Add greeting text with reduced spacing
-        greeting = doc.add_paragraph()
-        greeting.paragraph_format.space_after = Pt(2)
-        greeting.add_run("Dear Sir/Madam,\n")
-        greeting.add_run("Thank you for your enquiry. We are pleased to quote our best prices as under:")
-        
-        # Add spacing after greeting - reduced
-        doc.add_paragraph().paragraph_format.space_after = Pt(2)
         
-        # Add items table
-        doc.add_paragraph().add_run('Items:').bold = True
-        table = doc.add_table(rows=1, cols=14)
-        table.style = 'Table Grid'
-        
-        # Set header row with blue background and white text
-        header_cells = table.rows[0].cells
-        headers = ['S.No', 'Cat No.', 'Description', 'Pack Size', 'HSN Code', 'Qty', 'Unit Rate', 'Discounted Price', 'Expanded Price', 'GST %', 'GST', 'Total Value', 'Lead Time', 'Brand']
-        
-        # Apply blue background and white text to headers
-        for i, text in enumerate(headers):
-            cell = header_cells[i]
-            # Clear any existing content
-            cell.text = ""
-            paragraph = cell.paragraphs[0]
-            run = paragraph.add_run(text)
-            run.font.bold = True
-            run.font.size = Pt(8)
-            run.font.color.rgb = RGBColor(255, 255, 255)
-            paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            # Set blue background for header cell
-            shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="1B4F8C"/>')
-            cell._tc.get_or_add_tcPr().append(shading_elm)
-        
-        # Add item rows
-        items = data.get('items', [])
-        for idx, item in enumerate(items, 1):
-            row = table.add_row().cells
-            row[0].text = str(idx)  # S.No
-            row[1].text = item.get('catalogue_id', '')  # Cat No.
-            row[2].text = item.get('description', '')  # Description
-            row[3].text = item.get('pack_size', '')  # Pack Size
-            row[4].text = item.get('hsn', '')  # HSN Code
-            row[5].text = str(item.get('quantity', ''))  # Qty
-            row[6].text = f"₹{item.get('unit_rate', 0):.2f}"  # Unit Rate
-            
-            # Calculate discounted price
-            unit_rate = float(item.get('unit_rate', 0))
-            discount = float(item.get('discount_percentage', 0))
-            discounted_price = unit_rate * (1 - discount/100)
-            row[7].text = f"₹{discounted_price:.2f}"  # Discounted Price
-            
-            # Calculate expanded price (discounted price * quantity)
-            quantity = float(item.get('quantity', 0))
-            expanded_price = discounted_price * quantity
-            row[8].text = f"₹{expanded_price:.2f}"  # Expanded Price
-            
-            row[9].text = f"{item.get('gst_percentage', 0)}%"  # GST %
-            row[10].text = f"₹{item.get('gst_value', 0):.2f}"  # GST
-            row[11].text = f"₹{item.get('total', 0):.2f}"  # Total Value
-            row[12].text = item.get('lead_time', '')  # Lead Time
-            row[13].text = item.get('brand', '')  # Changed from 'make' to 'brand'
-            
-            # Center align all cells
-            for cell in row:
-                cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Set optimized column widths for better fit
-        for cell in table.columns[0].cells:  # S.No
-            cell.width = Inches(0.2)
-        for cell in table.columns[1].cells:  # Cat No.
-            cell.width = Inches(0.6)
-        for cell in table.columns[2].cells:  # Description
-            cell.width = Inches(1.8)
-        for cell in table.columns[3].cells:  # Pack Size
-            cell.width = Inches(0.4)
-        for cell in table.columns[4].cells:  # HSN Code
-            cell.width = Inches(0.6)
-        for cell in table.columns[5].cells:  # Qty
-            cell.width = Inches(0.3)
-        for cell in table.columns[6].cells:  # Unit Rate
-            cell.width = Inches(0.6)
-        for cell in table.columns[7].cells:  # Discounted Price
-            cell.width = Inches(0.6)
-        for cell in table.columns[8].cells:  # Expanded Price
-            cell.width = Inches(0.6)
-        for cell in table.columns[9].cells:  # GST %
-            cell.width = Inches(0.4)
-        for cell in table.columns[10].cells:  # GST
-            cell.width = Inches(0.6)
-        for cell in table.columns[11].cells:  # Total Value
-            cell.width = Inches(0.6)
-        for cell in table.columns[12].cells:  # Lead Time
-            cell.width = Inches(0.6)
-        for cell in table.columns[13].cells:  # Brand
-            cell.width = Inches(0.5)
-        
-        # Set optimized column widths for better fit
-        for cell in table.columns[0].cells:  # S.No
-            cell.width = Inches(0.3)
-        for cell in table.columns[1].cells:  # Cat No.
-            cell.width = Inches(0.8)
-        for cell in table.columns[2].cells:  # Description
-            cell.width = Inches(2.0)
-        for cell in table.columns[3].cells:  # Pack Size
-            cell.width = Inches(0.5)
-        for cell in table.columns[4].cells:  # HSN Code
-            cell.width = Inches(0.8)
-        for cell in table.columns[5].cells:  # Qty
-            cell.width = Inches(0.4)
-        for cell in table.columns[6].cells:  # Unit Rate
-            cell.width = Inches(0.8)
-        for cell in table.columns[7].cells:  # Discounted Price
-            cell.width = Inches(0.8)
-        for cell in table.columns[8].cells:  # Expanded Price
-            cell.width = Inches(0.8)
-        for cell in table.columns[9].cells:  # GST %
-            cell.width = Inches(0.4)
-        for cell in table.columns[10].cells:  # GST
-            cell.width = Inches(0.6)
-        for cell in table.columns[11].cells:  # Total Value
-            cell.width = Inches(0.8)
-        for cell in table.columns[12].cells:  # Lead Time
-            cell.width = Inches(0.6)
-        for cell in table.columns[13].cells:  # Brand
-            cell.width = Inches(0.6)
-
-        # Add spacing before totals
-        doc.add_paragraph().paragraph_format.space_after = Pt(2)
-        
-        # Create totals table with specific width and styling
-        totals_table = doc.add_table(rows=3, cols=2)
-        totals_table.style = 'Table Grid'
-        totals_table.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        
-        # Set the width of the totals table columns
-        for cell in totals_table.columns[0].cells:  # Labels
-            cell.width = Inches(1.2)
-        for cell in totals_table.columns[1].cells:  # Values
-            cell.width = Inches(1.0)
-        
-        # Add Sub Total row
-        sub_total_cell = totals_table.cell(0, 0)
-        sub_total_cell.text = ""  # Clear existing content
-        sub_total_label = sub_total_cell.paragraphs[0].add_run("Sub Total:")
-        sub_total_label.font.size = Pt(8)
-        sub_total_label.font.bold = True
-        
-        sub_total_value_cell = totals_table.cell(0, 1)
-        sub_total_value_cell.text = ""  # Clear existing content
-        sub_total_value = sub_total_value_cell.paragraphs[0].add_run(f"₹{data.get('subTotal', 0):.2f}")
-        sub_total_value.font.size = Pt(8)
-        
-        # Add Total GST row
-        gst_cell = totals_table.cell(1, 0)
-        gst_cell.text = ""  # Clear existing content
-        gst_label = gst_cell.paragraphs[0].add_run("Total GST:")
-        gst_label.font.size = Pt(8)
-        gst_label.font.bold = True
-        
-        gst_value_cell = totals_table.cell(1, 1)
-        gst_value_cell.text = ""  # Clear existing content
-        gst_value = gst_value_cell.paragraphs[0].add_run(f"₹{data.get('totalGST', 0):.2f}")
-        gst_value.font.size = Pt(8)
-        
-        # Add Grand Total row with blue background
-        grand_total_cell = totals_table.cell(2, 0)
-        grand_total_cell.text = ""  # Clear existing content
-        grand_total_label = grand_total_cell.paragraphs[0].add_run("Grand Total:")
-        grand_total_label.font.size = Pt(8)
-        grand_total_label.font.bold = True
-        grand_total_label.font.color.rgb = RGBColor(255, 255, 255)
-        
-        grand_total_value_cell = totals_table.cell(2, 1)
-        grand_total_value_cell.text = ""  # Clear existing content
-        grand_total_value = grand_total_value_cell.paragraphs[0].add_run(f"₹{data.get('grandTotal', 0):.2f}")
-        grand_total_value.font.size = Pt(8)
-        grand_total_value.font.bold = True
-        grand_total_value.font.color.rgb = RGBColor(255, 255, 255)
-        
-        # Set blue background for grand total row
-        for cell in [grand_total_cell, grand_total_value_cell]:
-            shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="1B4F8C"/>')
-            cell._tc.get_or_add_tcPr().append(shading_elm)
-        
-        # Right-align all cells in the totals table and set thin borders
-        for row in totals_table.rows:
-            for cell in row.cells:
-                cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-                # Set thin borders
-                tcPr = cell._tc.get_or_add_tcPr()
-                tcBorders = parse_xml(f'<w:tcBorders {nsdecls("w")}>' +
-                                '<w:top w:val="single" w:sz="2"/>' +
-                                '<w:left w:val="single" w:sz="2"/>' +
-                                '<w:bottom w:val="single" w:sz="2"/>' +
-                                '<w:right w:val="single" w:sz="2"/>' +
-                                '</w:tcBorders>')
-                tcPr.append(tcBorders)
-        
-        # Add spacing after totals table
-        doc.add_paragraph().paragraph_format.space_after = Pt(2)
+        content = render_document(quotation_render_data(quotation_data, company_data, client_data, employee_data))
+        filename = f"quote_{quotation_data['ref_number']}.docx"
 
-        # Add Terms & Conditions section with blue header
-        terms_table = doc.add_table(rows=1, cols=1)
-        terms_table.style = 'Table Grid'
-        
-        # Terms & Conditions header cell with blue background
-        header_cell = terms_table.rows[0].cells[0]
-        header_paragraph = header_cell.paragraphs[0]
-        header_run = header_paragraph.add_run('Terms & Conditions')
-        header_run.font.bold = True
-        header_run.font.color.rgb = RGBColor(255, 255, 255)
-        header_run.font.size = Pt(9)  # Changed from 11 to 9
-        
-        # Set blue background for header cell
-        shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="1B4F8C"/>')
-        header_cell._tc.get_or_add_tcPr().append(shading_elm)
-        
-        # Remove borders from the header cell
-        tcPr = header_cell._tc.get_or_add_tcPr()
-        tcBorders = parse_xml(f'<w:tcBorders {nsdecls("w")}>' +
-                            '<w:top w:val="nil"/>' +
-                            '<w:left w:val="nil"/>' +
-                            '<w:bottom w:val="nil"/>' +
-                            '<w:right w:val="nil"/>' +
-                            '</w:tcBorders>')
-        tcPr.append(tcBorders)
-        
-        # Add terms list with reduced spacing
-        terms_list = doc.add_paragraph()
-        terms_list.style = doc.styles['Normal']
-        terms_list.paragraph_format.space_before = Pt(2)
-        terms_list.paragraph_format.space_after = Pt(2)
-        
-        # Add payment terms
-        payment_term = terms_list.add_run(f"1) {data.get('paymentTerms', '')}\n")
-        payment_term.font.size = Pt(8)
-        
-        # Add fixed terms with numbering
-        for idx, term in enumerate(data.get('fixedTerms', []), 2):
-            term_text = terms_list.add_run(f"{idx}) {term}\n")
-            term_text.font.size = Pt(8)
-        
-        # Add spacing before Bank Details section
-        doc.add_paragraph().paragraph_format.space_after = Pt(2)
-        
-        # Add Bank Details section
-        bank_table = doc.add_table(rows=1, cols=1)
-        bank_table.style = 'Table Grid'
-        
-        # Bank Details header cell with blue background
-        bank_header_cell = bank_table.rows[0].cells[0]
-        bank_header_paragraph = bank_header_cell.paragraphs[0]
-        bank_header_run = bank_header_paragraph.add_run('Bank Details')
-        bank_header_run.font.bold = True
-        bank_header_run.font.color.rgb = RGBColor(255, 255, 255)
-        bank_header_run.font.size = Pt(9)  # Changed from 11 to 9
-        
-        # Set blue background for header cell
-        bank_shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="1B4F8C"/>')
-        bank_header_cell._tc.get_or_add_tcPr().append(bank_shading_elm)
-        
-        # Remove borders from the header cell
-        bank_tcPr = bank_header_cell._tc.get_or_add_tcPr()
-        bank_tcBorders = parse_xml(f'<w:tcBorders {nsdecls("w")}>' +
-                            '<w:top w:val="nil"/>' +
-                            '<w:left w:val="nil"/>' +
-                            '<w:bottom w:val="nil"/>' +
-                            '<w:right w:val="nil"/>' +
-                            '</w:tcBorders>')
-        bank_tcPr.append(bank_tcBorders)
-        
-        # Add bank details with reduced spacing
-        bank_details = doc.add_paragraph()
-        bank_details.style = doc.styles['Normal']
-        bank_details.paragraph_format.space_before = Pt(2)
-        bank_details.paragraph_format.space_after = Pt(2)
-        bank_details_text = bank_details.add_run(f"HDFC BANK LTD. Account No: {data.get('company', {}).get('account_number', '')} ; NEFT/RTGS IFCS : {data.get('company', {}).get('ifsc_code', '')} Branch code:{data.get('company', {}).get('branch_code', '')} ; Micro code : {data.get('company', {}).get('micro_code', '')} ;Account type: Current account")
-        bank_details_text.font.size = Pt(8)
-        
-        # Add spacing before Quotation Created By section
-        doc.add_paragraph().paragraph_format.space_after = Pt(2)
-        
-        # Add Quotation Created By section
-        created_by_table = doc.add_table(rows=1, cols=1)
-        created_by_table.style = 'Table Grid'
-        
-        # Created By header cell with blue background
-        created_by_header_cell = created_by_table.rows[0].cells[0]
-        created_by_header_paragraph = created_by_header_cell.paragraphs[0]
-        created_by_header_run = created_by_header_paragraph.add_run('Quotation Created By')
-        created_by_header_run.font.bold = True
-        created_by_header_run.font.color.rgb = RGBColor(255, 255, 255)
-        created_by_header_run.font.size = Pt(9)  # Changed from 11 to 9
-        
-        # Set blue background for header cell
-        created_by_shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="1B4F8C"/>')
-        created_by_header_cell._tc.get_or_add_tcPr().append(created_by_shading_elm)
-        
-        # Remove borders from the header cell
-        created_by_tcPr = created_by_header_cell._tc.get_or_add_tcPr()
-        created_by_tcBorders = parse_xml(f'<w:tcBorders {nsdecls("w")}>' +
-                            '<w:top w:val="nil"/>' +
-                            '<w:left w:val="nil"/>' +
-                            '<w:bottom w:val="nil"/>' +
-                            '<w:right w:val="nil"/>' +
-                            '</w:tcBorders>')
-        created_by_tcPr.append(tcBorders)
-        
-        # Add employee details with reduced spacing
-        employee_details = doc.add_paragraph()
-        employee_details.style = doc.styles['Normal']
-        employee_details.paragraph_format.space_before = Pt(2)
-        employee_details.paragraph_format.space_after = Pt(2)
-        employee_name = data.get('employee', {}).get('name', '')
-        employee_phone = data.get('employee', {}).get('phone_number', '')  # Changed from mobile to phone_number
-        employee_email = data.get('employee', {}).get('email', '')
-        
-        employee_details.add_run(f"{employee_name}\n").font.size = Pt(8)
-        employee_details.add_run(f"Mobile: {employee_phone}\n").font.size = Pt(8)  # Using the new employee_phone variable
-        email_run = employee_details.add_run(f"Email: ")
-        email_run.font.size = Pt(8)
-        email_link = employee_details.add_run(employee_email)
-        email_link.font.size = Pt(8)
-        email_link.font.color.rgb = RGBColor(0, 0, 255)  # Blue color for email
-        
-        # Add spacing before signature
-        doc.add_paragraph('\n')
-        
-        # Add signature section with reduced spacing
-        signature_section = doc.add_paragraph()
-        signature_section.paragraph_format.space_before = Pt(4)
-        signature_section.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        
-        # Add "For COMPANY NAME" text
-        company_name = data.get('company', {}).get('name', '').upper()
-        for_company = signature_section.add_run(f"For {company_name}")
-        for_company.font.size = Pt(11)
-        signature_section.add_run('\n\n')  # Add some space
-        
-        # Add company seal image if available
-        company_seal = data.get('company', {}).get('seal_image_url', '')  # Changed from 'seal_image' to 'seal_image_url'
-        print("Company Seal Data:", company_seal)  # Debug print
-        if company_seal:
-            try:
-                # Get the full path to the image
-                seal_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), company_seal.lstrip('/'))
-                
-                if os.path.exists(seal_path):
-                    # Add the image to the document with specific size
-                    signature_section.add_run().add_picture(seal_path, width=Inches(1.1), height=Inches(1.1))  # Slightly larger than 80px
-                    signature_section.add_run('\n')  # Add space after seal
-                else:
-                    print(f"Seal image file not found at path: {seal_path}")
-            except Exception as e:
-                print(f"Error adding company seal: {str(e)}")
-                import traceback
-                print(traceback.format_exc())  # Print full error traceback
-        else:
-            print("No company seal image found in data")  # Debug print
-        
-        # Add Authorized Signatory text
-        signature_section.add_run('\n')  # Add extra space before text
-        auth_signatory = signature_section.add_run("Authorized Signatory")
-        auth_signatory.font.size = Pt(11)
+        # ?download=true returns the document itself instead of a file name
+        if is_truthy(request.args.get('download')):
+            return send_document(content, filename)
         
         # Save the document
-        filename = f"quote_{quotation_data['ref_number']}.docx"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        doc.save(filepath)
+        save_upload(filename, content)
         
         return jsonify({
             'success': True,
@@ -896,187 +834,121 @@ def generate_quote(quotation_id):
         print("Error generating quote:", str(e))  # Debug log
         return jsonify({"success": False, "error": str(e)}), 500
 
+def iter_quotations_by_ids(ids):
+    for start in range(0, len(ids), RENDER_BATCH_ID_CHUNK):
+        chunk = ids[start:start + RENDER_BATCH_ID_CHUNK]
+        yield from iter_pages(lambda: db.table('quotations').select(QUOTATION_DETAIL_SELECT).in_('id', chunk))
+
+def iter_quotations_by_filter(filters):
+    return iter_pages(lambda: filter_quotations(db.table('quotations').select(QUOTATION_DETAIL_SELECT), filters))
+
+def render_batch_tasks(quotations, errors, requested_ids=None):
+    """Turn QUOTATION_DETAIL_SELECT rows into (quotation, render_docx args) tasks, noting rows that cannot be rendered"""
+    generation = renderer().skeleton_generation
+    seen = set()
+    for row in quotations:
+        quotation, company, client, employee = split_quotation(row)
+        seen.add(quotation['id'])
+        if company is None:
+            errors.append(f"{quotation['ref_number']}: company {quotation['company_id']} not found")
+            continue
+        yield quotation, (quotation_render_data(quotation, company, client, employee), generation)
+    for quotation_id in requested_ids or []:
+        if quotation_id not in seen:
+            errors.append(f"Quotation {quotation_id} not found")
+
+def rendered_quotation_entries(quotations, requested_ids=None):
+    """Render quotations on the worker pool and yield (zip entry name, .docx bytes) as each finishes.
+
+    Quotations that could not be rendered are listed in a final errors.txt entry.
+    """
+    errors = []
+    names = set()
+    tasks = render_batch_tasks(quotations, errors, requested_ids)
+    for quotation, result, error in render_jobs.imap_unordered(renderer().render_docx_timed, tasks):
+        ref_number = str(quotation['ref_number']).replace('/', '_')
+        if error is not None:
+            print(f"Error rendering quotation {quotation['id']}:", str(error))  # Debug log
+            errors.append(f"{quotation['ref_number']}: {error}")
+            continue
+        content = rendered('batch', result)
+        name = f"quote_{ref_number}.docx"
+        if name in names:
+            name = f"quote_{ref_number}_{quotation['id']}.docx"
+        names.add(name)
+        yield name, content
+    if errors:
+        yield 'errors.txt', '\n'.join(errors) + '\n'
+
+@app.route('/api/quotations/render-batch', methods=['POST'])
+def render_quotation_batch():
+    try:
+        body = request.get_json(silent=True) or {}
+        ids = body.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list) or not ids:
+                return jsonify({"success": False, "error": "ids must be a non-empty list"}), 400
+            if len(ids) > MAX_RENDER_BATCH_IDS:
+                return jsonify({"success": False, "error": f"At most {MAX_RENDER_BATCH_IDS} ids per batch"}), 400
+            ids = list(dict.fromkeys(int(quotation_id) for quotation_id in ids))
+            quotations = iter_quotations_by_ids(ids)
+        else:
+            filters = parse_quotation_filters(body)
+            if not filters:
+                return jsonify({
+                    "success": False,
+                    "error": "Give a list of ids or a company_id, client_id, employee_id, date_from, date_to or ref_number filter"
+                }), 400
+            quotations = iter_quotations_by_filter(filters)
+    except (TypeError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    # Documents are rendered and zipped while the response is being sent
+    return Response(
+        stream_zip(rendered_quotation_entries(quotations, ids)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': 'attachment; filename=quotations.zip'}
+    )
+
 @app.route('/api/hsn/<hsn_code>/gst', methods=['GET'])
 def get_gst_percentage(hsn_code):
     try:
-        # Comprehensive HSN-GST mapping for chemicals, lab equipment and related products
-        gst_mapping = {
-            # Chapter 28: Inorganic chemicals
-            '28': 18,    # All inorganic chemicals
-            '2801': 18,  # Halogens (fluorine, chlorine, bromine and iodine)
-            '2802': 18,  # Sulphur, sublimed or precipitated; colloidal sulphur
-            '2803': 18,  # Carbon (carbon blacks and other forms of carbon)
-            '2804': 18,  # Hydrogen, rare gases and other non-metals
-            '2805': 18,  # Alkali or alkaline-earth metals
-            '2806': 18,  # Hydrogen chloride and chlorosulphuric acid
-            '2807': 18,  # Sulphuric acid and oleum
-            '2808': 18,  # Nitric acid; sulphonitric acids
-            '2809': 18,  # Phosphorus pentoxide; phosphoric acid
-            '2810': 18,  # Oxides of boron; boric acids
-            '2811': 18,  # Other inorganic acids
-            '2812': 18,  # Halides and halide oxides of non-metals
-            '2813': 18,  # Sulphides of non-metals
-            '2814': 18,  # Ammonia, anhydrous or in aqueous solution
-            '2815': 18,  # Sodium/Potassium hydroxide; peroxides of sodium/potassium
-            '2816': 18,  # Hydroxide and peroxide of magnesium
-            '2817': 18,  # Zinc oxide; zinc peroxide
-            '2818': 18,  # Artificial corundum; aluminum oxide; aluminum hydroxide
-            '2819': 18,  # Chromium oxides and hydroxides
-            '2820': 18,  # Manganese oxides
-            '2821': 18,  # Iron oxides and hydroxides
-            '2822': 18,  # Cobalt oxides and hydroxides
-            '2823': 18,  # Titanium oxides
-            '2824': 18,  # Lead oxides
-            '2825': 18,  # Hydrazine, hydroxylamine, inorganic bases
-            '2826': 18,  # Fluorides; fluorosilicates, fluoroaluminates
-            '2827': 18,  # Chlorides, chloride oxides
-            '2828': 18,  # Hypochlorites; commercial calcium hypochlorite
-            '2829': 18,  # Chlorates and perchlorates
-            '2830': 18,  # Sulphides; polysulphides
-            '2831': 18,  # Dithionites and sulphoxylates
-            '2832': 18,  # Sulphites; thiosulphates
-            '2833': 18,  # Sulphates; alums; peroxosulphates
-            '2834': 18,  # Nitrites; nitrates
-            '2835': 18,  # Phosphinates, phosphonates, phosphates
-            '2836': 18,  # Carbonates; peroxocarbonates
-            '2837': 18,  # Cyanides, cyanide oxides
-            '2838': 18,  # Fulminates, cyanates and thiocyanates
-            '2839': 18,  # Silicates; commercial alkali metal silicates
-            '2840': 18,  # Borates; peroxoborates
-            '2841': 18,  # Salts of oxometallic/peroxometallic acids
-            '2842': 18,  # Other salts of inorganic acids/peroxoacids
-            '2843': 18,  # Colloidal precious metals
-            '2844': 18,  # Radioactive chemical elements
-            '2845': 18,  # Isotopes and their compounds
-            '2846': 18,  # Compounds of rare-earth metals
-            '2847': 18,  # Hydrogen peroxide
-            '2848': 18,  # Phosphides
-            '2849': 18,  # Carbides
-            '2850': 18,  # Hydrides, nitrides, azides, silicides
-            '2851': 18,  # Other inorganic compounds
-
-            # Chapter 29: Organic Chemicals
-            '29': 18,    # All organic chemicals
-            '2901': 18,  # Acyclic hydrocarbons
-            '2902': 18,  # Cyclic hydrocarbons
-            '2903': 18,  # Halogenated derivatives of hydrocarbons
-            '2904': 18,  # Sulphonated, nitrated derivatives
-            '2905': 18,  # Acyclic alcohols and their derivatives
-            '2906': 18,  # Cyclic alcohols and their derivatives
-            '2907': 18,  # Phenols; phenol-alcohols
-            '2908': 18,  # Derivatives of phenols
-            '2909': 18,  # Ethers, ether-alcohols, ether-phenols
-            '2910': 18,  # Epoxides, epoxyalcohols, epoxyphenols
-            '2911': 18,  # Acetals and hemiacetals
-            '2912': 18,  # Aldehydes
-            '2913': 18,  # Halogenated, sulphonated derivatives of aldehydes
-            '2914': 18,  # Ketones and quinones
-            '2915': 18,  # Saturated acyclic monocarboxylic acids
-            '2916': 18,  # Unsaturated acyclic monocarboxylic acids
-            '2917': 18,  # Polycarboxylic acids
-            '2918': 18,  # Carboxylic acids with additional oxygen function
-            '2919': 18,  # Phosphoric esters and their salts
-            '2920': 18,  # Esters of other inorganic acids
-            '2921': 18,  # Amine-function compounds
-            '2922': 18,  # Oxygen-function amino-compounds
-            '2923': 18,  # Quaternary ammonium salts and hydroxides
-            '2924': 18,  # Carboxyamide-function compounds
-            '2925': 18,  # Carboxyimide-function compounds
-            '2926': 18,  # Nitrile-function compounds
-            '2927': 18,  # Diazo-, azo- or azoxy-compounds
-            '2928': 18,  # Organic derivatives of hydrazine
-            '2929': 18,  # Compounds with other nitrogen function
-            '2930': 18,  # Organo-sulphur compounds
-            '2931': 18,  # Other organo-inorganic compounds
-            '2932': 18,  # Heterocyclic compounds with oxygen
-            '2933': 18,  # Heterocyclic compounds with nitrogen
-            '2934': 18,  # Nucleic acids and their salts
-            '2935': 18,  # Sulphonamides
-            '2936': 18,  # Provitamins and vitamins
-            '2937': 18,  # Hormones
-            '2938': 18,  # Glycosides
-            '2939': 18,  # Vegetable alkaloids
-            '2940': 18,  # Sugars, chemically pure
-            '2941': 18,  # Antibiotics
-            '2942': 18,  # Other organic compounds
-
-            # Chapter 38: Miscellaneous chemical products
-            '38': 18,    # All miscellaneous chemical products
-            '3801': 18,  # Artificial graphite; preparations
-            '3802': 18,  # Activated carbon; activated natural products
-            '3803': 18,  # Tall oil
-            '3804': 18,  # Residual lyes from wood pulp
-            '3805': 18,  # Gum, wood or sulphate turpentine
-            '3806': 18,  # Rosin and resin acids
-            '3807': 18,  # Wood tar; wood tar oils
-            '3808': 18,  # Insecticides, fungicides
-            '3809': 18,  # Finishing agents, dye carriers
-            '3810': 18,  # Pickling preparations for metal surfaces
-            '3811': 18,  # Anti-knock preparations
-            '3812': 18,  # Prepared rubber accelerators
-            '3813': 18,  # Preparations for fire-extinguishers
-            '3814': 18,  # Organic composite solvents
-            '3815': 18,  # Reaction initiators, accelerators
-            '3816': 18,  # Refractory cements, mortars
-            '3817': 18,  # Mixed alkylbenzenes
-            '3818': 18,  # Chemical elements for electronics
-            '3819': 18,  # Hydraulic brake fluids
-            '3820': 18,  # Anti-freezing preparations
-            '3821': 18,  # Prepared culture media
-            '3822': 18,  # Diagnostic or laboratory reagents
-            '3823': 18,  # Industrial monocarboxylic fatty acids
-            '3824': 18,  # Prepared binders; chemical products
-            '3825': 18,  # Residual products of chemical industry
-            '3826': 18,  # Biodiesel and mixtures
-
-            # Chapter 70: Glass and glassware (Laboratory glassware)
-            '7017': 18,  # Laboratory, hygienic or pharmaceutical glassware
-            '701710': 18,  # Of fused quartz or other fused silica
-            '701720': 18,  # Of other glass having linear coefficient
-            '701790': 18,  # Other laboratory glassware
-
-            # Chapter 90: Scientific and laboratory instruments
-            '9011': 18,  # Microscopes
-            '9012': 18,  # Microscopes other than optical
-            '9015': 18,  # Surveying instruments
-            '9016': 18,  # Balances of a sensitivity
-            '9017': 18,  # Drawing, marking-out instruments
-            '9018': 12,  # Medical instruments and appliances
-            '9019': 12,  # Mechano-therapy appliances
-            '9022': 18,  # X-ray apparatus
-            '9023': 18,  # Instruments, apparatus and models
-            '9024': 18,  # Machines for testing materials
-            '9025': 18,  # Hydrometers, thermometers
-            '9026': 18,  # Instruments for measuring flow
-            '9027': 18,  # Instruments for physical/chemical analysis
-            '9028': 18,  # Gas, liquid or electricity meters
-            '9029': 18,  # Revolution counters, taximeters
-            '9030': 18,  # Oscilloscopes, spectrum analyzers
-            '9031': 18,  # Measuring or checking instruments
-            '9032': 18,  # Automatic regulating instruments
-            '9033': 18,  # Parts and accessories for machines
-        }
-        
-        # Try to match HSN code at different levels (8, 6, 4, 2 digits)
-        hsn_variants = [
-            hsn_code,  # Full 8-digit code
-            hsn_code[:6] if len(hsn_code) >= 6 else None,  # First 6 digits
-            hsn_code[:4] if len(hsn_code) >= 4 else None,  # First 4 digits
-            hsn_code[:2] if len(hsn_code) >= 2 else None   # First 2 digits
-        ]
-        
-        # Try each variant, from most specific to least specific
-        for variant in hsn_variants:
-            if variant and variant in gst_mapping:
-                return jsonify({
-                    'success': True,
-                    'gst_percentage': gst_mapping[variant]
-                })
-        
-        # If no match found
+        gst_percentage = lookup_gst_percentage(hsn_code)
+        if gst_percentage is not None:
+            response = jsonify({
+                'success': True,
+                'gst_percentage': gst_percentage
+            })
+        else:
+            # If no match found
+            response = jsonify({
+                'success': False,
+                'error': 'GST percentage not found for this HSN code'
+            })
+        return cacheable_gst_response(response).make_conditional(request)
+    except Exception as e:
         return jsonify({
             'success': False,
-            'error': 'GST percentage not found for this HSN code'
+            'error': str(e)
+        }), 500
+
+@app.route('/api/hsn/gst', methods=['POST'])
+def resolve_gst_percentages():
+    try:
+        hsn_codes = (request.json or {}).get('hsn_codes')
+        if not isinstance(hsn_codes, list):
+            return jsonify({'success': False, 'error': 'hsn_codes must be a list'}), 400
+        if len(hsn_codes) > MAX_HSN_BATCH_SIZE:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MAX_HSN_BATCH_SIZE} HSN codes can be resolved per request'
+            }), 400
+
+        # Codes without a known GST rate map to null. POST responses are not
+        # cached by browsers or proxies, so no cache headers are set.
+        return jsonify({
+            'success': True,
+            'data': {str(code): lookup_gst_percentage(code) for code in hsn_codes}
         })
     except Exception as e:
         return jsonify({
@@ -1088,11 +960,41 @@ def get_gst_percentage(hsn_code):
 @app.route('/api/items', methods=['GET'])
 def get_items():
     try:
-        items = supabase.table('items').select('*').execute()
+        query, fields = list_query('items', Item)
+        etag = list_etag('items')
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+        items, next_cursor = run_list_query(query)
+        return with_etag(jsonify({
+            "success": True,
+            "data": [project(Item.from_db(item), fields) for item in items],
+            "next_cursor": next_cursor
+        }), etag)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/items/search', methods=['GET'])
+def search_items():
+    try:
+        query = request.args.get('q', '')
+        field = request.args.get('field')
+        if field and field not in SEARCH_FIELDS:
+            return jsonify({"success": False, "error": f"field must be one of: {', '.join(SEARCH_FIELDS)}"}), 400
+        try:
+            limit = min(int(request.args.get('limit', DEFAULT_RESULT_LIMIT)), MAX_RESULT_LIMIT)
+        except ValueError:
+            return jsonify({"success": False, "error": "limit must be an integer"}), 400
+
+        fields = parse_fields(request.args, Item.FIELDS)
+        items = item_index.search(query, limit=max(limit, 1), field=field)
         return jsonify({
             "success": True,
-            "data": [Item.from_db(item) for item in items.data]
+            "data": [project(Item.from_db(item), fields) for item in items]
         })
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -1100,7 +1002,8 @@ def get_items():
 def create_item():
     try:
         data = request.json
-        item = supabase.table('items').insert(data).execute()
+        item = db.table('items').insert(data).execute()
+        item_index.add(item.data[0])
         return jsonify({
             "success": True,
             "data": Item.from_db(item.data[0])
@@ -1108,13 +1011,59 @@ def create_item():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+# Import formats recognised from an upload's content type or file extension
+IMPORT_CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'xlsx',
+}
+
+@app.route('/api/items/import', methods=['POST'])
+def import_items():
+    """Upsert items from a CSV, NDJSON or XLSX price list.
+
+    The file is sent either as the `file` field of a multipart form or as the
+    raw request body. Rows are read one at a time and written in batches.
+    """
+    try:
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('file')
+            if upload is None:
+                return jsonify({"success": False, "error": "No file uploaded"}), 400
+            stream = upload.stream
+            file_format = os.path.splitext(upload.filename or '')[1].lstrip('.').lower()
+            file_format = {'jsonl': 'ndjson'}.get(file_format, file_format)
+        else:
+            stream = request.stream
+            file_format = IMPORT_CONTENT_TYPES.get(request.mimetype)
+        file_format = request.args.get('format', file_format)
+        if file_format not in IMPORT_FORMATS:
+            return jsonify({"success": False, "error": f"format must be one of: {', '.join(IMPORT_FORMATS)}"}), 400
+
+        try:
+            batch_size = int(request.args.get('batch_size', DEFAULT_IMPORT_BATCH_SIZE))
+        except ValueError:
+            return jsonify({"success": False, "error": "batch_size must be an integer"}), 400
+        batch_size = min(max(batch_size, 1), MAX_IMPORT_BATCH_SIZE)
+
+        importer = ItemImporter(db, batch_size=batch_size, on_saved=item_index.add)
+        summary = importer.run(ROW_READERS[file_format](stream))
+        return jsonify({"success": True, "data": summary})
+    except (UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"success": False, "error": f"Could not read {file_format} file: {str(e)}"}), 400
+    except Exception as e:
+        print("Error importing items:", str(e))  # Debug log
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @app.route('/api/items/<int:item_id>', methods=['PUT'])
 def update_item(item_id):
     try:
         data = request.json
-        item = supabase.table('items').update(data).eq('id', item_id).execute()
+        item = db.table('items').update(data).eq('id', item_id).execute()
         if not item.data:
             return jsonify({"success": False, "error": "Item not found"}), 404
+        item_index.add(item.data[0])
         return jsonify({
             "success": True,
             "data": Item.from_db(item.data[0])
@@ -1127,9 +1076,10 @@ def delete_item(item_id):
     try:
         # Check if item is used in any quotations before deleting
         # You might want to add this check when quotations are implemented
-        item = supabase.table('items').delete().eq('id', item_id).execute()
+        item = db.table('items').delete().eq('id', item_id).execute()
         if not item.data:
             return jsonify({"success": False, "error": "Item not found"}), 404
+        item_index.remove(item_id)
             
         return jsonify({
             "success": True,
@@ -1138,6 +1088,59 @@ def delete_item(item_id):
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+def quotation_export_row(quotation):
+    row = Quotation.from_db(quotation)
+    row['company'] = quotation['companies']['name'] if quotation.get('companies') else None
+    row['client'] = quotation['clients']['name'] if quotation.get('clients') else None
+    return row
+
+# Exportable tables: the select, how each row is shaped, and the exported columns
+EXPORTS = {
+    'items': {
+        'select': '*',
+        'row': Item.from_db,
+        'columns': ['id', 'catalogue_id', 'description', 'pack_size', 'cas', 'hsn', 'price', 'brand',
+                    'gst_percentage', 'created_at', 'updated_at']
+    },
+    'clients': {
+        'select': '*',
+        'row': Client.from_db,
+        'columns': ['id', 'name', 'business_name', 'email', 'mobile', 'address', 'created_at', 'updated_at']
+    },
+    'quotations': {
+        'select': '*, companies(name), clients(name)',
+        'row': quotation_export_row,
+        'columns': ['id', 'ref_number', 'date', 'company_id', 'company', 'client_id', 'client',
+                    'employee_id', 'total', 'items']
+    }
+}
+
+# Export routes
+@app.route('/api/export/<entity>', methods=['GET'])
+def export_entity(entity):
+    export = EXPORTS.get(entity)
+    if export is None:
+        return jsonify({"success": False, "error": f"entity must be one of: {', '.join(EXPORTS)}"}), 404
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"success": False, "error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    def rows():
+        # Read one keyset page at a time so memory stays flat for any table size
+        try:
+            for row in iter_pages(lambda: db.table(entity).select(export['select'])):
+                yield export['row'](row)
+        except Exception as e:
+            # The response has already started, so the error can only be logged
+            print(f"Error exporting {entity}:", str(e))  # Debug log
+            raise
+
+    return Response(
+        stream_export(rows(), export['columns'], export_format),
+        mimetype=EXPORT_MIMETYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename={entity}.{export_format}'}
+    )
+
 # Error handlers
 @app.errorhandler(404)
 def not_found_error(error):
@@ -1157,23 +1160,38 @@ def internal_error(error):
 def generate_quotation():
     try:
         data = request.json
+        # Line amounts and totals are always computed here; whatever the form
+        # calculated is replaced
+        data.update(price_quotation(data.get('items') or []))
         
         # First, save the quotation to the database
         company_id = data.get('company', {}).get('id')
         client_id = data.get('client', {}).get('id')
         employee_id = data.get('employee', {}).get('id')  # Get employee ID
         
-        # Generate reference number
-        company_response = supabase.table('companies').select('*').eq('id', company_id).execute()
-        if not company_response.data:
+        # The company, client and employee are looked up concurrently
+        rows = fanout('generate_quotation.lookup', {
+            'company': lambda: get_company(company_id),
+            'client': lambda: get_cached_row(clients_cache, 'clients', client_id),
+            'employee': lambda: get_cached_row(employees_cache, 'employees', employee_id)
+        })
+        company = rows['company']
+        if company is None:
             return jsonify({"success": False, "error": "Company not found"}), 404
+        # The form may send only the company fields its picker loaded
+        data['company'] = {**company, **data['company']}
+        for name, model in (('client', Client), ('employee', Employee)):
+            if data.get(name, {}).get('id') is not None and rows[name] is None:
+                return jsonify({"success": False, "error": f"{name.capitalize()} not found"}), 404
+            if rows[name] is not None:
+                # Fields sent with the form win over the stored ones
+                data[name] = {**model.from_db(rows[name]), **data[name]}
             
-        company = company_response.data[0]
-        new_number = company.get('last_quote_number', 0) + 1
-        ref_number = company.get('ref_format', 'QUOTE-{YYYY}-{NUM}').format(
-            YYYY=datetime.now().year,
-            NUM=str(new_number).zfill(4)
-        )
+        # Generate reference number
+        ref_number = allocate_ref_number(company)
+        # The document must carry the number that was actually allocated, not
+        # the one the form previewed
+        data['refNumber'] = ref_number
         
         # Prepare quotation data
         quotation_data = {
@@ -1182,538 +1200,80 @@ def generate_quotation():
             'employee_id': employee_id,  # Add employee ID
             'ref_number': ref_number,
             'date': datetime.utcnow().isoformat(),
-            'items': data.get('items', []),
-            'total': data.get('grandTotal', 0)
+            'items': data['items'],
+            'total': data['grandTotal']
         }
         
+        filename = f"quotation_{data.get('refNumber', 'temp').replace('/', '_')}.docx"
+
+        if is_truthy(request.args.get('async')):
+            # Create quotation in database
+            quotation_response = db.table('quotations').insert(quotation_data).execute()
+            if not quotation_response.data:
+                raise Exception("Failed to create quotation")
+
+            # Render on the worker pool; the client polls /api/jobs/<job_id>
+            job_id = render_jobs.submit(
+                renderer().render_docx_timed, data, renderer().skeleton_generation,
+                on_done=lambda result: save_upload(filename, rendered('job', result)),
+                kind='quotation', ref_number=ref_number
+            )
+            return jsonify({
+                'success': True,
+                'message': 'Quotation generation queued',
+                'job_id': job_id,
+                'status_url': f"/api/jobs/{job_id}",
+                'ref_number': ref_number
+            }), 202
+
         # Create quotation in database
-        quotation_response = supabase.table('quotations').insert(quotation_data).execute()
-        
+        quotation_response = db.table('quotations').insert(quotation_data).execute()
         if not quotation_response.data:
             raise Exception("Failed to create quotation")
-            
-        # Update company's last quote number
-        company_update = supabase.table('companies').update({
-            'last_quote_number': new_number
-        }).eq('id', company_id).execute()
-        
-        if not company_update.data:
-            print("Warning: Failed to update company's last quote number")
-        
-        # Now proceed with document generation
-        doc = Document()
-        
-        # Set very narrow margins
-        sections = doc.sections
-        for section in sections:
-            section.top_margin = Inches(0.2)    # Reduced from 0.3 to 0.2
-            section.bottom_margin = Inches(0.2)  # Reduced from 0.3 to 0.2
-            section.left_margin = Inches(0.3)    # Keep left margin
-            section.right_margin = Inches(0.3)   # Keep right margin
-        
-        # Set default font size for the document
-        style = doc.styles['Normal']
-        style.font.size = Pt(8)  # Reduced from 9 to 8
-        style.paragraph_format.space_after = Pt(0)  # Remove space after paragraphs
-        style.paragraph_format.space_before = Pt(0)  # Remove space before paragraphs
-        
-        # Add header table
-        header_table = doc.add_table(rows=4, cols=1)
-        header_table.style = 'Table Grid'
-        
-        # Company Name Cell
-        company_cell = header_table.rows[0].cells[0]
-        company_name = company_cell.paragraphs[0]
-        company_name.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        company_name.add_run(data.get('company', {}).get('name', '').upper())
-        company_name.runs[0].font.size = Pt(16)
-        company_name.runs[0].font.bold = True
-        company_name.runs[0].font.color.rgb = RGBColor(255, 255, 255)
-        
-        # Address Cell
-        address_cell = header_table.rows[1].cells[0]
-        address = address_cell.paragraphs[0]
-        address.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        address.add_run(data.get('company', {}).get('address', '').upper())
-        address.runs[0].font.size = Pt(11)
-        address.runs[0].font.color.rgb = RGBColor(255, 255, 255)
-        
-        # Email and Phone Cell
-        email_cell = header_table.rows[2].cells[0]
-        email = email_cell.paragraphs[0]
-        email.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        email.add_run(f"Email:- {data.get('company', {}).get('email', '')} {data.get('company', {}).get('phone', '')}")
-        email.runs[0].font.size = Pt(11)
-        email.runs[0].font.color.rgb = RGBColor(255, 255, 255)
-        
-        # Tax Info Cell
-        tax_cell = header_table.rows[3].cells[0]
-        tax_info = tax_cell.paragraphs[0]
-        tax_info.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        pan = data.get('company', {}).get('pan_number', '')  # Changed from 'pan' to 'pan_number'
-        gst = data.get('company', {}).get('gst_number', '')  # Changed from 'gst' to 'gst_number'
-        tax_text = f"PAN NO.: {pan} | GST NO.: {gst}"
-        tax_info.add_run(tax_text)
-        tax_info.runs[0].font.size = Pt(11)
-        tax_info.runs[0].font.color.rgb = RGBColor(255, 255, 255)
-        
-        # Set background color for all cells and remove borders
-        for row in header_table.rows:
-            for cell in row.cells:
-                shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="1B4F8C"/>')
-                cell._tc.get_or_add_tcPr().append(shading_elm)
-                # Remove cell borders
-                tcPr = cell._tc.get_or_add_tcPr()
-                tcBorders = parse_xml(f'<w:tcBorders {nsdecls("w")}>' +
-                                    '<w:top w:val="nil"/>' +
-                                    '<w:left w:val="nil"/>' +
-                                    '<w:bottom w:val="nil"/>' +
-                                    '<w:right w:val="nil"/>' +
-                                    '</w:tcBorders>')
-                tcPr.append(tcBorders)
-
-        # Add QUOTATION/PERFORMA INVOICE title
-        title = doc.add_paragraph()
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        title.add_run('QUOTATION/PERFORMA INVOICE')  # Removed extra newlines
-        title.runs[0].font.bold = True
-        title.runs[0].font.size = Pt(12)
-        title.paragraph_format.space_after = Pt(4)  # Small space after title
-
-        # Add reference number and date
-        ref_date = doc.add_table(rows=1, cols=2)
-        ref_date.autofit = True
-        ref_cell = ref_date.cell(0, 0)
-        ref_cell.text = f"Ref No: {data.get('refNumber', '')}"
-        date_cell = ref_date.cell(0, 1)
-        date_cell.text = f"Date: {data.get('quotationDate', '')}"
-        date_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-
-        # Add spacing after header - reduced
-        doc.add_paragraph().paragraph_format.space_after = Pt(2)
-
-        # Add client details
-        to_table = doc.add_table(rows=2, cols=1)
-        to_table.style = 'Table Grid'
-        
-        # To Cell with blue background
-        to_cell = to_table.rows[0].cells[0]
-        to_paragraph = to_cell.paragraphs[0]
-        to_paragraph.add_run('To')
-        to_paragraph.runs[0].font.bold = True
-        to_paragraph.runs[0].font.size = Pt(9)
-        to_paragraph.runs[0].font.color.rgb = RGBColor(255, 255, 255)
-        
-        # Set blue background for To cell
-        shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="1B4F8C"/>')
-        to_cell._tc.get_or_add_tcPr().append(shading_elm)
-        
-        # Client details cell
-        client = data.get('client', {})
-        details_cell = to_table.rows[1].cells[0]
-        details_paragraph = details_cell.paragraphs[0]
-        details_paragraph.add_run(f"{client.get('business_name', '')}\n")
-        details_paragraph.add_run(f"{client.get('address', '')}\n")
-        details_paragraph.add_run(f"Kind Attn: {client.get('name', '')} | Tel: {client.get('phone', '')} | Email: {client.get('email', '')}")
-        
-        # Remove borders from both cells
-        for row in to_table.rows:
-            for cell in row.cells:
-                tcPr = cell._tc.get_or_add_tcPr()
-                tcBorders = parse_xml(f'<w:tcBorders {nsdecls("w")}>' +
-                                    '<w:top w:val="nil"/>' +
-                                    '<w:left w:val="nil"/>' +
-                                    '<w:bottom w:val="nil"/>' +
-                                    '<w:right w:val="nil"/>' +
-                                    '</w:tcBorders>')
-                tcPr.append(tcBorders)
-        
-        # Add spacing after client details - reduced
-        doc.add_paragraph().paragraph_format.space_after = Pt(2)
-        
-        # Add greeting text with reduced spacing
-        greeting = doc.add_paragraph()
-        greeting.paragraph_format.space_after = Pt(2)
-        greeting.add_run("Dear Sir/Madam,\n")
-        greeting.add_run("Thank you for your enquiry. We are pleased to quote our best prices as under:")
-        
-        # Add spacing after greeting - reduced
-        doc.add_paragraph().paragraph_format.space_after = Pt(2)
-        
-        # Add items table
-        doc.add_paragraph().add_run('Items:').bold = True
-        table = doc.add_table(rows=1, cols=14)
-        table.style = 'Table Grid'
-        
-        # Set header row with blue background and white text
-        header_cells = table.rows[0].cells
-        headers = ['S.No', 'Cat No.', 'Description', 'Pack Size', 'HSN Code', 'Qty', 'Unit Rate', 'Discounted Price', 'Expanded Price', 'GST %', 'GST', 'Total Value', 'Lead Time', 'Brand']
-        
-        # Apply blue background and white text to headers
-        for i, text in enumerate(headers):
-            cell = header_cells[i]
-            # Clear any existing content
-            cell.text = ""
-            paragraph = cell.paragraphs[0]
-            run = paragraph.add_run(text)
-            run.font.bold = True
-            run.font.size = Pt(8)
-            run.font.color.rgb = RGBColor(255, 255, 255)
-            paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            # Set blue background for header cell
-            shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="1B4F8C"/>')
-            cell._tc.get_or_add_tcPr().append(shading_elm)
-        
-        # Add item rows
-        items = data.get('items', [])
-        for idx, item in enumerate(items, 1):
-            row = table.add_row().cells
-            row[0].text = str(idx)  # S.No
-            row[1].text = item.get('catalogue_id', '')  # Cat No.
-            row[2].text = item.get('description', '')  # Description
-            row[3].text = item.get('pack_size', '')  # Pack Size
-            row[4].text = item.get('hsn', '')  # HSN Code
-            row[5].text = str(item.get('quantity', ''))  # Qty
-            row[6].text = f"₹{item.get('unit_rate', 0):.2f}"  # Unit Rate
-            
-            # Calculate discounted price
-            unit_rate = float(item.get('unit_rate', 0))
-            discount = float(item.get('discount_percentage', 0))
-            discounted_price = unit_rate * (1 - discount/100)
-            row[7].text = f"₹{discounted_price:.2f}"  # Discounted Price
-            
-            # Calculate expanded price (discounted price * quantity)
-            quantity = float(item.get('quantity', 0))
-            expanded_price = discounted_price * quantity
-            row[8].text = f"₹{expanded_price:.2f}"  # Expanded Price
-            
-            row[9].text = f"{item.get('gst_percentage', 0)}%"  # GST %
-            row[10].text = f"₹{item.get('gst_value', 0):.2f}"  # GST
-            row[11].text = f"₹{item.get('total', 0):.2f}"  # Total Value
-            row[12].text = item.get('lead_time', '')  # Lead Time
-            row[13].text = item.get('brand', '')  # Changed from 'make' to 'brand'
-            
-            # Center align all cells
-            for cell in row:
-                cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Set optimized column widths for better fit
-        for cell in table.columns[0].cells:  # S.No
-            cell.width = Inches(0.2)
-        for cell in table.columns[1].cells:  # Cat No.
-            cell.width = Inches(0.6)
-        for cell in table.columns[2].cells:  # Description
-            cell.width = Inches(1.8)
-        for cell in table.columns[3].cells:  # Pack Size
-            cell.width = Inches(0.4)
-        for cell in table.columns[4].cells:  # HSN Code
-            cell.width = Inches(0.6)
-        for cell in table.columns[5].cells:  # Qty
-            cell.width = Inches(0.3)
-        for cell in table.columns[6].cells:  # Unit Rate
-            cell.width = Inches(0.6)
-        for cell in table.columns[7].cells:  # Discounted Price
-            cell.width = Inches(0.6)
-        for cell in table.columns[8].cells:  # Expanded Price
-            cell.width = Inches(0.6)
-        for cell in table.columns[9].cells:  # GST %
-            cell.width = Inches(0.4)
-        for cell in table.columns[10].cells:  # GST
-            cell.width = Inches(0.6)
-        for cell in table.columns[11].cells:  # Total Value
-            cell.width = Inches(0.6)
-        for cell in table.columns[12].cells:  # Lead Time
-            cell.width = Inches(0.6)
-        for cell in table.columns[13].cells:  # Brand
-            cell.width = Inches(0.5)
-        
-        # Set optimized column widths for better fit
-        for cell in table.columns[0].cells:  # S.No
-            cell.width = Inches(0.3)
-        for cell in table.columns[1].cells:  # Cat No.
-            cell.width = Inches(0.8)
-        for cell in table.columns[2].cells:  # Description
-            cell.width = Inches(2.0)
-        for cell in table.columns[3].cells:  # Pack Size
-            cell.width = Inches(0.5)
-        for cell in table.columns[4].cells:  # HSN Code
-            cell.width = Inches(0.8)
-        for cell in table.columns[5].cells:  # Qty
-            cell.width = Inches(0.4)
-        for cell in table.columns[6].cells:  # Unit Rate
-            cell.width = Inches(0.8)
-        for cell in table.columns[7].cells:  # Discounted Price
-            cell.width = Inches(0.8)
-        for cell in table.columns[8].cells:  # Expanded Price
-            cell.width = Inches(0.8)
-        for cell in table.columns[9].cells:  # GST %
-            cell.width = Inches(0.4)
-        for cell in table.columns[10].cells:  # GST
-            cell.width = Inches(0.6)
-        for cell in table.columns[11].cells:  # Total Value
-            cell.width = Inches(0.8)
-        for cell in table.columns[12].cells:  # Lead Time
-            cell.width = Inches(0.6)
-        for cell in table.columns[13].cells:  # Brand
-            cell.width = Inches(0.6)
-
-        # Add spacing before totals
-        doc.add_paragraph().paragraph_format.space_after = Pt(2)
-        
-        # Create totals table with specific width and styling
-        totals_table = doc.add_table(rows=3, cols=2)
-        totals_table.style = 'Table Grid'
-        totals_table.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        
-        # Set the width of the totals table columns
-        for cell in totals_table.columns[0].cells:  # Labels
-            cell.width = Inches(1.2)
-        for cell in totals_table.columns[1].cells:  # Values
-            cell.width = Inches(1.0)
-        
-        # Add Sub Total row
-        sub_total_cell = totals_table.cell(0, 0)
-        sub_total_cell.text = ""  # Clear existing content
-        sub_total_label = sub_total_cell.paragraphs[0].add_run("Sub Total:")
-        sub_total_label.font.size = Pt(8)
-        sub_total_label.font.bold = True
-        
-        sub_total_value_cell = totals_table.cell(0, 1)
-        sub_total_value_cell.text = ""  # Clear existing content
-        sub_total_value = sub_total_value_cell.paragraphs[0].add_run(f"₹{data.get('subTotal', 0):.2f}")
-        sub_total_value.font.size = Pt(8)
-        
-        # Add Total GST row
-        gst_cell = totals_table.cell(1, 0)
-        gst_cell.text = ""  # Clear existing content
-        gst_label = gst_cell.paragraphs[0].add_run("Total GST:")
-        gst_label.font.size = Pt(8)
-        gst_label.font.bold = True
-        
-        gst_value_cell = totals_table.cell(1, 1)
-        gst_value_cell.text = ""  # Clear existing content
-        gst_value = gst_value_cell.paragraphs[0].add_run(f"₹{data.get('totalGST', 0):.2f}")
-        gst_value.font.size = Pt(8)
-        
-        # Add Grand Total row with blue background
-        grand_total_cell = totals_table.cell(2, 0)
-        grand_total_cell.text = ""  # Clear existing content
-        grand_total_label = grand_total_cell.paragraphs[0].add_run("Grand Total:")
-        grand_total_label.font.size = Pt(8)
-        grand_total_label.font.bold = True
-        grand_total_label.font.color.rgb = RGBColor(255, 255, 255)
-        
-        grand_total_value_cell = totals_table.cell(2, 1)
-        grand_total_value_cell.text = ""  # Clear existing content
-        grand_total_value = grand_total_value_cell.paragraphs[0].add_run(f"₹{data.get('grandTotal', 0):.2f}")
-        grand_total_value.font.size = Pt(8)
-        grand_total_value.font.bold = True
-        grand_total_value.font.color.rgb = RGBColor(255, 255, 255)
-        
-        # Set blue background for grand total row
-        for cell in [grand_total_cell, grand_total_value_cell]:
-            shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="1B4F8C"/>')
-            cell._tc.get_or_add_tcPr().append(shading_elm)
-        
-        # Right-align all cells in the totals table and set thin borders
-        for row in totals_table.rows:
-            for cell in row.cells:
-                cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-                # Set thin borders
-                tcPr = cell._tc.get_or_add_tcPr()
-                tcBorders = parse_xml(f'<w:tcBorders {nsdecls("w")}>' +
-                                '<w:top w:val="single" w:sz="2"/>' +
-                                '<w:left w:val="single" w:sz="2"/>' +
-                                '<w:bottom w:val="single" w:sz="2"/>' +
-                                '<w:right w:val="single" w:sz="2"/>' +
-                                '</w:tcBorders>')
-                tcPr.append(tcBorders)
-        
-        # Add spacing after totals table
-        doc.add_paragraph().paragraph_format.space_after = Pt(2)
 
-        # Add Terms & Conditions section with blue header
-        terms_table = doc.add_table(rows=1, cols=1)
-        terms_table.style = 'Table Grid'
-        
-        # Terms & Conditions header cell with blue background
-        header_cell = terms_table.rows[0].cells[0]
-        header_paragraph = header_cell.paragraphs[0]
-        header_run = header_paragraph.add_run('Terms & Conditions')
-        header_run.font.bold = True
-        header_run.font.color.rgb = RGBColor(255, 255, 255)
-        header_run.font.size = Pt(9)  # Changed from 11 to 9
-        
-        # Set blue background for header cell
-        shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="1B4F8C"/>')
-        header_cell._tc.get_or_add_tcPr().append(shading_elm)
-        
-        # Remove borders from the header cell
-        tcPr = header_cell._tc.get_or_add_tcPr()
-        tcBorders = parse_xml(f'<w:tcBorders {nsdecls("w")}>' +
-                            '<w:top w:val="nil"/>' +
-                            '<w:left w:val="nil"/>' +
-                            '<w:bottom w:val="nil"/>' +
-                            '<w:right w:val="nil"/>' +
-                            '</w:tcBorders>')
-        tcPr.append(tcBorders)
-        
-        # Add terms list with reduced spacing
-        terms_list = doc.add_paragraph()
-        terms_list.style = doc.styles['Normal']
-        terms_list.paragraph_format.space_before = Pt(2)
-        terms_list.paragraph_format.space_after = Pt(2)
-        
-        # Add payment terms
-        payment_term = terms_list.add_run(f"1) {data.get('paymentTerms', '')}\n")
-        payment_term.font.size = Pt(8)
-        
-        # Add fixed terms with numbering
-        for idx, term in enumerate(data.get('fixedTerms', []), 2):
-            term_text = terms_list.add_run(f"{idx}) {term}\n")
-            term_text.font.size = Pt(8)
-        
-        # Add spacing before Bank Details section
-        doc.add_paragraph().paragraph_format.space_after = Pt(2)
-        
-        # Add Bank Details section
-        bank_table = doc.add_table(rows=1, cols=1)
-        bank_table.style = 'Table Grid'
-        
-        # Bank Details header cell with blue background
-        bank_header_cell = bank_table.rows[0].cells[0]
-        bank_header_paragraph = bank_header_cell.paragraphs[0]
-        bank_header_run = bank_header_paragraph.add_run('Bank Details')
-        bank_header_run.font.bold = True
-        bank_header_run.font.color.rgb = RGBColor(255, 255, 255)
-        bank_header_run.font.size = Pt(9)  # Changed from 11 to 9
-        
-        # Set blue background for header cell
-        bank_shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="1B4F8C"/>')
-        bank_header_cell._tc.get_or_add_tcPr().append(bank_shading_elm)
-        
-        # Remove borders from the header cell
-        bank_tcPr = bank_header_cell._tc.get_or_add_tcPr()
-        bank_tcBorders = parse_xml(f'<w:tcBorders {nsdecls("w")}>' +
-                            '<w:top w:val="nil"/>' +
-                            '<w:left w:val="nil"/>' +
-                            '<w:bottom w:val="nil"/>' +
-                            '<w:right w:val="nil"/>' +
-                            '</w:tcBorders>')
-        bank_tcPr.append(bank_tcBorders)
-        
-        # Add bank details with reduced spacing
-        bank_details = doc.add_paragraph()
-        bank_details.style = doc.styles['Normal']
-        bank_details.paragraph_format.space_before = Pt(2)
-        bank_details.paragraph_format.space_after = Pt(2)
-        bank_details_text = bank_details.add_run(f"HDFC BANK LTD. Account No: {data.get('company', {}).get('account_number', '')} ; NEFT/RTGS IFCS : {data.get('company', {}).get('ifsc_code', '')} Branch code:{data.get('company', {}).get('branch_code', '')} ; Micro code : {data.get('company', {}).get('micro_code', '')} ;Account type: Current account")
-        bank_details_text.font.size = Pt(8)
-        
-        # Add spacing before Quotation Created By section
-        doc.add_paragraph().paragraph_format.space_after = Pt(2)
-        
-        # Add Quotation Created By section
-        created_by_table = doc.add_table(rows=1, cols=1)
-        created_by_table.style = 'Table Grid'
-        
-        # Created By header cell with blue background
-        created_by_header_cell = created_by_table.rows[0].cells[0]
-        created_by_header_paragraph = created_by_header_cell.paragraphs[0]
-        created_by_header_run = created_by_header_paragraph.add_run('Quotation Created By')
-        created_by_header_run.font.bold = True
-        created_by_header_run.font.color.rgb = RGBColor(255, 255, 255)
-        created_by_header_run.font.size = Pt(9)  # Changed from 11 to 9
-        
-        # Set blue background for header cell
-        created_by_shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="1B4F8C"/>')
-        created_by_header_cell._tc.get_or_add_tcPr().append(created_by_shading_elm)
-        
-        # Remove borders from the header cell
-        created_by_tcPr = created_by_header_cell._tc.get_or_add_tcPr()
-        created_by_tcBorders = parse_xml(f'<w:tcBorders {nsdecls("w")}>' +
-                            '<w:top w:val="nil"/>' +
-                            '<w:left w:val="nil"/>' +
-                            '<w:bottom w:val="nil"/>' +
-                            '<w:right w:val="nil"/>' +
-                            '</w:tcBorders>')
-        created_by_tcPr.append(tcBorders)
-        
-        # Add employee details with reduced spacing
-        employee_details = doc.add_paragraph()
-        employee_details.style = doc.styles['Normal']
-        employee_details.paragraph_format.space_before = Pt(2)
-        employee_details.paragraph_format.space_after = Pt(2)
-        employee_name = data.get('employee', {}).get('name', '')
-        employee_phone = data.get('employee', {}).get('phone_number', '')  # Changed from mobile to phone_number
-        employee_email = data.get('employee', {}).get('email', '')
-        
-        employee_details.add_run(f"{employee_name}\n").font.size = Pt(8)
-        employee_details.add_run(f"Mobile: {employee_phone}\n").font.size = Pt(8)  # Using the new employee_phone variable
-        email_run = employee_details.add_run(f"Email: ")
-        email_run.font.size = Pt(8)
-        email_link = employee_details.add_run(employee_email)
-        email_link.font.size = Pt(8)
-        email_link.font.color.rgb = RGBColor(0, 0, 255)  # Blue color for email
-        
-        # Add spacing before signature
-        doc.add_paragraph('\n')
-        
-        # Add signature section with reduced spacing
-        signature_section = doc.add_paragraph()
-        signature_section.paragraph_format.space_before = Pt(4)
-        signature_section.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        
-        # Add "For COMPANY NAME" text
-        company_name = data.get('company', {}).get('name', '').upper()
-        for_company = signature_section.add_run(f"For {company_name}")
-        for_company.font.size = Pt(11)
-        signature_section.add_run('\n\n')  # Add some space
-        
-        # Add company seal image if available
-        company_seal = data.get('company', {}).get('seal_image_url', '')  # Changed from 'seal_image' to 'seal_image_url'
-        print("Company Seal Data:", company_seal)  # Debug print
-        if company_seal:
-            try:
-                # Get the full path to the image
-                seal_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), company_seal.lstrip('/'))
-                
-                if os.path.exists(seal_path):
-                    # Add the image to the document with specific size
-                    signature_section.add_run().add_picture(seal_path, width=Inches(1.1), height=Inches(1.1))  # Slightly larger than 80px
-                    signature_section.add_run('\n')  # Add space after seal
-                else:
-                    print(f"Seal image file not found at path: {seal_path}")
-            except Exception as e:
-                print(f"Error adding company seal: {str(e)}")
-                import traceback
-                print(traceback.format_exc())  # Print full error traceback
-        else:
-            print("No company seal image found in data")  # Debug print
-        
-        # Add Authorized Signatory text
-        signature_section.add_run('\n')  # Add extra space before text
-        auth_signatory = signature_section.add_run("Authorized Signatory")
-        auth_signatory.font.size = Pt(11)
+        # The render is CPU-bound, so it runs on this request's thread rather than
+        # in the fanout pool, which is kept for database calls
+        content = render_document(data)
+
+        # ?download=true returns the document itself instead of a file name
+        if is_truthy(request.args.get('download')):
+            response = send_document(content, filename)
+            response.headers['X-Ref-Number'] = ref_number
+            return response
         
         # Save the document
-        filename = f"quotation_{data.get('refNumber', 'temp').replace('/', '_')}.docx"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        doc.save(filepath)
+        save_upload(filename, content)
         
         return jsonify({
             'success': True,
             'message': 'Quotation generated successfully',
-            'filename': filename
+            'filename': filename,
+            'ref_number': ref_number
         })
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'message': str(e)
         }), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), MAX_JOB_WAIT_SECONDS)
+    except ValueError:
+        return jsonify({"success": False, "error": "wait must be a number of seconds"}), 400
+
+    job = render_jobs.status(job_id, wait)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify({"success": True, "data": job})
+
 @app.route('/api/download-quotation/<filename>', methods=['GET'])
 def download_quotation(filename):
     try:
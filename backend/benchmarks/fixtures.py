@@ -0,0 +1,94 @@
+import random
+import struct
+import zlib
+
+from pricing import price_quotation
+
+BRANDS = ('SRL', 'Merck', 'Sigma', 'HiMedia', 'Loba', 'TCI')
+PACK_SIZES = ('25g', '100g', '500g', '1kg', '500ml', '2.5l')
+HSN_CODES = ('2815', '28151100', '29051100', '38220090', '30049099', '2501')
+WORDS = ('sodium', 'chloride', 'potassium', 'hydroxide', 'acid', 'buffer', 'solution', 'extra', 'pure',
+         'reagent', 'grade', 'anhydrous', 'powder', 'crystals', 'indicator', 'standard', 'methanol', 'hplc')
+
+
+def quotation_items(count, seed=0):
+    """Deterministic line items shaped like the ones the quotation form sends (unpriced)"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        quantity = rng.randint(1, 20)
+        unit_rate = round(rng.uniform(50, 25000), 2)
+        discount = rng.choice((0, 5, 10, 15))
+        gst_percentage = rng.choice((5, 12, 18))
+        items.append({
+            'catalogue_id': f'{rng.choice("ABCDEFGH")}{rng.randint(1000, 99999)}',
+            'description': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 7))).capitalize(),
+            'pack_size': rng.choice(PACK_SIZES),
+            'hsn': rng.choice(HSN_CODES),
+            'quantity': quantity,
+            'unit_rate': unit_rate,
+            'discount_percentage': discount,
+            'gst_percentage': gst_percentage,
+            'lead_time': rng.choice(('Ex-stock', '1 week', '2-3 weeks', '4-6 weeks')),
+            'brand': rng.choice(BRANDS)
+        })
+    return items
+
+
+def quotation_payload(item_count, seal_image_url=None, seed=0):
+    """A complete generate-quotation payload with `item_count` line items"""
+    # Priced the way the generate-quotation route prices them
+    priced = price_quotation(quotation_items(item_count, seed))
+    return {
+        'company': {
+            'id': 1,
+            'name': 'Benchmark Scientific Pvt. Ltd.',
+            'address': 'Plot 12, MIDC Industrial Area, Andheri East, Mumbai 400093',
+            'email': 'sales@benchmark.example',
+            'phone': '+91 22 5555 0100',
+            'pan_number': 'AAACB1234C',
+            'gst_number': '27AAACB1234C1Z5',
+            'account_number': '50200012345678',
+            'ifsc_code': 'HDFC0000123',
+            'branch_code': '0123',
+            'micro_code': '400240012',
+            'seal_image_url': seal_image_url
+        },
+        'client': {
+            'id': 1,
+            'name': 'Dr. A. Rao',
+            'business_name': 'Institute of Chemical Research',
+            'address': 'Research Park, Pune 411008',
+            'email': 'purchase@icr.example',
+            'mobile': '+91 98200 00000'
+        },
+        'employee': {'id': 1, 'name': 'S. Kulkarni', 'phone_number': '+91 98190 00000', 'email': 'sk@benchmark.example'},
+        'refNumber': 'BS-2025-0001',
+        'quotationDate': '2025-01-15',
+        'items': priced['items'],
+        'subTotal': priced['subTotal'],
+        'totalGST': priced['totalGST'],
+        'grandTotal': priced['grandTotal'],
+        'paymentTerms': '50% advance, balance against delivery',
+        'fixedTerms': ['Prices are ex-works', 'Validity: 30 days', 'Subject to Mumbai jurisdiction']
+    }
+
+
+def seal_png(size=400, seed=0):
+    """A noisy RGB PNG of roughly the size of a scanned company seal"""
+    rng = random.Random(seed)
+    rows = []
+    for y in range(size):
+        row = bytearray(b'\x00')
+        for x in range(size):
+            ring = abs(((x - size / 2) ** 2 + (y - size / 2) ** 2) ** 0.5 - size * 0.4) < size * 0.04
+            shade = 40 if ring else 235
+            row += bytes((shade + rng.randint(0, 20), shade + rng.randint(0, 20), 200 if ring else 240))
+        rows.append(bytes(row))
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(b''.join(rows), 9)) + chunk(b'IEND', b''))
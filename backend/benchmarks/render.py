@@ -0,0 +1,143 @@
+"""Benchmark the quotation renderer on synthetic quotations, without a database.
+
+Run from the backend directory:
+
+    python -m benchmarks.render                  # measure and compare with baselines
+    python -m benchmarks.render --save-baseline  # measure and store new baselines
+    python -m benchmarks.render --sizes 1,50 --repeat 5
+
+Every case renders the document exactly as the generate routes do (render and
+save to .docx bytes) and reports the median wall time, the tracemalloc peak and
+the output size. Cases slower or hungrier than their baseline by more than
+--tolerance are reported as regressions and make the run exit with status 1.
+Baselines depend on the machine, so save them on the machine you compare on.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import quotation_renderer
+from benchmarks.fixtures import quotation_payload, seal_png
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+DEFAULT_SIZES = (1, 50, 500, 5000)
+DEFAULT_TOLERANCE = 0.25
+
+
+def case_name(size, seal):
+    return f"{size}_items{'_seal' if seal else ''}"
+
+
+def measure(payload, repeat):
+    """Render `payload` `repeat` times; returns wall time, tracemalloc peak and output size"""
+    # Warm up: builds the company skeleton, as a long-running worker would have
+    content = quotation_renderer.render_docx(payload)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        quotation_renderer.render_docx(payload)
+        timings.append(time.perf_counter() - start)
+
+    # Memory is measured on its own run, since tracing slows rendering down
+    tracemalloc.start()
+    quotation_renderer.render_docx(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'wall_ms': round(statistics.median(timings) * 1000, 2),
+        'peak_kib': round(peak / 1024, 1),
+        'size_bytes': len(content)
+    }
+
+
+def load_baselines():
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as f:
+        return json.load(f).get('cases', {})
+
+
+def save_baselines(results):
+    with open(BASELINE_PATH, 'w') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'cases': results
+        }, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def regressions(result, baseline, tolerance):
+    """Return descriptions of the metrics in `result` that exceed `baseline` by more than `tolerance`"""
+    found = []
+    for metric in ('wall_ms', 'peak_kib'):
+        if metric in baseline and result[metric] > baseline[metric] * (1 + tolerance):
+            found.append(f"{metric} {result[metric]} vs {baseline[metric]}")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the quotation document renderer')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='comma-separated item counts (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed renders per case (default: %(default)s)')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed slowdown before a case counts as a regression (default: %(default)s)')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baselines')
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    # The renderer resolves seal paths relative to the backend directory
+    fixture_dir = tempfile.mkdtemp(prefix='quotation-bench-')
+    seal_path = os.path.join(fixture_dir, 'seal.png')
+    with open(seal_path, 'wb') as f:
+        f.write(seal_png())
+    seal_url = os.path.relpath(seal_path, quotation_renderer.BASE_DIR)
+
+    baselines = load_baselines()
+    results = {}
+    failed = []
+    print(f"{'case':<20}{'wall ms':>12}{'peak KiB':>12}{'size B':>12}  baseline")
+    try:
+        for size in sizes:
+            for seal in (False, True):
+                name = case_name(size, seal)
+                result = measure(quotation_payload(size, seal_url if seal else None), args.repeat)
+                results[name] = result
+
+                baseline = baselines.get(name)
+                if baseline is None:
+                    status = 'none'
+                else:
+                    problems = regressions(result, baseline, args.tolerance)
+                    status = 'REGRESSION: ' + ', '.join(problems) if problems else \
+                        f"ok ({result['wall_ms'] / baseline['wall_ms']:.2f}x time)"
+                    if problems:
+                        failed.append(name)
+                print(f"{name:<20}{result['wall_ms']:>12}{result['peak_kib']:>12}{result['size_bytes']:>12}  {status}")
+    finally:
+        shutil.rmtree(fixture_dir, ignore_errors=True)
+
+    if args.save_baseline:
+        baselines.update(results)
+        save_baselines(baselines)
+        print(f"Saved baselines to {BASELINE_PATH}")
+    elif failed:
+        print(f"{len(failed)} case(s) regressed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""Measure how long a worker takes to import the app, using python -X importtime.
+
+Run from the backend directory:
+
+    python -m benchmarks.startup                  # measure and compare with baselines
+    python -m benchmarks.startup --save-baseline  # measure and store new baselines
+    python -m benchmarks.startup --top 20         # also list the 20 slowest imports
+
+Each case imports app.py in a fresh interpreter, once as a plain API worker and
+once with PRELOAD_RENDERER=true as a render worker would, and reports the
+median cumulative import time of `app`, the median wall time of the whole
+interpreter and the number of modules imported. The database is never
+contacted, so no credentials are needed. A plain worker that imports the
+document stack, or a case slower than its baseline by more than --tolerance,
+counts as a regression and makes the run exit with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_baselines.json')
+
+# Import times are noisier than render times, so allow more slack by default
+DEFAULT_TOLERANCE = 0.5
+
+# Modules only the renderer needs; API workers must not import them at startup
+RENDER_MODULES = ('docx', 'lxml', 'requests', 'quotation_renderer')
+
+CASES = {
+    'api_worker': {},
+    'render_worker': {'PRELOAD_RENDERER': 'true'},
+}
+
+
+def parse_importtime(stderr):
+    """Return [(name, depth, self_us, cumulative_us)] from -X importtime output"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return imports
+
+
+def import_app(extra_env):
+    """Import the app in a fresh interpreter; returns (wall seconds, parsed importtime output)"""
+    env = dict(os.environ, DATA_BACKEND='supabase', SUPABASE_URL='http://localhost', SUPABASE_KEY='startup-benchmark')
+    env.pop('PRELOAD_RENDERER', None)
+    env.update(extra_env)
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    seconds = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing the app failed:\n{process.stderr[-2000:]}")
+    return seconds, parse_importtime(process.stderr)
+
+
+def measure(extra_env, repeat):
+    # Warm up: compiles any stale .pyc files so they are not part of the timings
+    import_app(extra_env)
+
+    walls, import_times = [], []
+    for _ in range(repeat):
+        seconds, imports = import_app(extra_env)
+        walls.append(seconds)
+        import_times.append(next(cumulative for name, depth, _, cumulative in imports
+                                 if name == 'app' and depth == 0))
+    return {
+        'import_ms': round(statistics.median(import_times) / 1000, 1),
+        'wall_ms': round(statistics.median(walls) * 1000, 1),
+        'modules': len(imports)
+    }, imports
+
+
+def slowest_imports(imports, top):
+    """The `top` direct imports of app with the largest cumulative time"""
+    children, in_app = [], False
+    for name, depth, _, cumulative in reversed(imports):
+        # importtime lists a module after everything it imported
+        if name == 'app' and depth == 0:
+            in_app = True
+        elif in_app and depth == 0:
+            break
+        elif in_app and depth == 1:
+            children.append((cumulative, name))
+    return sorted(children, reverse=True)[:top]
+
+
+def load_baselines():
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as f:
+        return json.load(f).get('cases', {})
+
+
+def save_baselines(results):
+    with open(BASELINE_PATH, 'w') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'cases': results
+        }, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def regressions(result, baseline, tolerance):
+    """Return descriptions of the metrics in `result` that exceed `baseline` by more than `tolerance`"""
+    found = []
+    for metric in ('import_ms', 'wall_ms'):
+        if metric in baseline and result[metric] > baseline[metric] * (1 + tolerance):
+            found.append(f"{metric} {result[metric]} vs {baseline[metric]}")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure app import time for API and render workers')
+    parser.add_argument('--repeat', type=int, default=5, help='timed imports per case (default: %(default)s)')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed slowdown before a case counts as a regression (default: %(default)s)')
+    parser.add_argument('--top', type=int, default=0, help='list the N slowest direct imports of app')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baselines')
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines()
+    results = {}
+    failed = []
+    print(f"{'case':<20}{'import ms':>12}{'wall ms':>12}{'modules':>10}  baseline")
+    for name, extra_env in CASES.items():
+        result, imports = measure(extra_env, args.repeat)
+        results[name] = result
+
+        problems = []
+        if not extra_env:
+            loaded = {module for module, _, _, _ in imports}
+            problems.extend(f"imports {module}" for module in RENDER_MODULES if module in loaded)
+        baseline = baselines.get(name)
+        if baseline is not None:
+            problems.extend(regressions(result, baseline, args.tolerance))
+        if problems:
+            failed.append(name)
+            status = 'REGRESSION: ' + ', '.join(problems)
+        elif baseline is None:
+            status = 'none'
+        else:
+            status = f"ok ({result['import_ms'] / baseline['import_ms']:.2f}x time)"
+        print(f"{name:<20}{result['import_ms']:>12}{result['wall_ms']:>12}{result['modules']:>10}  {status}")
+
+        for cumulative, module in slowest_imports(imports, args.top):
+            print(f"    {module:<36}{cumulative / 1000:>10.1f} ms")
+
+    if args.save_baseline:
+        baselines.update(results)
+        save_baselines(baselines)
+        print(f"Saved baselines to {BASELINE_PATH}")
+    elif failed:
+        print(f"{len(failed)} case(s) regressed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,15 +2,144 @@ from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 import os
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
 from io import BytesIO
+from urllib.parse import urlparse
+
+# (connect, read) timeouts in seconds for image downloads
+HTTP_TIMEOUT = (3.05, 10)
+
+# Shared, pooled session so repeated downloads reuse connections
+http_session = requests.Session()
+http_session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+http_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+
+def is_remote(source):
+    return source.startswith(('http://', 'https://'))
+
+
+def storage_hosts():
+    """Hosts images may be downloaded from: the Supabase project plus IMAGE_HOSTS"""
+    urls = [os.getenv('SUPABASE_URL', '')] + os.getenv('IMAGE_HOSTS', '').split(',')
+    hosts = {urlparse(url.strip()).hostname or url.strip().lower() for url in urls}
+    return frozenset(host for host in hosts if host)
+
+
+class ImageCache:
+    """Thread-safe LRU cache of image bytes keyed by URL or local file path.
+
+    Local files are re-read only when their mtime or size changes. Downloaded
+    images are trusted for `revalidate_after` seconds and then revalidated with
+    a conditional GET (If-None-Match / If-Modified-Since); if the host cannot be
+    reached the cached bytes are used. URLs on hosts outside `allowed_hosts` are
+    refused with a ValueError.
+    """
+
+    def __init__(self, maxsize=32, revalidate_after=300, session=http_session, timeout=HTTP_TIMEOUT,
+                 allowed_hosts=frozenset()):
+        self.maxsize = maxsize
+        self.allowed_hosts = allowed_hosts
+        self.revalidate_after = revalidate_after
+        self._session = session
+        self._timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get(self, source):
+        """Return the bytes of an image URL or file path, or None if it does not exist"""
+        if is_remote(source):
+            return self._get_remote(source)
+        return self._get_local(source)
+
+    def _get_local(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._discard(path)
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+        entry = self._lookup(path)
+        if entry is not None and entry['version'] == version:
+            return entry['content']
+
+        with open(path, 'rb') as f:
+            content = f.read()
+        self._store(path, {'version': version, 'content': content})
+        return content
+
+    def _get_remote(self, url):
+        if urlparse(url).hostname not in self.allowed_hosts:
+            raise ValueError(f"Image host not allowed: {url}")
+
+        entry = self._lookup(url)
+        if entry is not None and time.monotonic() - entry['checked_at'] < self.revalidate_after:
+            return entry['content']
+
+        headers = {}
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        try:
+            response = self._session.get(url, headers=headers, timeout=self._timeout)
+        except requests.RequestException as e:
+            if entry is None:
+                raise
+            print(f"Could not revalidate image {url}, using cached copy: {str(e)}")
+            return entry['content']
+
+        if response.status_code == 304 and entry is not None:
+            entry['checked_at'] = time.monotonic()
+            return entry['content']
+        if response.status_code == 404:
+            self._discard(url)
+            return None
+        response.raise_for_status()
+
+        self._store(url, {
+            'content': response.content,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'checked_at': time.monotonic()
+        })
+        return response.content
+
+
+# Seal and other images placed in generated documents
+image_cache = ImageCache(maxsize=int(os.getenv('IMAGE_CACHE_SIZE', '32')), allowed_hosts=storage_hosts())
+
 
 def add_image_from_url(doc, url, width=2.0):
     """Add an image from URL to the document"""
     try:
-        response = requests.get(url)
-        image_stream = BytesIO(response.content)
-        doc.add_picture(image_stream, width=Inches(width))
+        content = image_cache.get(url)
+        if content is None:
+            raise FileNotFoundError(f"Image not found: {url}")
+        doc.add_picture(BytesIO(content), width=Inches(width))
     except Exception as e:
         print(f"Error adding image: {str(e)}")
         # Add a placeholder text instead
@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Rows written out per chunk of the response
+EXPORT_CHUNK_ROWS = 500
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def _chunked(lines):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def csv_lines(rows, columns):
+    """Yield a CSV header and then one line per row, without holding more than a line"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return text
+
+    yield line(columns)
+    for row in rows:
+        yield line([_csv_value(row.get(column)) for column in columns])
+
+
+def ndjson_lines(rows, columns):
+    for row in rows:
+        yield json.dumps({column: row.get(column) for column in columns}, default=str) + '\n'
+
+
+def stream_export(rows, columns, export_format):
+    """Yield `rows` as CSV or NDJSON text, a chunk of rows at a time.
+
+    The CSV header goes out on its own first, so a client starts receiving data
+    before the first page has been read from the database.
+    """
+    if export_format == 'csv':
+        lines = csv_lines(rows, columns)
+        yield next(lines)
+    else:
+        lines = ndjson_lines(rows, columns)
+    yield from _chunked(lines)
@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from metrics import observe_fanout
+
+# Threads shared by every request for its concurrent database calls
+FANOUT_WORKERS = int(os.getenv('FANOUT_WORKERS', '16'))
+# Longest a group of concurrent calls may take, in seconds
+DEFAULT_FANOUT_TIMEOUT = float(os.getenv('FANOUT_TIMEOUT_SECONDS', '10'))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class FanoutTimeout(TimeoutError):
+    """Some calls of a fanout group did not finish within its timeout"""
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='fanout')
+    return _executor
+
+
+def fanout(group, calls, timeout=None):
+    """Run independent zero-argument `calls` ({name: fn}) concurrently and return {name: result}.
+
+    The calls share one `timeout` (DEFAULT_FANOUT_TIMEOUT by default), so the
+    group takes as long as its slowest call rather than the sum of all of them.
+    If a call raises, the first failure in the order of `calls` is re-raised
+    once the others have finished; FanoutTimeout is raised if any call is still
+    running when the timeout expires. Each call's time, the group's wall time
+    and the time saved are recorded in the metrics under `group`.
+
+    Only I/O-bound calls such as database queries belong here: CPU-bound work
+    gains little from threads and would hold pool threads other requests need.
+    """
+    timeout = DEFAULT_FANOUT_TIMEOUT if timeout is None else timeout
+    start = time.perf_counter()
+    call_seconds = {}
+
+    def run(name, fn):
+        call_start = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            call_seconds[name] = time.perf_counter() - call_start
+
+    futures = {name: _pool().submit(run, name, fn) for name, fn in calls.items()}
+    _, pending = wait(futures.values(), timeout=timeout)
+    observe_fanout(group, time.perf_counter() - start, dict(call_seconds))
+    if pending:
+        late = [name for name, future in futures.items() if future in pending]
+        raise FanoutTimeout(f"{group}: {', '.join(late)} did not finish within {timeout:g}s")
+
+    for future in futures.values():
+        if future.exception() is not None:
+            raise future.exception()
+    return {name: future.result() for name, future in futures.items()}
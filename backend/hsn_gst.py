@@ -0,0 +1,192 @@
+import hashlib
+
+# How long clients may cache GST lookups; the table only changes on deploy
+GST_CACHE_MAX_AGE = 86400
+
+# Comprehensive HSN-GST mapping for chemicals, lab equipment and related products.
+# Keys are HSN prefixes; a code resolves to the rate of its longest listed prefix.
+HSN_GST_RATES = {
+    # Chapter 28: Inorganic chemicals
+    '28': 18,    # All inorganic chemicals
+    '2801': 18,  # Halogens (fluorine, chlorine, bromine and iodine)
+    '2802': 18,  # Sulphur, sublimed or precipitated; colloidal sulphur
+    '2803': 18,  # Carbon (carbon blacks and other forms of carbon)
+    '2804': 18,  # Hydrogen, rare gases and other non-metals
+    '2805': 18,  # Alkali or alkaline-earth metals
+    '2806': 18,  # Hydrogen chloride and chlorosulphuric acid
+    '2807': 18,  # Sulphuric acid and oleum
+    '2808': 18,  # Nitric acid; sulphonitric acids
+    '2809': 18,  # Phosphorus pentoxide; phosphoric acid
+    '2810': 18,  # Oxides of boron; boric acids
+    '2811': 18,  # Other inorganic acids
+    '2812': 18,  # Halides and halide oxides of non-metals
+    '2813': 18,  # Sulphides of non-metals
+    '2814': 18,  # Ammonia, anhydrous or in aqueous solution
+    '2815': 18,  # Sodium/Potassium hydroxide; peroxides of sodium/potassium
+    '2816': 18,  # Hydroxide and peroxide of magnesium
+    '2817': 18,  # Zinc oxide; zinc peroxide
+    '2818': 18,  # Artificial corundum; aluminum oxide; aluminum hydroxide
+    '2819': 18,  # Chromium oxides and hydroxides
+    '2820': 18,  # Manganese oxides
+    '2821': 18,  # Iron oxides and hydroxides
+    '2822': 18,  # Cobalt oxides and hydroxides
+    '2823': 18,  # Titanium oxides
+    '2824': 18,  # Lead oxides
+    '2825': 18,  # Hydrazine, hydroxylamine, inorganic bases
+    '2826': 18,  # Fluorides; fluorosilicates, fluoroaluminates
+    '2827': 18,  # Chlorides, chloride oxides
+    '2828': 18,  # Hypochlorites; commercial calcium hypochlorite
+    '2829': 18,  # Chlorates and perchlorates
+    '2830': 18,  # Sulphides; polysulphides
+    '2831': 18,  # Dithionites and sulphoxylates
+    '2832': 18,  # Sulphites; thiosulphates
+    '2833': 18,  # Sulphates; alums; peroxosulphates
+    '2834': 18,  # Nitrites; nitrates
+    '2835': 18,  # Phosphinates, phosphonates, phosphates
+    '2836': 18,  # Carbonates; peroxocarbonates
+    '2837': 18,  # Cyanides, cyanide oxides
+    '2838': 18,  # Fulminates, cyanates and thiocyanates
+    '2839': 18,  # Silicates; commercial alkali metal silicates
+    '2840': 18,  # Borates; peroxoborates
+    '2841': 18,  # Salts of oxometallic/peroxometallic acids
+    '2842': 18,  # Other salts of inorganic acids/peroxoacids
+    '2843': 18,  # Colloidal precious metals
+    '2844': 18,  # Radioactive chemical elements
+    '2845': 18,  # Isotopes and their compounds
+    '2846': 18,  # Compounds of rare-earth metals
+    '2847': 18,  # Hydrogen peroxide
+    '2848': 18,  # Phosphides
+    '2849': 18,  # Carbides
+    '2850': 18,  # Hydrides, nitrides, azides, silicides
+    '2851': 18,  # Other inorganic compounds
+
+    # Chapter 29: Organic Chemicals
+    '29': 18,    # All organic chemicals
+    '2901': 18,  # Acyclic hydrocarbons
+    '2902': 18,  # Cyclic hydrocarbons
+    '2903': 18,  # Halogenated derivatives of hydrocarbons
+    '2904': 18,  # Sulphonated, nitrated derivatives
+    '2905': 18,  # Acyclic alcohols and their derivatives
+    '2906': 18,  # Cyclic alcohols and their derivatives
+    '2907': 18,  # Phenols; phenol-alcohols
+    '2908': 18,  # Derivatives of phenols
+    '2909': 18,  # Ethers, ether-alcohols, ether-phenols
+    '2910': 18,  # Epoxides, epoxyalcohols, epoxyphenols
+    '2911': 18,  # Acetals and hemiacetals
+    '2912': 18,  # Aldehydes
+    '2913': 18,  # Halogenated, sulphonated derivatives of aldehydes
+    '2914': 18,  # Ketones and quinones
+    '2915': 18,  # Saturated acyclic monocarboxylic acids
+    '2916': 18,  # Unsaturated acyclic monocarboxylic acids
+    '2917': 18,  # Polycarboxylic acids
+    '2918': 18,  # Carboxylic acids with additional oxygen function
+    '2919': 18,  # Phosphoric esters and their salts
+    '2920': 18,  # Esters of other inorganic acids
+    '2921': 18,  # Amine-function compounds
+    '2922': 18,  # Oxygen-function amino-compounds
+    '2923': 18,  # Quaternary ammonium salts and hydroxides
+    '2924': 18,  # Carboxyamide-function compounds
+    '2925': 18,  # Carboxyimide-function compounds
+    '2926': 18,  # Nitrile-function compounds
+    '2927': 18,  # Diazo-, azo- or azoxy-compounds
+    '2928': 18,  # Organic derivatives of hydrazine
+    '2929': 18,  # Compounds with other nitrogen function
+    '2930': 18,  # Organo-sulphur compounds
+    '2931': 18,  # Other organo-inorganic compounds
+    '2932': 18,  # Heterocyclic compounds with oxygen
+    '2933': 18,  # Heterocyclic compounds with nitrogen
+    '2934': 18,  # Nucleic acids and their salts
+    '2935': 18,  # Sulphonamides
+    '2936': 18,  # Provitamins and vitamins
+    '2937': 18,  # Hormones
+    '2938': 18,  # Glycosides
+    '2939': 18,  # Vegetable alkaloids
+    '2940': 18,  # Sugars, chemically pure
+    '2941': 18,  # Antibiotics
+    '2942': 18,  # Other organic compounds
+
+    # Chapter 38: Miscellaneous chemical products
+    '38': 18,    # All miscellaneous chemical products
+    '3801': 18,  # Artificial graphite; preparations
+    '3802': 18,  # Activated carbon; activated natural products
+    '3803': 18,  # Tall oil
+    '3804': 18,  # Residual lyes from wood pulp
+    '3805': 18,  # Gum, wood or sulphate turpentine
+    '3806': 18,  # Rosin and resin acids
+    '3807': 18,  # Wood tar; wood tar oils
+    '3808': 18,  # Insecticides, fungicides
+    '3809': 18,  # Finishing agents, dye carriers
+    '3810': 18,  # Pickling preparations for metal surfaces
+    '3811': 18,  # Anti-knock preparations
+    '3812': 18,  # Prepared rubber accelerators
+    '3813': 18,  # Preparations for fire-extinguishers
+    '3814': 18,  # Organic composite solvents
+    '3815': 18,  # Reaction initiators, accelerators
+    '3816': 18,  # Refractory cements, mortars
+    '3817': 18,  # Mixed alkylbenzenes
+    '3818': 18,  # Chemical elements for electronics
+    '3819': 18,  # Hydraulic brake fluids
+    '3820': 18,  # Anti-freezing preparations
+    '3821': 18,  # Prepared culture media
+    '3822': 18,  # Diagnostic or laboratory reagents
+    '3823': 18,  # Industrial monocarboxylic fatty acids
+    '3824': 18,  # Prepared binders; chemical products
+    '3825': 18,  # Residual products of chemical industry
+    '3826': 18,  # Biodiesel and mixtures
+
+    # Chapter 70: Glass and glassware (Laboratory glassware)
+    '7017': 18,  # Laboratory, hygienic or pharmaceutical glassware
+    '701710': 18,  # Of fused quartz or other fused silica
+    '701720': 18,  # Of other glass having linear coefficient
+    '701790': 18,  # Other laboratory glassware
+
+    # Chapter 90: Scientific and laboratory instruments
+    '9011': 18,  # Microscopes
+    '9012': 18,  # Microscopes other than optical
+    '9015': 18,  # Surveying instruments
+    '9016': 18,  # Balances of a sensitivity
+    '9017': 18,  # Drawing, marking-out instruments
+    '9018': 12,  # Medical instruments and appliances
+    '9019': 12,  # Mechano-therapy appliances
+    '9022': 18,  # X-ray apparatus
+    '9023': 18,  # Instruments, apparatus and models
+    '9024': 18,  # Machines for testing materials
+    '9025': 18,  # Hydrometers, thermometers
+    '9026': 18,  # Instruments for measuring flow
+    '9027': 18,  # Instruments for physical/chemical analysis
+    '9028': 18,  # Gas, liquid or electricity meters
+    '9029': 18,  # Revolution counters, taximeters
+    '9030': 18,  # Oscilloscopes, spectrum analyzers
+    '9031': 18,  # Measuring or checking instruments
+    '9032': 18,  # Automatic regulating instruments
+    '9033': 18,  # Parts and accessories for machines
+}
+
+
+def _compile_trie(rates):
+    """Compile the prefix table into a digit trie; the None key of a node holds its rate"""
+    root = {}
+    for prefix, rate in rates.items():
+        node = root
+        for digit in prefix:
+            node = node.setdefault(digit, {})
+        node[None] = rate
+    return root
+
+
+# Compiled once at import so lookups never rebuild the table
+_GST_TRIE = _compile_trie(HSN_GST_RATES)
+
+# Changes whenever the table does, so cached responses are revalidated after a deploy
+GST_TABLE_VERSION = hashlib.sha1(repr(sorted(HSN_GST_RATES.items())).encode('utf-8')).hexdigest()[:16]
+
+
+def lookup_gst_percentage(hsn_code):
+    """Return the GST percentage for the longest known prefix of an HSN code, or None"""
+    node, rate = _GST_TRIE, None
+    for digit in str(hsn_code).strip():
+        node = node.get(digit)
+        if node is None:
+            break
+        rate = node.get(None, rate)
+    return rate
@@ -0,0 +1,243 @@
+import codecs
+import csv
+import json
+import re
+import shutil
+import tempfile
+
+from hsn_gst import lookup_gst_percentage
+
+IMPORT_FORMATS = ('csv', 'ndjson', 'xlsx')
+
+# Columns an imported row may set, and the ones that identify an item
+IMPORT_FIELDS = ('catalogue_id', 'description', 'pack_size', 'cas', 'hsn', 'price', 'brand', 'gst_percentage')
+IMPORT_KEY = ('catalogue_id', 'pack_size', 'brand')
+
+DEFAULT_IMPORT_BATCH_SIZE = 500
+MAX_IMPORT_BATCH_SIZE = 5000
+
+# Catalogue ids per `in` filter when looking up existing keys, to keep URLs short
+KEY_LOOKUP_CHUNK = 200
+
+# Only the first rejected rows are described in the response; the rest are counted
+MAX_REPORTED_ERRORS = 100
+
+# Other spellings of the import columns seen in supplier price lists
+COLUMN_ALIASES = {
+    'cat_no': 'catalogue_id',
+    'catalogue_no': 'catalogue_id',
+    'catalog_id': 'catalogue_id',
+    'catalog_no': 'catalogue_id',
+    'hsn_code': 'hsn',
+    'gst': 'gst_percentage',
+    'unit_rate': 'price',
+    'rate': 'price',
+    'make': 'brand',
+}
+
+_COLUMN_RE = re.compile(r'[^a-z0-9]+')
+_HSN_RE = re.compile(r'^\d{2,8}$')
+
+
+def normalize_column(name):
+    column = _COLUMN_RE.sub('_', str(name or '').strip().lower()).strip('_')
+    return COLUMN_ALIASES.get(column, column)
+
+
+def _text(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        # Spreadsheet cells holding codes come back as floats
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+
+def _number(value, field):
+    value = _text(value)
+    if value is None:
+        return None
+    try:
+        return float(value.replace('₹', '').replace(',', '').rstrip('%').strip())
+    except ValueError:
+        raise ValueError(f"{field} must be a number, got {value!r}")
+
+
+def normalize_item(row, columns):
+    """Validate one imported row and return it as an items record restricted to `columns`.
+
+    Raises ValueError describing the first problem found.
+    """
+    item = {field: _text(row.get(field)) for field in columns}
+    if not item.get('catalogue_id'):
+        raise ValueError("catalogue_id is required")
+
+    if 'price' in item:
+        item['price'] = _number(row.get('price'), 'price')
+        if item['price'] is not None and item['price'] < 0:
+            raise ValueError("price cannot be negative")
+
+    if item.get('hsn'):
+        hsn = item['hsn'].replace(' ', '').replace('.', '')
+        if not _HSN_RE.match(hsn):
+            raise ValueError(f"hsn must be 2 to 8 digits, got {item['hsn']!r}")
+        item['hsn'] = hsn
+
+    if 'gst_percentage' in item:
+        item['gst_percentage'] = _number(row.get('gst_percentage'), 'gst_percentage')
+        if item['gst_percentage'] is not None and not 0 <= item['gst_percentage'] <= 100:
+            raise ValueError("gst_percentage must be between 0 and 100")
+        if item['gst_percentage'] is None and item.get('hsn'):
+            item['gst_percentage'] = lookup_gst_percentage(item['hsn'])
+    return item
+
+
+def import_columns(header):
+    """Columns every imported record carries, so each batch can be upserted as one request"""
+    columns = [field for field in IMPORT_FIELDS if field in header or field in IMPORT_KEY]
+    if 'hsn' in header and 'gst_percentage' not in columns:
+        columns.append('gst_percentage')
+    return columns
+
+
+def iter_csv_rows(stream):
+    """Yield (row number, header, row) from a CSV byte stream, one line at a time"""
+    reader = csv.reader(codecs.iterdecode(stream, 'utf-8-sig'))
+    header = [normalize_column(name) for name in next(reader, [])]
+    for values in reader:
+        if any(value.strip() for value in values):
+            yield reader.line_num, header, dict(zip(header, values))
+
+
+def iter_ndjson_rows(stream):
+    """Yield (row number, header, row) from a newline-delimited JSON byte stream"""
+    header = None
+    for row_number, line in enumerate(codecs.iterdecode(stream, 'utf-8-sig'), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if not isinstance(record, dict):
+            # Reported as a rejected row by the caller
+            yield row_number, header or [], None
+            continue
+        row = {normalize_column(key): value for key, value in record.items()}
+        if header is None:
+            # The first record decides the columns, as the CSV header row does
+            header = list(row)
+        yield row_number, header, row
+
+
+def iter_xlsx_rows(stream):
+    """Yield (row number, header, row) from the first sheet of an XLSX workbook.
+
+    openpyxl is imported here rather than at startup, since only XLSX uploads
+    need it. The workbook is read in read-only mode so rows are streamed from
+    the file rather than loaded at once.
+    """
+    from openpyxl import load_workbook
+
+    if not stream.seekable():
+        # XLSX is a zip archive and needs random access; spill large uploads to disk
+        spooled = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        shutil.copyfileobj(stream, spooled)
+        spooled.seek(0)
+        stream = spooled
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [normalize_column(name) for name in next(rows, ())]
+        for row_number, values in enumerate(rows, 2):
+            if any(value not in (None, '') for value in values):
+                yield row_number, header, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+ROW_READERS = {
+    'csv': iter_csv_rows,
+    'ndjson': iter_ndjson_rows,
+    'xlsx': iter_xlsx_rows,
+}
+
+
+class ItemImporter:
+    """Upserts normalized item rows into the items table in batches.
+
+    Rows are keyed on IMPORT_KEY. Before each batch is written, the keys that
+    already exist are looked up so the summary can tell inserts from updates.
+    A key seen twice within a batch starts a new batch, since one upsert
+    statement cannot touch the same row twice.
+    """
+
+    def __init__(self, db, batch_size=DEFAULT_IMPORT_BATCH_SIZE, on_saved=None):
+        self._db = db
+        self._batch_size = batch_size
+        self._on_saved = on_saved
+        self._batch = {}
+        self.inserted = 0
+        self.updated = 0
+        self.rejected = 0
+        self.errors = []
+
+    @staticmethod
+    def _key(item):
+        return tuple(item.get(field) for field in IMPORT_KEY)
+
+    def reject(self, row_number, error):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'error': error})
+
+    def add(self, item):
+        key = self._key(item)
+        if key in self._batch or len(self._batch) >= self._batch_size:
+            self.flush()
+        self._batch[key] = item
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, {}
+
+        catalogue_ids = list({key[0] for key in batch})
+        updated = 0
+        for start in range(0, len(catalogue_ids), KEY_LOOKUP_CHUNK):
+            existing = self._db.table('items').select(','.join(IMPORT_KEY)).in_(
+                'catalogue_id', catalogue_ids[start:start + KEY_LOOKUP_CHUNK]).execute()
+            updated += sum(1 for row in existing.data if self._key(row) in batch)
+
+        saved = self._db.table('items').upsert(list(batch.values()), on_conflict=','.join(IMPORT_KEY)).execute()
+        self.updated += updated
+        self.inserted += len(batch) - updated
+        if self._on_saved:
+            for row in saved.data:
+                self._on_saved(row)
+
+    def run(self, rows):
+        """Import (row number, header, row) triples from a ROW_READERS reader; returns the summary"""
+        columns = None
+        for row_number, header, row in rows:
+            if row is None:
+                self.reject(row_number, "not a JSON object")
+                continue
+            if columns is None:
+                columns = import_columns(header)
+            try:
+                self.add(normalize_item(row, columns))
+            except ValueError as e:
+                self.reject(row_number, str(e))
+        self.flush()
+        return self.summary()
+
+    def summary(self):
+        return {
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'rejected': self.rejected,
+            'errors': self.errors
+        }
@@ -0,0 +1,324 @@
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+DEFAULT_RESULT_LIMIT = 20
+MAX_RESULT_LIMIT = 100
+
+# Fields a search can be restricted to with ?field=
+SEARCH_FIELDS = ('catalogue_id', 'cas', 'hsn', 'brand', 'description')
+
+# Relative weights used to rank matches from the different lookups
+SCORE_CATALOGUE_EXACT = 100
+SCORE_CAS_EXACT = 90
+SCORE_CATALOGUE_PREFIX = 80
+SCORE_CAS_PREFIX = 70
+SCORE_HSN = 60
+SCORE_BRAND = 50
+SCORE_DESCRIPTION = 20
+SCORE_DESCRIPTION_WORD = 5
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def _normalize(value):
+    return str(value).strip().lower() if value is not None else ''
+
+
+def _tokens(text):
+    return _TOKEN_RE.findall(_normalize(text))
+
+
+def _trigrams(word):
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class ItemSearchIndex:
+    """In-process search index over the items table.
+
+    Catalogue ids and CAS numbers are kept in sorted lists for prefix lookup and
+    HSN codes and brands in exact-match maps. Description words map to the items
+    that use them, and a trigram map over the (much smaller) word vocabulary
+    resolves partial words typed into the search box.
+
+    The index is built on first use from `load_rows`, kept up to date by the item
+    write routes, and rebuilt after `refresh_seconds` so that writes made by other
+    workers are eventually picked up. That refresh runs in a background thread:
+    searches keep using the current structures until the new ones are swapped in.
+    """
+
+    # Attributes holding the lookup structures, swapped as a whole by a rebuild
+    _STRUCTURES = ('_rows', '_catalogue', '_cas', '_hsn', '_brand', '_words', '_vocab', '_vocab_trigrams')
+
+    def __init__(self, load_rows, refresh_seconds=300):
+        self._load_rows = load_rows
+        self._refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        # Held for the whole of a rebuild, so only one runs at a time
+        self._build_lock = threading.Lock()
+        self._built_at = None
+        self._refreshing = False
+        # Writes made while a rebuild is loading rows, replayed onto its result;
+        # None when no rebuild is running
+        self._pending = None
+        self._reset()
+
+    def _reset(self):
+        self._rows = {}
+        # Sorted (key, item_id) pairs for prefix lookup
+        self._catalogue = []
+        self._cas = []
+        # key -> sorted item ids, so the lowest ids can be taken without sorting
+        self._hsn = defaultdict(list)
+        self._brand = defaultdict(list)
+        # description word -> item ids, and trigram -> words containing it
+        self._words = defaultdict(set)
+        self._vocab = []
+        self._vocab_trigrams = defaultdict(set)
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def ensure_built(self):
+        """Build the index if it is missing; start a background refresh if it is stale.
+
+        Only the first build makes the caller wait. Once built, a stale index
+        keeps serving searches while the refresh runs.
+        """
+        if self._built_at is None:
+            with self._build_lock:
+                if self._built_at is None:
+                    self._rebuild()
+            return
+
+        with self._lock:
+            stale = (self._refresh_seconds and not self._refreshing
+                     and time.monotonic() - self._built_at > self._refresh_seconds)
+            if not stale:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name='item-search-refresh', daemon=True).start()
+
+    def rebuild(self):
+        """Reload every item and rebuild all lookup structures from scratch"""
+        with self._build_lock:
+            self._rebuild()
+
+    def _refresh(self):
+        try:
+            with self._build_lock:
+                self._rebuild()
+        except Exception as e:
+            # Keep serving the current index; the next search after another
+            # refresh interval tries again
+            print(f"Item search index refresh failed: {e}")
+            with self._lock:
+                self._built_at = time.monotonic()
+        finally:
+            self._refreshing = False
+
+    def _rebuild(self):
+        """Build new structures without holding the lock, then swap them in"""
+        with self._lock:
+            self._pending = []
+        try:
+            fresh = ItemSearchIndex(self._load_rows, refresh_seconds=0)
+            for row in self._load_rows():
+                fresh._index(row, sort=False)
+            fresh._catalogue.sort()
+            fresh._cas.sort()
+            for ids in fresh._hsn.values():
+                ids.sort()
+            for ids in fresh._brand.values():
+                ids.sort()
+            fresh._vocab = sorted(fresh._words)
+            for word in fresh._vocab:
+                for trigram in _trigrams(word):
+                    fresh._vocab_trigrams[trigram].add(word)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            # Writes made while the rows were loading may be missing from them
+            for row, item_id in self._pending:
+                fresh._unindex(item_id)
+                if row is not None:
+                    fresh._index(row, sort=True)
+            self._pending = None
+            for name in self._STRUCTURES:
+                setattr(self, name, getattr(fresh, name))
+            self._built_at = time.monotonic()
+
+    def add(self, row):
+        """Insert or replace a single item. Ignored until the index is built."""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((dict(row), row['id']))
+            if not self.is_built:
+                return
+            self._unindex(row['id'])
+            self._index(row, sort=True)
+
+    def remove(self, item_id):
+        """Drop a single item. Ignored until the index is built."""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((None, item_id))
+            if self.is_built:
+                self._unindex(item_id)
+
+    def _index(self, row, sort):
+        item_id = row['id']
+        self._rows[item_id] = dict(row)
+        add_sorted = insort if sort else list.append
+
+        catalogue_id = _normalize(row.get('catalogue_id'))
+        if catalogue_id:
+            add_sorted(self._catalogue, (catalogue_id, item_id))
+        cas = _normalize(row.get('cas'))
+        if cas:
+            add_sorted(self._cas, (cas, item_id))
+        hsn = _normalize(row.get('hsn'))
+        if hsn:
+            add_sorted(self._hsn[hsn], item_id)
+        brand = _normalize(row.get('brand'))
+        if brand:
+            add_sorted(self._brand[brand], item_id)
+        for word in set(_tokens(row.get('description'))):
+            if sort and word not in self._words:
+                insort(self._vocab, word)
+                for trigram in _trigrams(word):
+                    self._vocab_trigrams[trigram].add(word)
+            self._words[word].add(item_id)
+
+    def _unindex(self, item_id):
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return
+
+        for keys, value in ((self._catalogue, row.get('catalogue_id')), (self._cas, row.get('cas'))):
+            self._remove_sorted(keys, (_normalize(value), item_id))
+        for mapping, value in ((self._hsn, row.get('hsn')), (self._brand, row.get('brand'))):
+            key = _normalize(value)
+            if key in mapping:
+                self._remove_sorted(mapping[key], item_id)
+                if not mapping[key]:
+                    del mapping[key]
+        for word in set(_tokens(row.get('description'))):
+            ids = self._words.get(word)
+            if ids is None:
+                continue
+            ids.discard(item_id)
+            if not ids:
+                del self._words[word]
+                self._remove_sorted(self._vocab, word)
+                for trigram in _trigrams(word):
+                    self._vocab_trigrams[trigram].discard(word)
+                    if not self._vocab_trigrams[trigram]:
+                        del self._vocab_trigrams[trigram]
+
+    @staticmethod
+    def _remove_sorted(values, value):
+        pos = bisect_left(values, value)
+        if pos < len(values) and values[pos] == value:
+            del values[pos]
+
+    @staticmethod
+    def _prefix_matches(keys, prefix, limit):
+        """Return up to `limit` (key, item_id) pairs whose key starts with `prefix`, in key order"""
+        matches = []
+        pos = bisect_left(keys, (prefix,))
+        while pos < len(keys) and len(matches) < limit and keys[pos][0].startswith(prefix):
+            matches.append(keys[pos])
+            pos += 1
+        return matches
+
+    def _matching_words(self, fragment):
+        """Return the vocabulary words that contain `fragment`"""
+        if len(fragment) < 3:
+            words = []
+            pos = bisect_left(self._vocab, fragment)
+            while pos < len(self._vocab) and self._vocab[pos].startswith(fragment):
+                words.append(self._vocab[pos])
+                pos += 1
+            return words
+
+        trigram_sets = sorted((self._vocab_trigrams.get(t, set()) for t in _trigrams(fragment)), key=len)
+        words = set.intersection(*trigram_sets)
+        # Trigram sets over-approximate substring matches, so confirm them here
+        return [word for word in words if fragment in word]
+
+    def _description_matches(self, query, limit):
+        """Return {item_id: score} for the best items whose description matches every query word"""
+        fragments = _tokens(query)
+        if not fragments:
+            return {}
+
+        matched, whole = [], []
+        for fragment in fragments:
+            ids = set().union(*(self._words[word] for word in self._matching_words(fragment)))
+            if not ids:
+                return {}
+            matched.append(ids)
+            whole.append(self._words.get(fragment, set()))
+        candidates = set.intersection(*sorted(matched, key=len))
+
+        # When enough items contain every query word as a whole word they outrank
+        # everything else, so the remaining candidates need not be scored
+        best = candidates.intersection(*whole)
+        if len(best) >= limit:
+            score = SCORE_DESCRIPTION + SCORE_DESCRIPTION_WORD * len(fragments)
+            return {item_id: score for item_id in heapq.nsmallest(limit, best)}
+
+        # Only candidates with at least one whole-word hit need individual scores;
+        # the rest share the base score and are ranked by id alone
+        with_words = candidates.intersection(set().union(*whole))
+        scores = {item_id: SCORE_DESCRIPTION for item_id in heapq.nsmallest(limit, candidates - with_words)}
+        for item_id in with_words:
+            whole_words = sum(1 for ids in whole if item_id in ids)
+            scores[item_id] = SCORE_DESCRIPTION + SCORE_DESCRIPTION_WORD * whole_words
+        return scores
+
+    def search(self, query, limit=DEFAULT_RESULT_LIMIT, field=None):
+        """Return up to `limit` item rows matching `query`, best matches first"""
+        query = _normalize(query)
+        if not query:
+            return []
+
+        self.ensure_built()
+        with self._lock:
+            scores = {}
+
+            def bump(item_id, score):
+                if score > scores.get(item_id, 0):
+                    scores[item_id] = score
+
+            # Each source contributes at most `limit` matches, best first, so the
+            # cost of a lookup does not grow with the number of matching rows
+            if field in (None, 'catalogue_id'):
+                for key, item_id in self._prefix_matches(self._catalogue, query, limit):
+                    bump(item_id, SCORE_CATALOGUE_EXACT if key == query else SCORE_CATALOGUE_PREFIX)
+            if field in (None, 'cas'):
+                for key, item_id in self._prefix_matches(self._cas, query, limit):
+                    bump(item_id, SCORE_CAS_EXACT if key == query else SCORE_CAS_PREFIX)
+            if field in (None, 'hsn'):
+                for item_id in self._hsn.get(query, [])[:limit]:
+                    bump(item_id, SCORE_HSN)
+            if field in (None, 'brand'):
+                for item_id in self._brand.get(query, [])[:limit]:
+                    bump(item_id, SCORE_BRAND)
+            if field in (None, 'description'):
+                for item_id, score in self._description_matches(query, limit).items():
+                    bump(item_id, score)
+
+            best = heapq.nsmallest(limit, scores.items(), key=lambda entry: (-entry[1], entry[0]))
+            return [dict(self._rows[item_id]) for item_id, _ in best]
@@ -0,0 +1,213 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# How often a wait on a job held by another process re-reads its state file, in seconds
+STATE_POLL_SECONDS = 0.2
+
+_JOB_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class JobQueue:
+    """Runs functions on a bounded worker pool and keeps their outcome by job id.
+
+    With `processes=True` work runs in a ProcessPoolExecutor, so CPU-bound
+    rendering scales with cores rather than with web workers; the function and
+    its arguments must then be picklable. The pool is created on first use.
+    Finished jobs are forgotten `keep_seconds` after they complete.
+
+    With a `state_dir`, each job's status is also written there as JSON when it
+    is queued and when it finishes, so any process sharing the directory (e.g.
+    the other workers of a multi-worker web server) can report on it.
+    """
+
+    def __init__(self, max_workers=None, processes=True, keep_seconds=3600, state_dir=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.processes = processes
+        self.keep_seconds = keep_seconds
+        self.state_dir = state_dir
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        self._executor = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            executor_class = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+            self._executor = executor_class(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, fn, *args, on_done=None, **meta):
+        """Queue `fn(*args)` and return the new job id.
+
+        `on_done(result)` runs in this process once `fn` returns; whatever it
+        returns becomes the job's result. `meta` is echoed back in the status.
+        """
+        job = {
+            'id': uuid.uuid4().hex,
+            'created_at': time.time(),
+            'finished_at': None,
+            'result': None,
+            'error': None,
+            'meta': meta,
+            'finished': threading.Event()
+        }
+        with self._lock:
+            self._prune()
+            job['future'] = self._pool().submit(fn, *args)
+            self._jobs[job['id']] = job
+        self._save(job)
+        job['future'].add_done_callback(lambda future: self._finish(job, future, on_done))
+        return job['id']
+
+    def _finish(self, job, future, on_done):
+        try:
+            result = future.result()
+            job['result'] = on_done(result) if on_done else result
+        except Exception as e:
+            print(f"Job {job['id']} failed:", str(e))  # Debug log
+            job['error'] = str(e)
+        job['finished_at'] = time.time()
+        try:
+            self._save(job)
+        except Exception as e:
+            print(f"Could not save the state of job {job['id']}:", str(e))  # Debug log
+        job['finished'].set()
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_seconds
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished_at'] is not None and job['finished_at'] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if self.state_dir:
+            # Also clears out jobs whose process went away before they finished
+            for name in os.listdir(self.state_dir):
+                path = os.path.join(self.state_dir, name)
+                try:
+                    if name.endswith('.json') and os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass  # already removed by another process
+
+    def _state_path(self, job_id):
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+    def _save(self, job):
+        if not self.state_dir:
+            return
+        path = self._state_path(job['id'])
+        # Written whole and renamed into place, so readers never see a partial file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self._describe(job), f)
+        os.replace(temp_path, path)
+
+    def _load(self, job_id, wait):
+        """Read the status another process saved for `job_id`, waiting up to `wait` seconds for it to finish"""
+        if not self.state_dir or not _JOB_ID_RE.match(job_id):
+            return None
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                with open(self._state_path(job_id)) as f:
+                    status = json.load(f)
+            except FileNotFoundError:
+                return None
+            except ValueError:
+                status = None  # replaced while being read; read it again
+            if status is not None and (status['status'] in (JOB_DONE, JOB_FAILED) or time.monotonic() >= deadline):
+                return status
+            time.sleep(min(STATE_POLL_SECONDS, max(deadline - time.monotonic(), 0)))
+
+    def status(self, job_id, wait=0):
+        """Return a job's status, waiting up to `wait` seconds for it to finish.
+
+        Jobs submitted by other processes are read from `state_dir`. Returns
+        None for unknown (or expired) job ids.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return self._load(job_id, wait)
+        if wait > 0:
+            job['finished'].wait(wait)
+        return self._describe(job)
+
+    def _describe(self, job):
+        if job['finished'].is_set() or job['finished_at'] is not None:
+            state = JOB_FAILED if job['error'] is not None else JOB_DONE
+        else:
+            state = JOB_RUNNING if job['future'].running() else JOB_QUEUED
+        status = dict(job['meta'])
+        status.update({
+            'id': job['id'],
+            'status': state,
+            'created_at': job['created_at'],
+            'finished_at': job['finished_at']
+        })
+        if state == JOB_DONE:
+            status['result'] = job['result']
+        elif state == JOB_FAILED:
+            status['error'] = job['error']
+        return status
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_DONE: 0, JOB_FAILED: 0}
+        for job in jobs:
+            if job['finished'].is_set():
+                counts[JOB_FAILED if job['error'] is not None else JOB_DONE] += 1
+            else:
+                counts[JOB_RUNNING if job['future'].running() else JOB_QUEUED] += 1
+        counts['workers'] = self.max_workers
+        counts['pool'] = 'process' if self.processes else 'thread'
+        return counts
+
+    def imap_unordered(self, fn, tasks, window=None):
+        """Run `fn(*args)` for each `(tag, args)` in `tasks` on the pool.
+
+        Yields `(tag, result, error)` as calls finish, in completion order. At most
+        `window` calls (default: twice the worker count) are in flight, so neither
+        pending arguments nor finished results pile up in memory. Calls still
+        pending when the consumer stops iterating are cancelled.
+        """
+        window = window or 2 * self.max_workers
+        with self._lock:
+            executor = self._pool()
+        tasks = iter(tasks)
+        pending = {}
+
+        def fill():
+            while len(pending) < window:
+                task = next(tasks, None)
+                if task is None:
+                    return
+                tag, args = task
+                pending[executor.submit(fn, *args)] = tag
+
+        try:
+            fill()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tag = pending.pop(future)
+                    try:
+                        yield tag, future.result(), None
+                    except Exception as e:
+                        yield tag, None, e
+                fill()
+        finally:
+            for future in pending:
+                future.cancel()
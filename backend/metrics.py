@@ -0,0 +1,241 @@
+import bisect
+import threading
+import time
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Upper bounds (bytes) of the document size histogram buckets
+SIZE_BUCKETS = (16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024, 16 * 1024 * 1024)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f'{self.name}{_labels(self.label_names, key)} {_number(value)}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Gauge whose values are read from `collect()` when the metrics are rendered"""
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labels=(), collect=None):
+        super().__init__(name, help_text, labels)
+        self._collect = collect
+
+    def render(self):
+        if self._collect is not None:
+            values = {self._key(labels): value for labels, value in self._collect()}
+            with self._lock:
+                self._values = values
+        return super().render()
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_value(self, key, state):
+        counts, total, count = state
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += bucket_count
+            le = 'le="+Inf"' if bound == '+Inf' else f'le="{_number(bound)}"'
+            lines.append(f'{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}')
+        lines.append(f'{self.name}_sum{_labels(self.label_names, key)} {_number(total)}')
+        lines.append(f'{self.name}_count{_labels(self.label_names, key)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """In-process metrics, rendered in the Prometheus text exposition format.
+
+    Each worker process keeps its own registry, so scrape every worker (or run
+    one) to see the whole picture.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=(), collect=None):
+        return self._register(Gauge(name, help_text, labels, collect))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    'http_requests_total', 'HTTP requests handled, by route, method and status', ('route', 'method', 'status'))
+http_errors = registry.counter(
+    'http_request_errors_total', 'HTTP requests that ended with a 5xx status', ('route', 'method'))
+http_latency = registry.histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by route and method', ('route', 'method'))
+
+db_queries = registry.counter(
+    'db_queries_total', 'Database calls, by table and operation', ('table', 'operation'))
+db_errors = registry.counter(
+    'db_query_errors_total', 'Database calls that raised, by table and operation', ('table', 'operation'))
+db_latency = registry.histogram(
+    'db_query_duration_seconds', 'Database call latency, by table and operation', ('table', 'operation'))
+
+render_latency = registry.histogram(
+    'document_render_duration_seconds', 'Time to render and save a quotation document', ('mode',))
+render_size = registry.histogram(
+    'document_render_bytes', 'Size of rendered quotation documents', ('mode',), buckets=SIZE_BUCKETS)
+
+fanout_latency = registry.histogram(
+    'fanout_duration_seconds', 'Wall time of a group of concurrent calls', ('group',))
+fanout_call_latency = registry.histogram(
+    'fanout_call_duration_seconds', 'Time of each call in a group of concurrent calls', ('group', 'call'))
+fanout_saved = registry.counter(
+    'fanout_saved_seconds_total', 'Sum of call times minus wall time, for groups of concurrent calls', ('group',))
+
+
+def observe_render(mode, seconds, size):
+    render_latency.observe(seconds, mode=mode)
+    render_size.observe(size, mode=mode)
+
+
+def observe_fanout(group, seconds, call_seconds):
+    fanout_latency.observe(seconds, group=group)
+    for call, call_time in call_seconds.items():
+        fanout_call_latency.observe(call_time, group=group, call=call)
+    fanout_saved.inc(max(sum(call_seconds.values()) - seconds, 0), group=group)
+
+
+def _observe_query(table, operation, seconds, failed):
+    db_queries.inc(table=table, operation=operation)
+    db_latency.observe(seconds, table=table, operation=operation)
+    if failed:
+        db_errors.inc(table=table, operation=operation)
+
+
+# Query builder methods that decide what kind of statement a query runs
+_OPERATIONS = ('select', 'insert', 'upsert', 'update', 'delete')
+
+
+class _TimedQuery:
+    """Wraps a query builder so its execute() call is counted and timed"""
+
+    def __init__(self, query, table, operation='select'):
+        object.__setattr__(self, '_query', query)
+        object.__setattr__(self, '_table', table)
+        object.__setattr__(self, '_operation', operation)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._query, name)
+        if name == 'execute':
+            return self._execute
+        if hasattr(attribute, 'execute'):
+            # A builder property such as not_
+            return _TimedQuery(attribute, self._table, self._operation)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            if hasattr(result, 'execute'):
+                operation = name if name in _OPERATIONS else self._operation
+                return _TimedQuery(result, self._table, operation)
+            return result
+        return call
+
+    def __setattr__(self, name, value):
+        setattr(self._query, name, value)
+
+    def _execute(self):
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = self._query.execute()
+            failed = False
+            return result
+        finally:
+            _observe_query(self._table, self._operation, time.perf_counter() - start, failed)
+
+
+class InstrumentedRepository:
+    """Repository wrapper that records every database call in the metrics registry"""
+
+    def __init__(self, repository):
+        self._repository = repository
+        self.name = repository.name
+
+    def table(self, name):
+        return _TimedQuery(self._repository.table(name), name)
+
+    def rpc(self, name, params=None):
+        return _TimedQuery(self._repository.rpc(name, params), name, 'rpc')
+
+    def __getattr__(self, name):
+        return getattr(self._repository, name)
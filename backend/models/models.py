@@ -1,6 +1,10 @@
 from datetime import datetime
 
 class Company:
+    # Fields of a serialized company, selectable with ?fields=
+    FIELDS = ('id', 'name', 'email', 'address', 'ref_format', 'last_quote_number',
+              'seal_image_url', 'pan_number', 'gst_number', 'phone')
+
     def __init__(self, id, name, email, address, ref_format, last_quote_number, seal_image_url=None, pan_number=None, gst_number=None, phone=None):
         self.id = id
         self.name = name
@@ -16,12 +20,12 @@ class Company:
     @staticmethod
     def from_db(db_company):
         return {
-            'id': db_company['id'],
-            'name': db_company['name'],
-            'email': db_company['email'],
-            'address': db_company['address'],
-            'ref_format': db_company['ref_format'],
-            'last_quote_number': db_company['last_quote_number'],
+            'id': db_company.get('id'),
+            'name': db_company.get('name'),
+            'email': db_company.get('email'),
+            'address': db_company.get('address'),
+            'ref_format': db_company.get('ref_format'),
+            'last_quote_number': db_company.get('last_quote_number'),
             'seal_image_url': db_company.get('seal_image_url'),
             'pan_number': db_company.get('pan_number'),
             'gst_number': db_company.get('gst_number'),
@@ -41,6 +45,8 @@ class Employee:
         }
 
 class Client:
+    FIELDS = ('id', 'name', 'business_name', 'email', 'mobile', 'address', 'created_at', 'updated_at')
+
     @staticmethod
     def from_db(data):
         return {
@@ -70,6 +76,9 @@ class Quotation:
         }
 
 class Item:
+    FIELDS = ('id', 'catalogue_id', 'description', 'pack_size', 'cas', 'hsn', 'price', 'brand',
+              'gst_percentage', 'created_at', 'updated_at')
+
     @staticmethod
     def from_db(data):
         return {
@@ -0,0 +1,178 @@
+import base64
+import json
+
+# Page size used when a request does not give a limit
+DEFAULT_PAGE_SIZE = 100
+# Upper bound so a single request can never pull the whole table
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(values):
+    """Encode the keyset values of the last row on a page into an opaque cursor"""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, dict):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_page_args(args, default_limit=DEFAULT_PAGE_SIZE):
+    """Read `limit` and `after` from the query string.
+
+    Lists are always read one page at a time: without `limit` the first
+    `default_limit` rows are returned, so no request reads a whole table.
+    """
+    limit = args.get('limit')
+    after = args.get('after')
+
+    if limit is None:
+        limit = default_limit
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        if limit < 1:
+            raise ValueError("limit must be a positive integer")
+        limit = min(limit, MAX_PAGE_SIZE)
+
+    after_id = None
+    if after:
+        try:
+            after_id = int(decode_cursor(after)['id'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+
+    return {'limit': limit, 'after': after_id}
+
+
+def fetch_page(query, limit, after=None, key='id'):
+    """Run `query` as one keyset page ordered by `key`.
+
+    One extra row is requested so we know whether another page exists without
+    a separate count query. Returns (rows, next_cursor).
+    """
+    if after is not None:
+        query = query.gt(key, after)
+    rows = query.order(key).limit(limit + 1).execute().data
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({key: rows[-1][key]})
+    return rows, next_cursor
+
+
+def parse_sort(value, allowed, default):
+    """Parse a `sort` argument: a column name, prefixed with '-' for descending order.
+
+    Returns (column, desc). Raises ValueError for columns not in `allowed`.
+    """
+    value = value or default
+    desc = value.startswith('-')
+    column = value[1:] if desc else value
+    if column not in allowed:
+        raise ValueError(f"sort must be one of: {', '.join(allowed)}, optionally prefixed with '-'")
+    return column, desc
+
+
+def parse_sorted_page_args(args, column, key='id'):
+    """Read `limit` and `after` for fetch_sorted_page.
+
+    `after` is decoded into (sort value, key value).
+    """
+    page = parse_page_args(args)
+    page['after'] = None
+    if args.get('after'):
+        # A cursor from a differently sorted list does not carry `column`
+        values = decode_cursor(args['after'])
+        try:
+            page['after'] = (values[column], int(values[key]))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+    return page
+
+
+def _sorted_segments(column, desc, after, key):
+    """The AND-only queries that together read the rows after `after`, in sort order.
+
+    The query builders have no OR filter, so "past (value, key)" is split into:
+    rows tied on `value` with a later key, rows past `value`, and rows with no
+    value at all, which Postgres (and the SQLite backend) sort last ascending
+    and first descending.
+    """
+    def past(query, name, value):
+        return query.lt(name, value) if desc else query.gt(name, value)
+
+    def by_key(query):
+        return query.order(key, desc=desc)
+
+    def by_column(query):
+        return query.order(column, desc=desc).order(key, desc=desc)
+
+    if after is None:
+        return [by_column]
+    value, last_key = after
+    if column == key:
+        return [lambda query: by_key(past(query, key, last_key))]
+    if value is None:
+        tied = lambda query: by_key(past(query.is_(column, 'null'), key, last_key))
+        if desc:
+            return [tied, lambda query: by_column(query.not_.is_(column, 'null'))]
+        return [tied]
+    segments = [
+        lambda query: by_key(past(query.eq(column, value), key, last_key)),
+        lambda query: by_column(past(query, column, value))
+    ]
+    if not desc:
+        segments.append(lambda query: by_key(query.is_(column, 'null')))
+    return segments
+
+
+def fetch_sorted_page(make_query, limit, column, desc=False, after=None, key='id'):
+    """Read one keyset page of `make_query()` ordered by `column` and then `key`.
+
+    The cursor carries both the sort value and the key of the last row, so rows
+    sharing a sort value are neither skipped nor repeated between pages. A first
+    page is one query; a later one takes one to three, each reading only as many
+    rows as the page still needs. Returns (rows, next_cursor).
+    """
+    rows = []
+    for segment in _sorted_segments(column, desc, after, key):
+        rows.extend(segment(make_query()).limit(limit + 1 - len(rows)).execute().data)
+        if len(rows) > limit:
+            break
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({column: rows[-1][column], key: rows[-1][key]})
+    return rows, next_cursor
+
+
+def iter_pages(make_query, page_size=MAX_PAGE_SIZE, key='id'):
+    """Yield every row of a query, reading it one keyset page at a time.
+
+    `make_query` must return a fresh query builder on each call, since builders
+    are mutated by the filters added here.
+    """
+    after = None
+    while True:
+        query = make_query()
+        if after is not None:
+            query = query.gt(key, after)
+        rows = query.order(key).limit(page_size).execute().data
+        for row in rows:
+            yield row
+        if len(rows) < page_size:
+            return
+        after = rows[-1][key]
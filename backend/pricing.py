@@ -0,0 +1,189 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+# Quotations with at least this many lines are priced with NumPy when it is installed
+NUMPY_MIN_LINES = 200
+# Largest number of lines accepted by one POST /api/quotations/price
+MAX_PRICE_LINES = 20000
+
+# Line inputs and the number of decimal places the NumPy path keeps for each,
+# so that every amount it handles is an exact int64
+INPUT_PLACES = {'unit_rate': 4, 'discount_percentage': 4, 'quantity': 3, 'gst_percentage': 4}
+
+PAISE = Decimal('0.01')
+HUNDRED = Decimal(100)
+
+# Largest magnitude an int64 product may reach before the Decimal path is used
+_INT64_LIMIT = 2 ** 62
+# Inputs at or above this magnitude are priced in Decimal, where floats still
+# resolve every step of 10^-4
+_FLOAT_INPUT_LIMIT = 10 ** 10
+
+_numpy = None
+
+
+def _load_numpy():
+    """Return the numpy module, or None if it is not installed"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def _decimal(value, field, line):
+    if value is None or value == '':
+        return Decimal(0)
+    if isinstance(value, bool):
+        raise ValueError(f"Line {line}: {field} must be a number")
+    try:
+        number = Decimal(repr(value) if isinstance(value, float) else str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"Line {line}: {field} must be a number")
+    if not number.is_finite():
+        raise ValueError(f"Line {line}: {field} must be a finite number")
+    return number
+
+
+def _number(value):
+    """A Decimal as a JSON number: an int when it is whole, otherwise a float"""
+    return int(value) if value == value.to_integral_value() else float(value)
+
+
+def _round(value):
+    return value.quantize(PAISE, rounding=ROUND_HALF_UP)
+
+
+def _result(items, inputs, amounts, rates):
+    """Assemble price_quotation's result.
+
+    `inputs` holds each line's parsed inputs (None when they were already
+    numbers), `amounts` each line's (discount_rate, expanded_rate, gst_value)
+    in rupees and `rates` the (rate, taxable, gst, lines) GST summary.
+    """
+    priced_items = []
+    for item, parsed, (discount_rate, expanded_rate, gst_value) in zip(items, inputs, amounts):
+        priced = dict(item)
+        if parsed is not None:
+            priced.update(parsed)
+        priced['discount_rate'] = discount_rate
+        priced['expanded_rate'] = expanded_rate
+        priced['gst_value'] = gst_value
+        priced['total'] = round(expanded_rate + gst_value, 2)
+        priced_items.append(priced)
+
+    sub_total = round(sum(taxable for _, taxable, _, _ in rates), 2)
+    total_gst = round(sum(gst for _, _, gst, _ in rates), 2)
+    return {
+        'items': priced_items,
+        'subTotal': sub_total,
+        'totalGST': total_gst,
+        'grandTotal': round(sub_total + total_gst, 2),
+        'gstSummary': [
+            {
+                'gst_percentage': rate,
+                'taxable_value': taxable,
+                'gst_value': gst,
+                'total': round(taxable + gst, 2),
+                'lines': count
+            }
+            for rate, taxable, gst, count in rates
+        ]
+    }
+
+
+def _price_decimal(items):
+    """Price lines one at a time in Decimal"""
+    inputs, amounts, summary = [], [], {}
+    for line, item in enumerate(items, start=1):
+        if not isinstance(item, dict):
+            raise ValueError(f"Line {line}: must be an object")
+        values = {field: _decimal(item.get(field), field, line) for field in INPUT_PLACES}
+        discount_rate = _round(values['unit_rate'] * (HUNDRED - values['discount_percentage']) / HUNDRED)
+        expanded_rate = _round(discount_rate * values['quantity'])
+        gst_value = _round(expanded_rate * values['gst_percentage'] / HUNDRED)
+
+        # Numbers are passed through as sent; strings and blanks become numbers
+        inputs.append({field: _number(value) for field, value in values.items()
+                       if type(item.get(field)) not in (int, float)} or None)
+        amounts.append((float(discount_rate), float(expanded_rate), float(gst_value)))
+        rate = summary.setdefault(values['gst_percentage'].normalize(), [Decimal(0), Decimal(0), 0])
+        rate[0] += expanded_rate
+        rate[1] += gst_value
+        rate[2] += 1
+
+    rates = [(_number(rate), float(taxable), float(gst), count)
+             for rate, (taxable, gst, count) in sorted(summary.items())]
+    return _result(items, inputs, amounts, rates)
+
+
+def _price_numpy(numpy, items):
+    """Price all lines at once in int64 fixed point; None when the lines need the Decimal path.
+
+    Only lines whose inputs are all JSON numbers with at most INPUT_PLACES
+    decimals qualify. Every step is then an integer product followed by a
+    division rounded half away from zero, exactly as in the Decimal path.
+    """
+    columns = {}
+    for field, places in INPUT_PLACES.items():
+        values = [item.get(field) if isinstance(item, dict) else None for item in items]
+        if any(type(value) not in (int, float) for value in values):
+            return None
+        floats = numpy.array(values, dtype=numpy.float64)
+        if not numpy.all(numpy.abs(floats) < _FLOAT_INPUT_LIMIT):
+            return None
+        scaled = numpy.rint(floats * 10 ** places)
+        # The shortest repr of each float must have at most `places` decimals
+        if not numpy.array_equal(scaled / 10 ** places, floats):
+            return None
+        columns[field] = scaled.astype(numpy.int64)
+
+    def fits(a, b):
+        return int(numpy.abs(a).max()) * int(numpy.abs(b).max()) < _INT64_LIMIT
+
+    def divide(numerator, denominator):
+        return numpy.sign(numerator) * ((numpy.abs(numerator) + denominator // 2) // denominator)
+
+    # unit_rate / 10^4 rupees * (100 - discount_percentage / 10^4) / 100, in paise
+    remaining = 10 ** 6 - columns['discount_percentage']
+    if not fits(columns['unit_rate'], remaining):
+        return None
+    discount_rate = divide(columns['unit_rate'] * remaining, 10 ** 8)
+    if not fits(discount_rate, columns['quantity']):
+        return None
+    expanded_rate = divide(discount_rate * columns['quantity'], 10 ** 3)
+    if not fits(expanded_rate, columns['gst_percentage']):
+        return None
+    gst_value = divide(expanded_rate * columns['gst_percentage'], 10 ** 6)
+
+    rates = []
+    for rate in numpy.unique(columns['gst_percentage']).tolist():
+        mask = columns['gst_percentage'] == rate
+        rates.append((_number(Decimal(rate).scaleb(-4)), int(expanded_rate[mask].sum()) / 100,
+                      int(gst_value[mask].sum()) / 100, int(mask.sum())))
+    # Paise below 2^53 divide by 100 to the same float as the Decimal amount
+    amounts = zip((discount_rate / 100).tolist(), (expanded_rate / 100).tolist(), (gst_value / 100).tolist())
+    return _result(items, [None] * len(items), amounts, rates)
+
+
+def price_quotation(items):
+    """Price every line of a quotation and sum it up, with exact decimal rounding.
+
+    Each line's discounted rate, expanded (discounted rate x quantity) amount
+    and GST are rounded half up to the paisa, each computed from the rounded
+    amount before it, so the printed columns always add up. Returns the priced
+    lines (copies of `items` with discount_rate, expanded_rate, gst_value and
+    total filled in), subTotal, totalGST, grandTotal and a gstSummary of the
+    taxable value and GST for each rate. Large quotations are priced in one
+    vectorized pass when NumPy is installed. Raises ValueError for lines with
+    values that are not numbers.
+    """
+    if len(items) >= NUMPY_MIN_LINES:
+        numpy = _load_numpy()
+        if numpy is not None:
+            result = _price_numpy(numpy, items)
+            if result is not None:
+                return result
+    return _price_decimal(items)
@@ -0,0 +1,569 @@
+import hashlib
+import os
+import re
+import time
+from copy import deepcopy
+from io import BytesIO
+
+from docx import Document
+from docx.shared import Inches, Pt, RGBColor
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+
+from cache import TTLCache
+from document_utils import image_cache, is_remote
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Background colour of every header cell in the quotation
+HEADER_FILL = '1B4F8C'
+
+ITEM_HEADERS = ['S.No', 'Cat No.', 'Description', 'Pack Size', 'HSN Code', 'Qty', 'Unit Rate', 'Discounted Price', 'Expanded Price', 'GST %', 'GST', 'Total Value', 'Lead Time', 'Brand']
+
+# Optimized column widths (inches) for the items table, in ITEM_HEADERS order
+ITEM_COLUMN_WIDTHS = [0.3, 0.8, 2.0, 0.5, 0.8, 0.4, 0.8, 0.8, 0.8, 0.4, 0.6, 0.8, 0.6, 0.6]
+
+# Company fields that end up in the static part of the document. A change to
+# any of them produces a different skeleton key, so stale skeletons are never used.
+SKELETON_COMPANY_FIELDS = ('id', 'name', 'address', 'email', 'phone', 'pan_number', 'gst_number',
+                           'account_number', 'ifsc_code', 'branch_code', 'micro_code', 'seal_image_url')
+
+# Rendered company skeletons (saved .docx bytes), keyed by company fingerprint
+skeleton_cache = TTLCache('document_skeletons', maxsize=int(os.getenv('SKELETON_CACHE_SIZE', '64')), ttl=3600)
+
+# Bumped on every invalidation. Render worker processes keep their own
+# skeleton_cache and are handed this value with each job (see render_docx).
+skeleton_generation = 0
+
+_SLOT_TEXT = '{{{{slot:{}}}}}'
+_SLOT_RE = re.compile(r'^\{\{slot:(\w+)\}\}$')
+
+
+def _shade(cell):
+    shading_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="{HEADER_FILL}"/>')
+    cell._tc.get_or_add_tcPr().append(shading_elm)
+
+
+def _borders(val, size=None):
+    size_attr = f' w:sz="{size}"' if size else ''
+    return parse_xml(f'<w:tcBorders {nsdecls("w")}>' +
+                     f'<w:top w:val="{val}"{size_attr}/>' +
+                     f'<w:left w:val="{val}"{size_attr}/>' +
+                     f'<w:bottom w:val="{val}"{size_attr}/>' +
+                     f'<w:right w:val="{val}"{size_attr}/>' +
+                     '</w:tcBorders>')
+
+
+def _remove_borders(cell):
+    cell._tc.get_or_add_tcPr().append(_borders('nil'))
+
+
+def _add_spacing(doc):
+    doc.add_paragraph().paragraph_format.space_after = Pt(2)
+
+
+def _add_section_header(doc, text):
+    """Add a one-cell table with a blue, borderless header cell and return the cell"""
+    table = doc.add_table(rows=1, cols=1)
+    table.style = 'Table Grid'
+
+    header_cell = table.rows[0].cells[0]
+    header_run = header_cell.paragraphs[0].add_run(text)
+    header_run.font.bold = True
+    header_run.font.color.rgb = RGBColor(255, 255, 255)
+    header_run.font.size = Pt(9)  # Changed from 11 to 9
+
+    # Set blue background for header cell
+    _shade(header_cell)
+    return header_cell
+
+
+def _add_slot(doc, name):
+    """Add a placeholder paragraph that render_quotation replaces with per-request content"""
+    doc.add_paragraph(_SLOT_TEXT.format(name))
+
+
+def company_fingerprint(company):
+    """Key identifying everything about a company that the skeleton depends on"""
+    values = repr(tuple(company.get(field) for field in SKELETON_COMPANY_FIELDS))
+    return (company.get('id'), hashlib.sha1(values.encode('utf-8')).hexdigest())
+
+
+def invalidate_company_skeletons():
+    """Forget cached skeletons, e.g. after a company record or seal changed"""
+    global skeleton_generation
+    skeleton_generation += 1
+    skeleton_cache.invalidate()
+
+
+def build_skeleton(company):
+    """Render the parts of a quotation that depend only on the company.
+
+    Per-request content (ref/date, client, items, totals, terms and the creating
+    employee) is left as slot paragraphs. Returns the saved .docx bytes.
+    """
+    doc = Document()
+
+    # Set very narrow margins
+    sections = doc.sections
+    for section in sections:
+        section.top_margin = Inches(0.2)    # Reduced from 0.3 to 0.2
+        section.bottom_margin = Inches(0.2)  # Reduced from 0.3 to 0.2
+        section.left_margin = Inches(0.3)    # Keep left margin
+        section.right_margin = Inches(0.3)   # Keep right margin
+
+    # Set default font size for the document
+    style = doc.styles['Normal']
+    style.font.size = Pt(8)  # Reduced from 9 to 8
+    style.paragraph_format.space_after = Pt(0)  # Remove space after paragraphs
+    style.paragraph_format.space_before = Pt(0)  # Remove space before paragraphs
+
+    # Add header table
+    header_table = doc.add_table(rows=4, cols=1)
+    header_table.style = 'Table Grid'
+
+    # Company Name Cell
+    company_cell = header_table.rows[0].cells[0]
+    company_name = company_cell.paragraphs[0]
+    company_name.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    company_name.add_run(company.get('name', '').upper())
+    company_name.runs[0].font.size = Pt(16)
+    company_name.runs[0].font.bold = True
+    company_name.runs[0].font.color.rgb = RGBColor(255, 255, 255)
+
+    # Address Cell
+    address_cell = header_table.rows[1].cells[0]
+    address = address_cell.paragraphs[0]
+    address.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    address.add_run(company.get('address', '').upper())
+    address.runs[0].font.size = Pt(11)
+    address.runs[0].font.color.rgb = RGBColor(255, 255, 255)
+
+    # Email and Phone Cell
+    email_cell = header_table.rows[2].cells[0]
+    email = email_cell.paragraphs[0]
+    email.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    email.add_run(f"Email:- {company.get('email', '')} {company.get('phone', '')}")
+    email.runs[0].font.size = Pt(11)
+    email.runs[0].font.color.rgb = RGBColor(255, 255, 255)
+
+    # Tax Info Cell
+    tax_cell = header_table.rows[3].cells[0]
+    tax_info = tax_cell.paragraphs[0]
+    tax_info.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    pan = company.get('pan_number', '')  # Changed from 'pan' to 'pan_number'
+    gst = company.get('gst_number', '')  # Changed from 'gst' to 'gst_number'
+    tax_text = f"PAN NO.: {pan} | GST NO.: {gst}"
+    tax_info.add_run(tax_text)
+    tax_info.runs[0].font.size = Pt(11)
+    tax_info.runs[0].font.color.rgb = RGBColor(255, 255, 255)
+
+    # Set background color for all cells and remove borders
+    for row in header_table.rows:
+        for cell in row.cells:
+            _shade(cell)
+            _remove_borders(cell)
+
+    # Add QUOTATION/PERFORMA INVOICE title
+    title = doc.add_paragraph()
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    title.add_run('QUOTATION/PERFORMA INVOICE')  # Removed extra newlines
+    title.runs[0].font.bold = True
+    title.runs[0].font.size = Pt(12)
+    title.paragraph_format.space_after = Pt(4)  # Small space after title
+
+    _add_slot(doc, 'ref_date')
+
+    # Add spacing after header - reduced
+    _add_spacing(doc)
+
+    _add_slot(doc, 'client')
+
+    # Add spacing after client details - reduced
+    _add_spacing(doc)
+
+    # Add greeting text with reduced spacing
+    greeting = doc.add_paragraph()
+    greeting.paragraph_format.space_after = Pt(2)
+    greeting.add_run("Dear Sir/Madam,\n")
+    greeting.add_run("Thank you for your enquiry. We are pleased to quote our best prices as under:")
+
+    # Add spacing after greeting - reduced
+    _add_spacing(doc)
+
+    # Add items table
+    doc.add_paragraph().add_run('Items:').bold = True
+    _add_slot(doc, 'items')
+
+    # Add spacing before totals
+    _add_spacing(doc)
+
+    _add_slot(doc, 'totals')
+
+    # Add spacing after totals table
+    _add_spacing(doc)
+
+    # Add Terms & Conditions section with blue header. Its header cell keeps the
+    # table grid borders, as quotations have always been rendered.
+    _add_section_header(doc, 'Terms & Conditions')
+
+    _add_slot(doc, 'terms')
+
+    # Add spacing before Bank Details section
+    _add_spacing(doc)
+
+    # Add Bank Details section
+    bank_header_cell = _add_section_header(doc, 'Bank Details')
+    _remove_borders(bank_header_cell)
+
+    # Add bank details with reduced spacing
+    bank_details = doc.add_paragraph()
+    bank_details.style = doc.styles['Normal']
+    bank_details.paragraph_format.space_before = Pt(2)
+    bank_details.paragraph_format.space_after = Pt(2)
+    bank_details_text = bank_details.add_run(f"HDFC BANK LTD. Account No: {company.get('account_number', '')} ; NEFT/RTGS IFCS : {company.get('ifsc_code', '')} Branch code:{company.get('branch_code', '')} ; Micro code : {company.get('micro_code', '')} ;Account type: Current account")
+    bank_details_text.font.size = Pt(8)
+
+    # Add spacing before Quotation Created By section
+    _add_spacing(doc)
+
+    # Add Quotation Created By section
+    created_by_header_cell = _add_section_header(doc, 'Quotation Created By')
+    _remove_borders(created_by_header_cell)
+
+    _add_slot(doc, 'employee')
+
+    # Add spacing before signature
+    doc.add_paragraph('\n')
+
+    # Add signature section with reduced spacing
+    signature_section = doc.add_paragraph()
+    signature_section.paragraph_format.space_before = Pt(4)
+    signature_section.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+
+    # Add "For COMPANY NAME" text
+    company_name = company.get('name', '').upper()
+    for_company = signature_section.add_run(f"For {company_name}")
+    for_company.font.size = Pt(11)
+    signature_section.add_run('\n\n')  # Add some space
+
+    # Add company seal image if available
+    company_seal = company.get('seal_image_url', '')  # Changed from 'seal_image' to 'seal_image_url'
+    if company_seal:
+        try:
+            # Get the full path to the image, unless it is hosted elsewhere
+            seal_path = company_seal if is_remote(company_seal) else os.path.join(BASE_DIR, company_seal.lstrip('/'))
+
+            seal_image = image_cache.get(seal_path)
+            if seal_image is not None:
+                # Add the image to the document with specific size
+                signature_section.add_run().add_picture(BytesIO(seal_image), width=Inches(1.1), height=Inches(1.1))  # Slightly larger than 80px
+                signature_section.add_run('\n')  # Add space after seal
+            else:
+                print(f"Seal image not found for company {company.get('id')}")
+        except Exception as e:
+            print(f"Error adding the seal of company {company.get('id')}:", str(e))
+
+    # Add Authorized Signatory text
+    signature_section.add_run('\n')  # Add extra space before text
+    auth_signatory = signature_section.add_run("Authorized Signatory")
+    auth_signatory.font.size = Pt(11)
+
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def get_skeleton(company):
+    """Return the cached skeleton for a company, building it on first use"""
+    return skeleton_cache.get_or_load(company_fingerprint(company), lambda: build_skeleton(company))
+
+
+def _add_ref_date(doc, data):
+    # Add reference number and date
+    ref_date = doc.add_table(rows=1, cols=2)
+    ref_date.autofit = True
+    ref_cell = ref_date.cell(0, 0)
+    ref_cell.text = f"Ref No: {data.get('refNumber', '')}"
+    date_cell = ref_date.cell(0, 1)
+    date_cell.text = f"Date: {data.get('quotationDate', '')}"
+    date_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    return ref_date._tbl
+
+
+def _add_client(doc, data):
+    # Add client details
+    to_table = doc.add_table(rows=2, cols=1)
+    to_table.style = 'Table Grid'
+
+    # To Cell with blue background
+    to_cell = to_table.rows[0].cells[0]
+    to_paragraph = to_cell.paragraphs[0]
+    to_paragraph.add_run('To')
+    to_paragraph.runs[0].font.bold = True
+    to_paragraph.runs[0].font.size = Pt(9)
+    to_paragraph.runs[0].font.color.rgb = RGBColor(255, 255, 255)
+
+    # Set blue background for To cell
+    _shade(to_cell)
+
+    # Client details cell
+    client = data.get('client', {})
+    details_cell = to_table.rows[1].cells[0]
+    details_paragraph = details_cell.paragraphs[0]
+    details_paragraph.add_run(f"{client.get('business_name', '')}\n")
+    details_paragraph.add_run(f"{client.get('address', '')}\n")
+    details_paragraph.add_run(f"Kind Attn: {client.get('name', '')} | Tel: {client.get('phone', '')} | Email: {client.get('email', '')}")
+
+    # Remove borders from both cells
+    for row in to_table.rows:
+        for cell in row.cells:
+            _remove_borders(cell)
+    return to_table._tbl
+
+
+def _set_run_text(r, text):
+    """Give a run element the same content `cell.text = text` would produce"""
+    if not text:
+        return
+    if '\t' in text or '\n' in text or '\r' in text:
+        # Tabs and line breaks become <w:tab/> and <w:br/>; leave those to python-docx
+        r.text = text
+        return
+    t = r.makeelement(qn('w:t'), {})
+    t.text = text
+    if len(text.strip()) < len(text):
+        t.set(qn('xml:space'), 'preserve')
+    r.append(t)
+
+
+def _item_row_values(idx, item):
+    """Cell texts for one line of the items table, in ITEM_HEADERS order.
+
+    The amounts come from pricing.price_quotation, which the app runs on every
+    quotation before it is rendered.
+    """
+    return (
+        str(idx),  # S.No
+        item.get('catalogue_id', ''),  # Cat No.
+        item.get('description', ''),  # Description
+        item.get('pack_size', ''),  # Pack Size
+        item.get('hsn', ''),  # HSN Code
+        str(item.get('quantity', '')),  # Qty
+        f"₹{item.get('unit_rate', 0):.2f}",  # Unit Rate
+        f"₹{item.get('discount_rate', 0):.2f}",  # Discounted Price
+        f"₹{item.get('expanded_rate', 0):.2f}",  # Expanded Price
+        f"{item.get('gst_percentage', 0)}%",  # GST %
+        f"₹{item.get('gst_value', 0):.2f}",  # GST
+        f"₹{item.get('total', 0):.2f}",  # Total Value
+        item.get('lead_time', ''),  # Lead Time
+        item.get('brand', ''),  # Changed from 'make' to 'brand'
+    )
+
+
+def _add_items(doc, data):
+    table = doc.add_table(rows=1, cols=14)
+    table.style = 'Table Grid'
+
+    # Set header row with blue background and white text
+    header_cells = table.rows[0].cells
+
+    # Apply blue background and white text to headers
+    for i, text in enumerate(ITEM_HEADERS):
+        cell = header_cells[i]
+        # Clear any existing content
+        cell.text = ""
+        paragraph = cell.paragraphs[0]
+        run = paragraph.add_run(text)
+        run.font.bold = True
+        run.font.size = Pt(8)
+        run.font.color.rgb = RGBColor(255, 255, 255)
+        paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+        # Set blue background for header cell
+        _shade(cell)
+        cell.width = Inches(ITEM_COLUMN_WIDTHS[i])
+
+    # Build one empty, centred row with the optimized column widths through
+    # python-docx, then stamp out a copy of its XML for every item. Walking
+    # python-docx cell objects per row and column is what made long
+    # quotations slow; copying the prebuilt <w:tr> keeps the output identical.
+    template = table.add_row()
+    for cell, width in zip(template.cells, ITEM_COLUMN_WIDTHS):
+        cell.text = ""
+        cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+        cell.width = Inches(width)
+    tbl, template_tr = table._tbl, template._tr
+    tbl.remove(template_tr)
+
+    # Add item rows
+    for idx, item in enumerate(data.get('items', []), 1):
+        tr = deepcopy(template_tr)
+        for r, value in zip(tr.iter(qn('w:r')), _item_row_values(idx, item)):
+            _set_run_text(r, value if value is None or isinstance(value, str) else str(value))
+        tbl.append(tr)
+    return tbl
+
+
+def _add_totals(doc, data):
+    # Create totals table with specific width and styling
+    totals_table = doc.add_table(rows=3, cols=2)
+    totals_table.style = 'Table Grid'
+    totals_table.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+
+    # Set the width of the totals table columns
+    for cell in totals_table.columns[0].cells:  # Labels
+        cell.width = Inches(1.2)
+    for cell in totals_table.columns[1].cells:  # Values
+        cell.width = Inches(1.0)
+
+    # Add Sub Total row
+    sub_total_cell = totals_table.cell(0, 0)
+    sub_total_cell.text = ""  # Clear existing content
+    sub_total_label = sub_total_cell.paragraphs[0].add_run("Sub Total:")
+    sub_total_label.font.size = Pt(8)
+    sub_total_label.font.bold = True
+
+    sub_total_value_cell = totals_table.cell(0, 1)
+    sub_total_value_cell.text = ""  # Clear existing content
+    sub_total_value = sub_total_value_cell.paragraphs[0].add_run(f"₹{data.get('subTotal', 0):.2f}")
+    sub_total_value.font.size = Pt(8)
+
+    # Add Total GST row
+    gst_cell = totals_table.cell(1, 0)
+    gst_cell.text = ""  # Clear existing content
+    gst_label = gst_cell.paragraphs[0].add_run("Total GST:")
+    gst_label.font.size = Pt(8)
+    gst_label.font.bold = True
+
+    gst_value_cell = totals_table.cell(1, 1)
+    gst_value_cell.text = ""  # Clear existing content
+    gst_value = gst_value_cell.paragraphs[0].add_run(f"₹{data.get('totalGST', 0):.2f}")
+    gst_value.font.size = Pt(8)
+
+    # Add Grand Total row with blue background
+    grand_total_cell = totals_table.cell(2, 0)
+    grand_total_cell.text = ""  # Clear existing content
+    grand_total_label = grand_total_cell.paragraphs[0].add_run("Grand Total:")
+    grand_total_label.font.size = Pt(8)
+    grand_total_label.font.bold = True
+    grand_total_label.font.color.rgb = RGBColor(255, 255, 255)
+
+    grand_total_value_cell = totals_table.cell(2, 1)
+    grand_total_value_cell.text = ""  # Clear existing content
+    grand_total_value = grand_total_value_cell.paragraphs[0].add_run(f"₹{data.get('grandTotal', 0):.2f}")
+    grand_total_value.font.size = Pt(8)
+    grand_total_value.font.bold = True
+    grand_total_value.font.color.rgb = RGBColor(255, 255, 255)
+
+    # Set blue background for grand total row
+    for cell in [grand_total_cell, grand_total_value_cell]:
+        _shade(cell)
+
+    # Right-align all cells in the totals table and set thin borders
+    for row in totals_table.rows:
+        for cell in row.cells:
+            cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+            # Set thin borders
+            cell._tc.get_or_add_tcPr().append(_borders('single', size=2))
+    return totals_table._tbl
+
+
+def _add_terms(doc, data):
+    # Add terms list with reduced spacing
+    terms_list = doc.add_paragraph()
+    terms_list.style = doc.styles['Normal']
+    terms_list.paragraph_format.space_before = Pt(2)
+    terms_list.paragraph_format.space_after = Pt(2)
+
+    # Add payment terms
+    payment_term = terms_list.add_run(f"1) {data.get('paymentTerms', '')}\n")
+    payment_term.font.size = Pt(8)
+
+    # Add fixed terms with numbering
+    for idx, term in enumerate(data.get('fixedTerms', []), 2):
+        term_text = terms_list.add_run(f"{idx}) {term}\n")
+        term_text.font.size = Pt(8)
+    return terms_list._p
+
+
+def _add_employee(doc, data):
+    # Add employee details with reduced spacing
+    employee_details = doc.add_paragraph()
+    employee_details.style = doc.styles['Normal']
+    employee_details.paragraph_format.space_before = Pt(2)
+    employee_details.paragraph_format.space_after = Pt(2)
+    employee_name = data.get('employee', {}).get('name', '')
+    employee_phone = data.get('employee', {}).get('phone_number', '')  # Changed from mobile to phone_number
+    employee_email = data.get('employee', {}).get('email', '')
+
+    employee_details.add_run(f"{employee_name}\n").font.size = Pt(8)
+    employee_details.add_run(f"Mobile: {employee_phone}\n").font.size = Pt(8)  # Using the new employee_phone variable
+    email_run = employee_details.add_run(f"Email: ")
+    email_run.font.size = Pt(8)
+    email_link = employee_details.add_run(employee_email)
+    email_link.font.size = Pt(8)
+    email_link.font.color.rgb = RGBColor(0, 0, 255)  # Blue color for email
+    return employee_details._p
+
+
+# Builders for each slot left in the skeleton
+_SLOT_BUILDERS = {
+    'ref_date': _add_ref_date,
+    'client': _add_client,
+    'items': _add_items,
+    'totals': _add_totals,
+    'terms': _add_terms,
+    'employee': _add_employee,
+}
+
+
+def render_quotation(data):
+    """Render a quotation document from the generate-quotation payload.
+
+    The company's static parts come from a cached skeleton; only the per-request
+    slots are built here. Returns a python-docx Document.
+    """
+    doc = Document(BytesIO(get_skeleton(data.get('company', {}))))
+
+    slots = {}
+    for paragraph in doc.paragraphs:
+        match = _SLOT_RE.match(paragraph.text)
+        if match:
+            slots[match.group(1)] = paragraph._p
+
+    for name, build in _SLOT_BUILDERS.items():
+        # Builders append to the end of the body; move the result into its slot
+        element = build(doc, data)
+        marker = slots[name]
+        marker.addprevious(element)
+        marker.getparent().remove(marker)
+    return doc
+
+
+def render_docx(data, generation=None):
+    """Render a quotation and return the saved .docx bytes.
+
+    This is the entry point for render workers. `generation` is the caller's
+    skeleton_generation; a worker that has seen an older one drops its cached
+    skeletons before rendering.
+    """
+    global skeleton_generation
+    if generation is not None and generation != skeleton_generation:
+        skeleton_cache.invalidate()
+        skeleton_generation = generation
+    buffer = BytesIO()
+    render_quotation(data).save(buffer)
+    return buffer.getvalue()
+
+
+def render_docx_timed(data, generation=None):
+    """render_docx that also returns how long it took, as (content, seconds).
+
+    Render workers run in other processes, so they report their timing back
+    with the document for the web process to record.
+    """
+    start = time.perf_counter()
+    content = render_docx(data, generation)
+    return content, time.perf_counter() - start
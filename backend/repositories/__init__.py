@@ -0,0 +1,22 @@
+import os
+
+from repositories.base import Repository, RepositoryError, QueryResult, TABLES
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'local.db')
+
+
+def create_repository(backend=None):
+    """Create the data-access backend named by `backend` or DATA_BACKEND.
+
+    'supabase' (the default) talks to the Supabase project in SUPABASE_URL /
+    SUPABASE_KEY; 'sqlite' uses a local database file at SQLITE_PATH, so the
+    app can run, be benchmarked and be load-tested offline.
+    """
+    backend = backend or os.getenv('DATA_BACKEND', 'supabase')
+    if backend == 'supabase':
+        from repositories.supabase_repository import SupabaseRepository
+        return SupabaseRepository(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_KEY'))
+    if backend == 'sqlite':
+        from repositories.sqlite_repository import SQLiteRepository
+        return SQLiteRepository(os.getenv('SQLITE_PATH', DEFAULT_SQLITE_PATH))
+    raise ValueError(f"Unknown DATA_BACKEND {backend!r}, expected supabase or sqlite")
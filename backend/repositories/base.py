@@ -0,0 +1,47 @@
+# Tables the application reads and writes
+TABLES = ('companies', 'clients', 'employees', 'items', 'quotations')
+
+
+class RepositoryError(Exception):
+    """A query the backend could not run, e.g. one naming an unknown column"""
+
+
+class QueryResult:
+    """Result of an executed query, shaped like supabase-py's APIResponse"""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class Repository:
+    """Access to the application's tables, independent of where they live.
+
+    `table(name)` returns a query builder with the part of the supabase-py
+    (postgrest) interface the routes use:
+
+    - select(columns, count=None), including embedded many-to-one relations
+      such as 'id, companies(name)', and count='exact'
+    - insert, upsert(rows, on_conflict=...), update and delete
+    - eq, neq, gt, gte, lt, lte, in_, like, ilike and is_ filters, and not_
+      to negate the next one
+    - order(column, desc=False), where each further call adds a sort key,
+      limit(n) and range(start, end)
+    - execute(), returning an object with .data and .count
+
+    `rpc(name, params)` calls the database functions defined in migrations/
+    (allocate_quote_numbers, quotation_totals) and is executed the same way.
+    """
+
+    name = None
+
+    def table(self, name):
+        raise NotImplementedError
+
+    def rpc(self, name, params=None):
+        raise NotImplementedError
+
+    @staticmethod
+    def check_table(name):
+        if name not in TABLES:
+            raise RepositoryError(f"Unknown table {name!r}")
@@ -0,0 +1,429 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+
+from repositories.base import Repository, RepositoryError, QueryResult
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sqlite_schema.sql')
+
+# Columns stored as JSON text; PostgREST returns them as JSON values
+JSON_COLUMNS = {'quotations': ('items',)}
+
+_EMBED_RE = re.compile(r'^(\w+)\s*\((.*)\)$')
+
+
+def _split_select(columns):
+    """Split a PostgREST select string on the commas outside parentheses"""
+    parts, depth, current = [], 0, ''
+    for char in columns:
+        if char == ',' and depth == 0:
+            parts.append(current.strip())
+            current = ''
+            continue
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        current += char
+    parts.append(current.strip())
+    return [part for part in parts if part]
+
+
+def _like_to_glob(pattern):
+    """Translate a case-sensitive LIKE pattern to GLOB; SQLite's LIKE ignores case"""
+    glob, escaped = '', False
+    for char in pattern:
+        if escaped:
+            glob += f'[{char}]' if char in '*?[' else char
+            escaped = False
+        elif char == '\\':
+            # Backslash escapes the next character, as in Postgres
+            escaped = True
+        elif char == '%':
+            glob += '*'
+        elif char == '_':
+            glob += '?'
+        elif char in '*?[':
+            glob += f'[{char}]'
+        else:
+            glob += char
+    return glob
+
+
+class _Call:
+    """Deferred database call, so rpc() is executed like a query builder"""
+
+    def __init__(self, run):
+        self._run = run
+
+    def execute(self):
+        return self._run()
+
+
+class SQLiteRepository(Repository):
+    """Repository backed by a local SQLite database with the schema in sqlite_schema.sql.
+
+    One connection is shared by all threads and serialized by a lock, which is
+    plenty for running, benchmarking and load-testing the app offline.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('pragma foreign_keys = on')
+        if path != ':memory:':
+            self._conn.execute('pragma journal_mode = wal')
+        with open(SCHEMA_PATH) as f:
+            self._conn.executescript(f.read())
+
+        self.columns = {}
+        # table -> {referenced table: foreign key column}, for embedded selects
+        self.relations = {}
+        tables = [row['name'] for row in self._conn.execute("select name from sqlite_master where type = 'table'")]
+        for table in tables:
+            self.columns[table] = [row['name'] for row in self._conn.execute(f'pragma table_info("{table}")')]
+            self.relations[table] = {row['table']: row['from']
+                                     for row in self._conn.execute(f'pragma foreign_key_list("{table}")')}
+
+        self._functions = {
+            'allocate_quote_numbers': self._allocate_quote_numbers,
+            'quotation_totals': self._quotation_totals
+        }
+
+    def table(self, name):
+        self.check_table(name)
+        return SQLiteQuery(self, name)
+
+    def rpc(self, name, params=None):
+        function = self._functions.get(name)
+        if function is None:
+            raise RepositoryError(f"Unknown function {name!r}")
+        return _Call(lambda: QueryResult(function(**(params or {}))))
+
+    def column(self, table, name):
+        """Return `name` quoted for SQL, after checking the table has it"""
+        if name not in self.columns[table]:
+            raise RepositoryError(f"column {table}.{name} does not exist")
+        return f'"{name}"'
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def transaction(self):
+        return _Transaction(self)
+
+    def decode(self, table, row):
+        for column in JSON_COLUMNS.get(table, ()):
+            if isinstance(row.get(column), str):
+                row[column] = json.loads(row[column])
+        return row
+
+    def encode(self, table, row):
+        encoded = {}
+        for column, value in row.items():
+            self.column(table, column)
+            if column in JSON_COLUMNS.get(table, ()) and value is not None:
+                value = json.dumps(value)
+            encoded[column] = value
+        return encoded
+
+    # Database functions from migrations/
+
+    def _allocate_quote_numbers(self, p_company_id, p_count=1):
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                'update companies set last_quote_number = coalesce(last_quote_number, 0) + ? where id = ?',
+                (p_count, p_company_id))
+            if cursor.rowcount == 0:
+                return None
+            return conn.execute('select last_quote_number from companies where id = ?',
+                                (p_company_id,)).fetchone()[0]
+
+    def _quotation_totals(self):
+        row = self.query('select count(*) as quotation_count, coalesce(sum(total), 0) as total_value from quotations')[0]
+        return [row]
+
+
+class _Transaction:
+    """Holds the repository lock for a BEGIN IMMEDIATE ... COMMIT block"""
+
+    def __init__(self, repository):
+        self._repository = repository
+
+    def __enter__(self):
+        self._repository._lock.acquire()
+        self._repository._conn.execute('begin immediate')
+        return self._repository._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._repository._conn.execute('rollback' if exc_type else 'commit')
+        finally:
+            self._repository._lock.release()
+
+
+class SQLiteQuery:
+    """Query builder with the supabase-py interface described on Repository"""
+
+    def __init__(self, repository, table):
+        self._repo = repository
+        self._table = table
+        self._action = 'select'
+        self._select = '*'
+        self._count = None
+        self._payload = None
+        self._on_conflict = ''
+        self._ignore_duplicates = False
+        self._where = []
+        self._params = []
+        self._negate_next = False
+        self._order = []
+        self._limit = None
+        self._offset = None
+
+    # Actions
+
+    def select(self, columns='*', count=None):
+        self._select = columns
+        self._count = count
+        return self
+
+    def insert(self, json, **kwargs):
+        self._action, self._payload = 'insert', json
+        return self
+
+    def upsert(self, json, on_conflict='', ignore_duplicates=False, **kwargs):
+        self._action, self._payload = 'upsert', json
+        self._on_conflict = on_conflict
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, json, **kwargs):
+        self._action, self._payload = 'update', json
+        return self
+
+    def delete(self, **kwargs):
+        self._action = 'delete'
+        return self
+
+    # Filters
+
+    def _add_where(self, clause, params=()):
+        if self._negate_next:
+            self._negate_next = False
+            clause = f'not ({clause})'
+        self._where.append(clause)
+        self._params.extend(params)
+        return self
+
+    def _filter(self, column, operator, value):
+        return self._add_where(f'{self._repo.column(self._table, column)} {operator} ?', [value])
+
+    @property
+    def not_(self):
+        """Negate the next filter, as in query.not_.is_('date', 'null')"""
+        self._negate_next = True
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, '=', value)
+
+    def neq(self, column, value):
+        return self._filter(column, '!=', value)
+
+    def gt(self, column, value):
+        return self._filter(column, '>', value)
+
+    def gte(self, column, value):
+        return self._filter(column, '>=', value)
+
+    def lt(self, column, value):
+        return self._filter(column, '<', value)
+
+    def lte(self, column, value):
+        return self._filter(column, '<=', value)
+
+    def like(self, column, pattern):
+        return self._filter(column, 'glob', _like_to_glob(pattern))
+
+    def ilike(self, column, pattern):
+        return self._add_where(f"{self._repo.column(self._table, column)} like ? escape '\\'", [pattern])
+
+    def is_(self, column, value):
+        values = {'null': 'null', 'true': '1', 'false': '0'}
+        if str(value).lower() not in values:
+            raise RepositoryError(f"is_ expects null, true or false, not {value!r}")
+        return self._add_where(f'{self._repo.column(self._table, column)} is {values[str(value).lower()]}')
+
+    def in_(self, column, values):
+        values = list(values)
+        if not values:
+            return self._add_where('0')
+        placeholders = ', '.join('?' * len(values))
+        return self._add_where(f'{self._repo.column(self._table, column)} in ({placeholders})', values)
+
+    # Modifiers
+
+    def order(self, column, desc=False, nullsfirst=False, **kwargs):
+        # Postgres sorts nulls last ascending and first descending
+        quoted = self._repo.column(self._table, column)
+        nulls_first = nullsfirst or desc
+        self._order.append(f'{quoted} is null {"desc" if nulls_first else "asc"}, {quoted} {"desc" if desc else "asc"}')
+        return self
+
+    def limit(self, size, **kwargs):
+        self._limit = size
+        return self
+
+    def range(self, start, end):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    # Execution
+
+    def _where_sql(self):
+        return f' where {" and ".join(self._where)}' if self._where else ''
+
+    def execute(self):
+        if self._action == 'select':
+            return self._run_select()
+        if self._action == 'insert':
+            return QueryResult(self._run_insert(self._rows()))
+        if self._action == 'upsert':
+            return QueryResult(self._run_upsert(self._rows()))
+        if self._action == 'update':
+            return QueryResult(self._run_update())
+        return QueryResult(self._run_delete())
+
+    def _rows(self):
+        return self._payload if isinstance(self._payload, list) else [self._payload]
+
+    def _parse_select(self):
+        columns, embeds = [], []
+        for part in _split_select(self._select):
+            embed = _EMBED_RE.match(part)
+            if embed:
+                relation, relation_columns = embed.groups()
+                if relation not in self._repo.relations[self._table]:
+                    raise RepositoryError(f"no relationship between {self._table} and {relation}")
+                embeds.append((relation, relation_columns))
+            elif part == '*':
+                columns.extend(self._repo.columns[self._table])
+            else:
+                self._repo.column(self._table, part)
+                columns.append(part)
+        return list(dict.fromkeys(columns)), embeds
+
+    def _run_select(self):
+        columns, embeds = self._parse_select()
+        foreign_keys = [self._repo.relations[self._table][relation] for relation, _ in embeds]
+        fetched = list(dict.fromkeys(columns + foreign_keys))
+
+        selected = ', '.join(f'"{column}"' for column in fetched)
+        sql = f'select {selected} from "{self._table}"{self._where_sql()}'
+        params = list(self._params)
+        if self._order:
+            sql += f' order by {", ".join(self._order)}'
+        if self._limit is not None or self._offset is not None:
+            sql += ' limit ? offset ?'
+            params += [-1 if self._limit is None else self._limit, self._offset or 0]
+        rows = [self._repo.decode(self._table, row) for row in self._repo.query(sql, params)]
+
+        for relation, relation_columns in embeds:
+            self._embed(rows, relation, relation_columns)
+        for row in rows:
+            for column in fetched:
+                if column not in columns:
+                    del row[column]
+
+        count = None
+        if self._count:
+            count = self._repo.query(f'select count(*) as count from "{self._table}"{self._where_sql()}',
+                                     self._params)[0]['count']
+        return QueryResult(rows, count)
+
+    def _embed(self, rows, relation, relation_columns):
+        foreign_key = self._repo.relations[self._table][relation]
+        ids = list({row[foreign_key] for row in rows if row[foreign_key] is not None})
+        related = {}
+        if ids:
+            query = SQLiteQuery(self._repo, relation).select(f'id, {relation_columns}').in_('id', ids)
+            related = {row['id']: row for row in query.execute().data}
+        wanted = _split_select(relation_columns)
+        for row in rows:
+            match = related.get(row[foreign_key])
+            if match is not None and 'id' not in wanted and '*' not in wanted:
+                match = {key: value for key, value in match.items() if key != 'id'}
+            row[relation] = match
+
+    def _fetch_by_ids(self, ids):
+        if not ids:
+            return []
+        return SQLiteQuery(self._repo, self._table).in_('id', ids).order('id').execute().data
+
+    def _matching_ids(self, conn):
+        return [row[0] for row in conn.execute(f'select id from "{self._table}"{self._where_sql()}', self._params)]
+
+    def _insert_row(self, conn, row):
+        row = self._repo.encode(self._table, row)
+        if not row:
+            return conn.execute(f'insert into "{self._table}" default values').lastrowid
+        columns = ', '.join(f'"{column}"' for column in row)
+        placeholders = ', '.join('?' * len(row))
+        return conn.execute(f'insert into "{self._table}" ({columns}) values ({placeholders})',
+                            list(row.values())).lastrowid
+
+    def _update_ids(self, conn, ids, values):
+        values = self._repo.encode(self._table, values)
+        if not ids or not values:
+            return
+        assignments = ', '.join(f'"{column}" = ?' for column in values)
+        placeholders = ', '.join('?' * len(ids))
+        conn.execute(f'update "{self._table}" set {assignments} where id in ({placeholders})',
+                     list(values.values()) + list(ids))
+
+    def _run_insert(self, rows):
+        with self._repo.transaction() as conn:
+            ids = [self._insert_row(conn, row) for row in rows]
+        return self._fetch_by_ids(ids)
+
+    def _run_upsert(self, rows):
+        keys = [key.strip() for key in self._on_conflict.split(',') if key.strip()] or ['id']
+        for key in keys:
+            self._repo.column(self._table, key)
+        # IS treats NULL as equal to NULL only, like the NULLS NOT DISTINCT
+        # unique keys (e.g. items_catalogue_pack_brand_nulls_key)
+        match_sql = ' and '.join(f'"{key}" is ?' for key in keys)
+
+        ids = []
+        with self._repo.transaction() as conn:
+            for row in rows:
+                existing = conn.execute(f'select id from "{self._table}" where {match_sql}',
+                                        [row.get(key) for key in keys]).fetchone()
+                if existing is None:
+                    ids.append(self._insert_row(conn, row))
+                    continue
+                if not self._ignore_duplicates:
+                    self._update_ids(conn, [existing[0]], row)
+                ids.append(existing[0])
+        return self._fetch_by_ids(ids)
+
+    def _run_update(self):
+        with self._repo.transaction() as conn:
+            ids = self._matching_ids(conn)
+            self._update_ids(conn, ids, self._payload)
+        return self._fetch_by_ids(ids)
+
+    def _run_delete(self):
+        with self._repo.transaction() as conn:
+            ids = self._matching_ids(conn)
+            deleted = self._fetch_by_ids(ids)
+            if ids:
+                placeholders = ', '.join('?' * len(ids))
+                conn.execute(f'delete from "{self._table}" where id in ({placeholders})', ids)
+        return deleted
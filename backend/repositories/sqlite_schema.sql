@@ -0,0 +1,118 @@
+-- SQLite version of the Supabase schema, for running the app offline.
+-- Keep in step with migrations/: identity columns become integer primary keys,
+-- numeric becomes real, timestamps are ISO 8601 text in UTC, JSON columns are
+-- stored as text, and the update_updated_at_column() triggers become
+-- per-table triggers.
+
+create table if not exists companies (
+    id integer primary key autoincrement,
+    name text,
+    email text,
+    address text,
+    phone text,
+    ref_format text,
+    last_quote_number integer default 0,
+    seal_image_url text,
+    pan_number text,
+    gst_number text,
+    bank_name text,
+    account_number text,
+    account_type text,
+    ifsc_code text,
+    branch_code text,
+    micro_code text,
+    created_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    updated_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+-- company_id was dropped in clients_add_business_name.sql
+create table if not exists clients (
+    id integer primary key autoincrement,
+    name text,
+    business_name text not null,
+    email text,
+    mobile text,
+    address text,
+    created_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    updated_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+create table if not exists employees (
+    id integer primary key autoincrement,
+    name text,
+    phone_number text,
+    email text,
+    created_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    updated_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+-- create_items_table.sql, update_items_add_gst.sql and add_items_import_key.sql
+create table if not exists items (
+    id integer primary key autoincrement,
+    catalogue_id text,
+    description text,
+    pack_size text,
+    cas text,
+    hsn text,
+    price real,
+    brand text,
+    gst_percentage real,
+    created_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    updated_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+-- SQLite has no NULLS NOT DISTINCT, so missing values are indexed as a blob,
+-- which equals no text value: NULL matches NULL but not '', as in Postgres
+drop index if exists items_catalogue_pack_brand_key;
+create unique index if not exists items_catalogue_pack_brand_nulls_key
+    on items (ifnull(catalogue_id, x'00'), ifnull(pack_size, x'00'), ifnull(brand, x'00'));
+
+create table if not exists quotations (
+    id integer primary key autoincrement,
+    company_id integer references companies (id),
+    client_id integer references clients (id),
+    employee_id integer references employees (id),
+    ref_number text,
+    date text,
+    items text,
+    total real,
+    created_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    updated_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+-- add_quotations_list_indexes.sql
+create index if not exists quotations_date_id_idx on quotations (date, id);
+create index if not exists quotations_company_date_id_idx on quotations (company_id, date, id);
+create index if not exists quotations_client_date_id_idx on quotations (client_id, date, id);
+create index if not exists quotations_employee_id_idx on quotations (employee_id);
+create index if not exists quotations_ref_number_idx on quotations (ref_number);
+
+-- List ETags read each table's newest updated_at
+create index if not exists companies_updated_at_idx on companies (updated_at);
+create index if not exists clients_updated_at_idx on clients (updated_at);
+create index if not exists employees_updated_at_idx on employees (updated_at);
+create index if not exists items_updated_at_idx on items (updated_at);
+
+create trigger if not exists update_companies_updated_at after update on companies
+for each row when new.updated_at is old.updated_at
+begin
+    update companies set updated_at = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') where id = new.id;
+end;
+
+create trigger if not exists update_clients_updated_at after update on clients
+for each row when new.updated_at is old.updated_at
+begin
+    update clients set updated_at = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') where id = new.id;
+end;
+
+create trigger if not exists update_employees_updated_at after update on employees
+for each row when new.updated_at is old.updated_at
+begin
+    update employees set updated_at = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') where id = new.id;
+end;
+
+create trigger if not exists update_items_updated_at after update on items
+for each row when new.updated_at is old.updated_at
+begin
+    update items set updated_at = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') where id = new.id;
+end;
@@ -0,0 +1,74 @@
+import threading
+
+from repositories.base import Repository
+
+
+class SupabaseQuery:
+    """postgrest-py query builder whose repeated order() calls add sort keys.
+
+    postgrest-py 0.11 sends each order() as a separate `order` parameter, and
+    PostgREST honours only one of them. Later calls are folded into the first
+    parameter instead (order=date.desc,id.desc).
+    """
+
+    def __init__(self, builder):
+        self._builder = builder
+
+    def order(self, column, desc=False, nullsfirst=False, **kwargs):
+        previous = self._builder.params.get_list('order')
+        self._builder = self._builder.order(column, desc=desc, nullsfirst=nullsfirst, **kwargs)
+        if previous and not kwargs.get('foreign_table'):
+            orders = self._builder.params.get_list('order')
+            self._builder.params = self._builder.params.set('order', ','.join(orders))
+        return self
+
+    def __getattr__(self, name):
+        attribute = getattr(self._builder, name)
+        if hasattr(attribute, 'execute'):
+            # e.g. not_, which negates the next filter
+            self._builder = attribute
+            return self
+        if name == 'execute' or not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            if hasattr(result, 'execute'):
+                self._builder = result
+                return self
+            return result
+        return call
+
+
+class SupabaseRepository(Repository):
+    """Repository backed by a Supabase project, queried through PostgREST.
+
+    The client is created on first use rather than here, so constructing the
+    repository (and importing the app) never touches the network.
+    """
+
+    name = 'supabase'
+
+    def __init__(self, url, key):
+        if not url or not key:
+            raise ValueError("Supabase URL or Key not found in environment variables")
+        self.url = url
+        self.key = key
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from supabase import create_client
+                    self._client = create_client(self.url, self.key)
+        return self._client
+
+    def table(self, name):
+        self.check_table(name)
+        return SupabaseQuery(self.client.table(name))
+
+    def rpc(self, name, params=None):
+        return self.client.rpc(name, params or {})
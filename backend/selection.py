@@ -0,0 +1,47 @@
+# Largest number of ids accepted by one ?ids= multi-get, to keep request URLs short
+MAX_IDS_PER_REQUEST = 200
+
+
+def parse_fields(args, allowed):
+    """Read `?fields=a,b,c` from the query string.
+
+    Returns None when the request did not ask for specific fields, otherwise the
+    requested columns in order. `id` is always included, since keyset paging and
+    the frontend both key rows on it. Raises ValueError for unknown fields.
+    """
+    fields = args.get('fields')
+    if fields is None:
+        return None
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Expected any of: {', '.join(allowed)}")
+    return list(dict.fromkeys(['id'] + requested))
+
+
+def parse_ids(args):
+    """Read `?ids=1,2,3` from the query string; returns None when it is absent"""
+    ids = args.get('ids')
+    if ids is None:
+        return None
+    try:
+        ids = list(dict.fromkeys(int(value) for value in ids.split(',') if value.strip()))
+    except ValueError:
+        raise ValueError("ids must be a comma-separated list of integers")
+    if not ids:
+        raise ValueError("ids must not be empty")
+    if len(ids) > MAX_IDS_PER_REQUEST:
+        raise ValueError(f"At most {MAX_IDS_PER_REQUEST} ids can be requested at once")
+    return ids
+
+
+def select_columns(fields):
+    """The select() argument for a list query: only the requested columns, if any"""
+    return '*' if fields is None else ','.join(fields)
+
+
+def project(row, fields):
+    """Drop everything but the requested fields from a serialized row"""
+    if fields is None:
+        return row
+    return {field: row.get(field) for field in fields}
@@ -0,0 +1,36 @@
+import zipfile
+
+
+class _ChunkWriter:
+    """Write-only, non-seekable file object whose output is collected in chunks"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries, compression=zipfile.ZIP_STORED):
+    """Yield a ZIP archive of `(name, content)` entries piece by piece.
+
+    Each entry is written out as soon as it arrives, so the archive never has to
+    be held in memory or on disk. .docx files are already compressed, hence
+    ZIP_STORED by default.
+    """
+    writer = _ChunkWriter()
+    with zipfile.ZipFile(writer, 'w', compression) as archive:
+        for name, content in entries:
+            archive.writestr(name, content)
+            yield writer.drain()
+    # Central directory
+    yield writer.drain()
@@ -45,6 +45,13 @@ export const fetchQuotations = (filters) => {
     const params = new URLSearchParams();
     if (filters?.companyId) params.append('company_id', filters.companyId);
     if (filters?.clientId) params.append('client_id', filters.clientId);
+    if (filters?.employeeId) params.append('employee_id', filters.employeeId);
+    if (filters?.dateFrom) params.append('date_from', filters.dateFrom);
+    if (filters?.dateTo) params.append('date_to', filters.dateTo);
+    if (filters?.refNumber) params.append('ref_number', filters.refNumber);
+    if (filters?.sort) params.append('sort', filters.sort);
+    if (filters?.limit) params.append('limit', filters.limit);
+    if (filters?.after) params.append('after', filters.after);
     return API.get(`/quotations?${params.toString()}`);
 };
 
@@ -71,7 +78,7 @@ export const createQuotation = async (quotationData) => {
 // Document generation
 export const generateQuote = async (quotationId) => {
     try {
-        const response = await fetch(`${API_BASE_URL}/generate-quote/${quotationId}`);
+        const response = await fetch(`${API_BASE_URL}/generate-quote/${quotationId}?download=true`);
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
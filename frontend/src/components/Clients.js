@@ -29,11 +29,18 @@ import {
 } from '@mui/icons-material';
 import { useNavigate } from 'react-router-dom';
 
+const pageParams = (after) => {
+    const params = new URLSearchParams({ limit: '100' });
+    if (after) params.append('after', after);
+    return params.toString();
+};
+
 export default function Clients() {
     const navigate = useNavigate();
     const [clients, setClients] = useState([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
+    const [nextCursor, setNextCursor] = useState(null);
     const [openDialog, setOpenDialog] = useState(false);
     const [selectedClient, setSelectedClient] = useState(null);
     const [formData, setFormData] = useState({
@@ -48,12 +55,14 @@ export default function Clients() {
         fetchClients();
     }, []);
 
-    const fetchClients = async () => {
+    // The list is paged by the server; "Load more" appends the next page
+    const fetchClients = async (after = null) => {
         try {
-            const response = await fetch('http://localhost:5000/api/clients');
+            const response = await fetch(`http://localhost:5000/api/clients?${pageParams(after)}`);
             const data = await response.json();
             if (data.success) {
-                setClients(data.data);
+                setClients(previous => (after ? [...previous, ...data.data] : data.data));
+                setNextCursor(data.next_cursor || null);
             } else {
                 throw new Error(data.error || 'Failed to fetch clients');
             }
@@ -219,6 +228,13 @@ export default function Clients() {
                     </TableBody>
                 </Table>
             </TableContainer>
+            {nextCursor && (
+                <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                    <Button variant="outlined" onClick={() => fetchClients(nextCursor)}>
+                        Load more
+                    </Button>
+                </Box>
+            )}
 
             <Dialog open={openDialog} onClose={handleCloseDialog} maxWidth="md" fullWidth>
                 <DialogTitle>
@@ -219,22 +219,16 @@ export default function Dashboard() {
     useEffect(() => {
         const fetchStats = async () => {
             try {
-                const [quotationsRes, clientsRes, itemsRes] = await Promise.all([
-                    fetch('http://localhost:5000/api/quotations'),
-                    fetch('http://localhost:5000/api/clients'),
-                    fetch('http://localhost:5000/api/items')
-                ]);
-
-                const [quotationsData, clientsData, itemsData] = await Promise.all([
-                    quotationsRes.json(),
-                    clientsRes.json(),
-                    itemsRes.json()
-                ]);
+                const response = await fetch('http://localhost:5000/api/stats');
+                const statsData = await response.json();
+                if (!statsData.success) {
+                    throw new Error(statsData.error || 'Failed to load statistics');
+                }
 
                 setStats({
-                    quotations: quotationsData.data?.length || 0,
-                    clients: clientsData.data?.length || 0,
-                    items: itemsData.data?.length || 0
+                    quotations: statsData.data.quotations,
+                    clients: statsData.data.clients,
+                    items: statsData.data.items
                 });
             } catch (error) {
                 console.error('Error fetching statistics:', error);
@@ -29,11 +29,18 @@ import {
 } from '@mui/icons-material';
 import { useNavigate } from 'react-router-dom';
 
+const pageParams = (after) => {
+    const params = new URLSearchParams({ limit: '100' });
+    if (after) params.append('after', after);
+    return params.toString();
+};
+
 export default function Employees() {
     const navigate = useNavigate();
     const [employees, setEmployees] = useState([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
+    const [nextCursor, setNextCursor] = useState(null);
     const [openDialog, setOpenDialog] = useState(false);
     const [selectedEmployee, setSelectedEmployee] = useState(null);
     const [formData, setFormData] = useState({
@@ -46,13 +53,15 @@ export default function Employees() {
         fetchEmployees();
     }, []);
 
-    const fetchEmployees = async () => {
+    // The list is paged by the server; "Load more" appends the next page
+    const fetchEmployees = async (after = null) => {
         try {
             setLoading(true);
-            const response = await fetch('http://localhost:5000/api/employees');
+            const response = await fetch(`http://localhost:5000/api/employees?${pageParams(after)}`);
             const data = await response.json();
             if (data.success) {
-                setEmployees(data.data);
+                setEmployees(previous => (after ? [...previous, ...data.data] : data.data));
+                setNextCursor(data.next_cursor || null);
             } else {
                 throw new Error(data.error || 'Failed to fetch employees');
             }
@@ -208,6 +217,13 @@ export default function Employees() {
                     </TableBody>
                 </Table>
             </TableContainer>
+            {nextCursor && (
+                <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                    <Button variant="outlined" onClick={() => fetchEmployees(nextCursor)}>
+                        Load more
+                    </Button>
+                </Box>
+            )}
 
             <Dialog open={openDialog} onClose={handleCloseDialog} maxWidth="sm" fullWidth>
                 <DialogTitle>
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
     Box,
     Container,
@@ -29,11 +29,22 @@ import {
 } from '@mui/icons-material';
 import { useNavigate } from 'react-router-dom';
 
+const pageParams = (after) => {
+    const params = new URLSearchParams({ limit: '100' });
+    if (after) params.append('after', after);
+    return params.toString();
+};
+
+// How long HSN typing must pause before its GST rate is looked up, in ms
+const HSN_LOOKUP_DELAY_MS = 400;
+
 export default function Items() {
     const navigate = useNavigate();
     const [items, setItems] = useState([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
+    const [nextCursor, setNextCursor] = useState(null);
+    const hsnLookupTimer = useRef(null);
     const [openDialog, setOpenDialog] = useState(false);
     const [selectedItem, setSelectedItem] = useState(null);
     const [formData, setFormData] = useState({
@@ -51,14 +62,16 @@ export default function Items() {
         fetchItems();
     }, []);
 
-    const fetchItems = async () => {
+    // The list is paged by the server; "Load more" appends the next page
+    const fetchItems = async (after = null) => {
         try {
-            const response = await fetch('http://localhost:5000/api/items', {
+            const response = await fetch(`http://localhost:5000/api/items?${pageParams(after)}`, {
                 credentials: 'include'
             });
             const data = await response.json();
             if (data.success) {
-                setItems(data.data);
+                setItems(previous => (after ? [...previous, ...data.data] : data.data));
+                setNextCursor(data.next_cursor || null);
             } else {
                 throw new Error(data.error || 'Failed to fetch items');
             }
@@ -136,8 +149,10 @@ export default function Items() {
             ...prev,
             hsn: hsnCode
         }));
+        // Looked up once typing pauses rather than on every keystroke
+        clearTimeout(hsnLookupTimer.current);
         if (hsnCode && hsnCode.length >= 4) {
-            fetchGstPercentage(hsnCode);
+            hsnLookupTimer.current = setTimeout(() => fetchGstPercentage(hsnCode), HSN_LOOKUP_DELAY_MS);
         }
     };
 
@@ -269,6 +284,13 @@ export default function Items() {
                     </TableBody>
                 </Table>
             </TableContainer>
+            {nextCursor && (
+                <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                    <Button variant="outlined" onClick={() => fetchItems(nextCursor)}>
+                        Load more
+                    </Button>
+                </Box>
+            )}
 
             <Dialog open={openDialog} onClose={handleCloseDialog} maxWidth="md" fullWidth>
                 <DialogTitle>
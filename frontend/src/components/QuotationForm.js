@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
     Box,
     Container,
@@ -30,6 +30,47 @@ import {
 import { useNavigate } from 'react-router-dom';
 import { format } from 'date-fns';
 
+// Columns each picker shows or copies into the quotation; the server fills in
+// the rest of the company, client and employee when the quotation is generated.
+// Employees have no ?fields= support, so their list is read whole.
+const PICKER_FIELDS = {
+    companies: 'name,ref_format,last_quote_number',
+    clients: 'name,business_name'
+};
+const ITEM_FIELDS = 'catalogue_id,description,pack_size,hsn,price,gst_percentage,brand';
+
+// How long HSN typing must pause before the lines' GST rates are looked up, in ms
+const HSN_LOOKUP_DELAY_MS = 400;
+
+// The company picked for the last generated quotation, preselected next time
+const LAST_COMPANY_KEY = 'quotationForm.lastCompanyId';
+
+const fetchRows = async (entity, params) => {
+    if (PICKER_FIELDS[entity]) params.append('fields', PICKER_FIELDS[entity]);
+    const response = await fetch(`http://localhost:5000/api/${entity}?${params.toString()}`, {
+        credentials: 'include'
+    });
+    const data = await response.json();
+    if (!data.success) {
+        throw new Error(data.error || `Failed to fetch ${entity}`);
+    }
+    return data;
+};
+
+// Fetch one page of a picker's list; returns { rows, nextCursor }
+const fetchPage = async (entity, after = null) => {
+    const params = new URLSearchParams({ limit: '100' });
+    if (after) params.append('after', after);
+    const data = await fetchRows(entity, params);
+    return { rows: data.data, nextCursor: data.next_cursor || null };
+};
+
+// Resolve saved rows by id, whichever page they are on
+const fetchByIds = async (entity, ids) => {
+    const data = await fetchRows(entity, new URLSearchParams({ ids: ids.join(',') }));
+    return data.data;
+};
+
 export default function QuotationForm() {
     const navigate = useNavigate();
     const [loading, setLoading] = useState(true);
@@ -40,6 +81,9 @@ export default function QuotationForm() {
     const [employees, setEmployees] = useState([]);
     const [clients, setClients] = useState([]);
     const [items, setItems] = useState([]);
+    const [cursors, setCursors] = useState({});
+    // Line id -> the HSN code its GST rate was taken from
+    const gstSources = useRef({});
     
     // Selected Values
     const [selectedCompany, setSelectedCompany] = useState(null);
@@ -75,46 +119,70 @@ export default function QuotationForm() {
 
     const fetchInitialData = async () => {
         try {
-            // Fetch companies
-            const companiesRes = await fetch('http://localhost:5000/api/companies', {
-                credentials: 'include'
+            // First page of each picker; the rest is loaded as the list is scrolled
+            const [companiesPage, employeesPage, clientsPage] = await Promise.all(
+                ['companies', 'employees', 'clients'].map(entity => fetchPage(entity))
+            );
+            setCompanies(companiesPage.rows);
+            setEmployees(employeesPage.rows);
+            setClients(clientsPage.rows);
+            setCursors({
+                companies: companiesPage.nextCursor,
+                employees: employeesPage.nextCursor,
+                clients: clientsPage.nextCursor
             });
-            const companiesData = await companiesRes.json();
-            if (companiesData.success) {
-                setCompanies(companiesData.data);
-            }
 
-            // Fetch employees
-            const employeesRes = await fetch('http://localhost:5000/api/employees', {
-                credentials: 'include'
-            });
-            const employeesData = await employeesRes.json();
-            if (employeesData.success) {
-                setEmployees(employeesData.data);
+            const lastCompanyId = Number(window.localStorage.getItem(LAST_COMPANY_KEY));
+            if (lastCompanyId) {
+                let lastCompany = companiesPage.rows.find(company => company.id === lastCompanyId);
+                if (!lastCompany) {
+                    [lastCompany] = await fetchByIds('companies', [lastCompanyId]);
+                    if (lastCompany) setCompanies(previous => [lastCompany, ...previous]);
+                }
+                if (lastCompany) handleCompanySelect(lastCompany);
             }
 
-            // Fetch clients
-            const clientsRes = await fetch('http://localhost:5000/api/clients', {
-                credentials: 'include'
-            });
-            const clientsData = await clientsRes.json();
-            if (clientsData.success) {
-                setClients(clientsData.data);
-            }
+            setLoading(false);
+        } catch (err) {
+            setError(err.message);
+            setLoading(false);
+        }
+    };
+
+    // Append the next page of a picker's options once its list is scrolled to the bottom
+    const loadMoreOnScroll = (entity, setRows) => async (event) => {
+        const list = event.currentTarget;
+        const cursor = cursors[entity];
+        if (!cursor || list.scrollTop + list.clientHeight < list.scrollHeight - 20) {
+            return;
+        }
+        setCursors(previous => ({ ...previous, [entity]: null }));
+        try {
+            const page = await fetchPage(entity, cursor);
+            setRows(previous => [...previous, ...page.rows]);
+            setCursors(previous => ({ ...previous, [entity]: page.nextCursor }));
+        } catch (err) {
+            setError(err.message);
+        }
+    };
 
-            // Fetch items
-            const itemsRes = await fetch('http://localhost:5000/api/items', {
+    // Items are looked up in the server's search index as the catalogue id is typed
+    const searchItems = async (query) => {
+        if (!query.trim()) {
+            setItems([]);
+            return;
+        }
+        try {
+            const params = new URLSearchParams({ q: query, limit: '20', fields: ITEM_FIELDS });
+            const response = await fetch(`http://localhost:5000/api/items/search?${params.toString()}`, {
                 credentials: 'include'
             });
-            const itemsData = await itemsRes.json();
-            if (itemsData.success) {
-                setItems(itemsData.data);
+            const data = await response.json();
+            if (data.success) {
+                setItems(data.data);
             }
-
-            setLoading(false);
         } catch (err) {
             setError(err.message);
-            setLoading(false);
         }
     };
 
@@ -157,6 +225,46 @@ export default function QuotationForm() {
         ]);
     };
 
+    // GST rates follow the HSN code typed into a line. All lines whose code changed
+    // are resolved in one request once typing pauses.
+    const hsnKey = quotationItems.map(item => `${item.id}:${item.hsn}`).join('|');
+    useEffect(() => {
+        const pending = quotationItems.filter(
+            item => item.hsn && item.hsn.length >= 4 && gstSources.current[item.id] !== item.hsn
+        );
+        if (pending.length === 0) {
+            return undefined;
+        }
+        const timer = setTimeout(() => resolveGstPercentages(pending), HSN_LOOKUP_DELAY_MS);
+        return () => clearTimeout(timer);
+    }, [hsnKey]); // eslint-disable-line react-hooks/exhaustive-deps
+
+    const resolveGstPercentages = async (lines) => {
+        try {
+            const response = await fetch('http://localhost:5000/api/hsn/gst', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                credentials: 'include',
+                body: JSON.stringify({ hsn_codes: [...new Set(lines.map(item => item.hsn))] })
+            });
+            const data = await response.json();
+            if (!data.success) {
+                return;
+            }
+            lines.forEach(item => { gstSources.current[item.id] = item.hsn; });
+            setQuotationItems(previous => previous.map(item => {
+                const gstPercentage = data.data[item.hsn];
+                if (gstPercentage == null || !lines.some(line => line.id === item.id && line.hsn === item.hsn)) {
+                    return item;
+                }
+                const gstValue = item.expanded_rate * (gstPercentage / 100);
+                return { ...item, gst_percentage: gstPercentage, gst_value: gstValue, total: item.expanded_rate + gstValue };
+            }));
+        } catch (err) {
+            console.error('Failed to resolve GST percentages:', err);
+        }
+    };
+
     // Remove item from quotation
     const removeQuotationItem = (index) => {
         const newItems = [...quotationItems];
@@ -194,6 +302,7 @@ export default function QuotationForm() {
     // Handle item selection
     const handleItemSelect = (index, selectedItem) => {
         if (selectedItem) {
+            gstSources.current[quotationItems[index].id] = selectedItem.hsn;
             const newItems = [...quotationItems];
             newItems[index] = {
                 ...newItems[index],
@@ -217,10 +326,7 @@ export default function QuotationForm() {
 
             // Prepare data for the quotation
             const quotationData = {
-                company: {
-                    ...selectedCompany,
-                    seal_image_url: selectedCompany?.seal_image_url || ''  // Ensure seal_image_url is included
-                },
+                company: selectedCompany,
                 employee: selectedEmployee,
                 client: selectedClient,
                 refNumber,
@@ -234,7 +340,8 @@ export default function QuotationForm() {
             };
 
             // Generate the quotation document
-            const response = await fetch('http://localhost:5000/api/generate-quotation', {
+            // download=true returns the document itself in the same response
+            const response = await fetch('http://localhost:5000/api/generate-quotation?download=true', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -243,14 +350,24 @@ export default function QuotationForm() {
                 body: JSON.stringify(quotationData)
             });
 
-            const result = await response.json();
-
-            if (result.success) {
-                // Download the generated document
-                window.open(`http://localhost:5000/api/download-quotation/${result.filename}`, '_blank');
-            } else {
-                throw new Error(result.message);
+            if (!response.ok) {
+                const result = await response.json();
+                throw new Error(result.message || result.error);
             }
+
+            window.localStorage.setItem(LAST_COMPANY_KEY, selectedCompany.id);
+
+            // Download the generated document
+            const blob = await response.blob();
+            const refNumber = response.headers.get('X-Ref-Number') || 'temp';
+            const url = window.URL.createObjectURL(blob);
+            const a = document.createElement('a');
+            a.href = url;
+            a.download = `quotation_${refNumber.replace(/\//g, '_')}.docx`;
+            document.body.appendChild(a);
+            a.click();
+            window.URL.revokeObjectURL(url);
+            document.body.removeChild(a);
         } catch (err) {
             setError(err.message);
         } finally {
@@ -295,6 +412,7 @@ export default function QuotationForm() {
                         <Autocomplete
                             options={companies}
                             getOptionLabel={(option) => option.name}
+                            ListboxProps={{ onScroll: loadMoreOnScroll('companies', setCompanies) }}
                             value={selectedCompany}
                             onChange={(_, newValue) => handleCompanySelect(newValue)}
                             renderInput={(params) => (
@@ -306,6 +424,7 @@ export default function QuotationForm() {
                         <Autocomplete
                             options={employees}
                             getOptionLabel={(option) => option.name}
+                            ListboxProps={{ onScroll: loadMoreOnScroll('employees', setEmployees) }}
                             value={selectedEmployee}
                             onChange={(_, newValue) => setSelectedEmployee(newValue)}
                             renderInput={(params) => (
@@ -342,6 +461,7 @@ export default function QuotationForm() {
                         <Autocomplete
                             options={clients}
                             getOptionLabel={(option) => `${option.name} - ${option.business_name}`}
+                            ListboxProps={{ onScroll: loadMoreOnScroll('clients', setClients) }}
                             value={selectedClient}
                             onChange={(_, newValue) => setSelectedClient(newValue)}
                             renderInput={(params) => (
@@ -390,6 +510,8 @@ export default function QuotationForm() {
                                             <Autocomplete
                                                 options={items}
                                                 getOptionLabel={(option) => option.catalogue_id || ''}
+                                                filterOptions={(options) => options}
+                                                onInputChange={(_, value, reason) => reason === 'input' && searchItems(value)}
                                                 onChange={(_, newValue) => handleItemSelect(index, newValue)}
                                                 renderInput={(params) => (
                                                     <TextField {...params} size="small" />
@@ -14,6 +14,7 @@ import {
     IconButton,
     Tooltip,
     CircularProgress,
+    Button,
 } from '@mui/material';
 import DownloadIcon from '@mui/icons-material/Download';
 import VisibilityIcon from '@mui/icons-material/Visibility';
@@ -25,16 +26,21 @@ export default function Quotations() {
     const [quotations, setQuotations] = useState([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
+    const [nextCursor, setNextCursor] = useState(null);
 
     useEffect(() => {
         fetchQuotations();
     }, []);
 
-    const fetchQuotations = async () => {
+    // The list is sorted, filtered and paged by the server, newest first
+    const fetchQuotations = async (after = null) => {
         try {
-            const response = await fetch('http://localhost:5000/api/quotations');
+            const params = new URLSearchParams({ sort: '-date', limit: '100' });
+            if (after) params.append('after', after);
+            const response = await fetch(`http://localhost:5000/api/quotations?${params.toString()}`);
             const data = await response.json();
-            setQuotations(data.data || []);
+            setQuotations(previous => (after ? [...previous, ...(data.data || [])] : data.data || []));
+            setNextCursor(data.next_cursor || null);
             setLoading(false);
         } catch (error) {
             console.error('Error fetching quotations:', error);
@@ -189,6 +195,13 @@ export default function Quotations() {
                         </TableBody>
                     </Table>
                 </TableContainer>
+                {nextCursor && (
+                    <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                        <Button variant="outlined" onClick={() => fetchQuotations(nextCursor)}>
+                            Load more
+                        </Button>
+                    </Box>
+                )}
             </Container>
         </Box>
     );
@@ -0,0 +1,7 @@
+-- Items are identified by catalogue number, pack size and brand. The bulk import
+-- (POST /api/items/import) upserts on these columns, which needs a unique
+-- constraint. NULLS NOT DISTINCT (Postgres 15+) treats a missing pack size or
+-- brand as a value of its own. Remove duplicate rows before applying.
+alter table items
+add constraint items_catalogue_pack_brand_key
+unique nulls not distinct (catalogue_id, pack_size, brand);
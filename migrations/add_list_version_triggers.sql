@@ -0,0 +1,37 @@
+-- List responses carry an ETag built from each table's row count and newest
+-- updated_at (see table_version in backend/app.py), so every update must bump
+-- updated_at. Companies and items already have the trigger; clients and
+-- employees get it here.
+alter table clients
+add column if not exists created_at timestamp with time zone default current_timestamp,
+add column if not exists updated_at timestamp with time zone default current_timestamp;
+
+alter table employees
+add column if not exists created_at timestamp with time zone default current_timestamp,
+add column if not exists updated_at timestamp with time zone default current_timestamp;
+
+create or replace function update_updated_at_column()
+returns trigger as $$
+begin
+    new.updated_at = current_timestamp;
+    return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists update_clients_updated_at on clients;
+create trigger update_clients_updated_at
+    before update on clients
+    for each row
+    execute function update_updated_at_column();
+
+drop trigger if exists update_employees_updated_at on employees;
+create trigger update_employees_updated_at
+    before update on employees
+    for each row
+    execute function update_updated_at_column();
+
+-- Each list GET reads the newest updated_at (order by updated_at desc limit 1)
+create index if not exists companies_updated_at_idx on companies (updated_at);
+create index if not exists clients_updated_at_idx on clients (updated_at);
+create index if not exists employees_updated_at_idx on employees (updated_at);
+create index if not exists items_updated_at_idx on items (updated_at);
@@ -0,0 +1,10 @@
+-- GET /api/quotations reads one keyset page at a time, ordered by the sort
+-- column and then id, optionally filtered by company, client, employee, date
+-- range and ref_number prefix. These indexes let each page be read without
+-- scanning the whole table.
+create index if not exists quotations_date_id_idx on quotations (date, id);
+create index if not exists quotations_company_date_id_idx on quotations (company_id, date, id);
+create index if not exists quotations_client_date_id_idx on quotations (client_id, date, id);
+create index if not exists quotations_employee_id_idx on quotations (employee_id);
+-- text_pattern_ops makes prefix LIKE 'QUOTE-2024%' usable with any collation
+create index if not exists quotations_ref_number_idx on quotations (ref_number text_pattern_ops);
@@ -0,0 +1,13 @@
+-- Atomically reserve p_count quotation numbers for a company and return the
+-- last one reserved. The single UPDATE ... RETURNING takes a row lock, so
+-- concurrent callers always receive distinct numbers.
+create or replace function allocate_quote_numbers(p_company_id bigint, p_count integer default 1)
+returns bigint
+language sql
+volatile
+as $$
+    update companies
+    set last_quote_number = coalesce(last_quote_number, 0) + p_count
+    where id = p_company_id
+    returning last_quote_number;
+$$;
@@ -0,0 +1,8 @@
+-- Aggregate quotation figures for the dashboard in a single round trip
+create or replace function quotation_totals()
+returns table (quotation_count bigint, total_value numeric)
+language sql
+stable
+as $$
+    select count(*), coalesce(sum(total), 0) from quotations;
+$$;